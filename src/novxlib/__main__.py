@@ -0,0 +1,219 @@
+"""Convert novelibre projects and documents from the command line.
+
+usage: python -m novxlib [-h] [-s SUFFIX] [-j JOBS] [-f] [--no-cache] [--compression {store,deflate}] [--level LEVEL] [--progress] [--memory-budget MB] [--journal FILE] [--watch] [--interval SECONDS] SOURCE [SOURCE ...]
+
+Each converted target is reported as a line of JSON on stdout.
+Without --force, targets whose files exist are reported as skipped.
+With --progress, messages and the export progress are printed to stderr.
+With --memory-budget, the memory of each conversion is traced; the results
+have an additional "memory" key with the peaks per phase and target, and the
+top allocation sites. Close to the budget, lower-memory strategies are used.
+With --journal, the conversions are recorded in a journal file. When run again
+with the same journal, finished conversions are skipped, failed ones are
+retried, and a summary of the failures is printed to stderr as JSON.
+With --watch, the documents of a single project are kept in sync until
+the process is interrupted or terminated. Each processed document is reported
+as a line of JSON on stdout; with --memory-budget, a memory report follows
+each conversion. Watch mode overwrites the documents it keeps in sync,
+so it does not accept --force, --jobs, or --journal.
+
+Exit status:
+    0 -- all conversions succeeded.
+    1 -- at least one conversion failed.
+    2 -- invalid command line.
+    130 -- interrupted.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import argparse
+import json
+import os
+import sys
+import zipfile
+
+from novxlib.converter.batch_converter import STATUS_ERROR
+from novxlib.converter.batch_converter import convert_files
+from novxlib.converter.memory_budget import MemoryBudget
+from novxlib.converter.novx_watcher import NovxWatcher
+from novxlib.converter.resumable_batch_runner import ResumableBatchRunner
+from novxlib.ui.ui_progress_headless import UiProgressHeadless
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+COMPRESSION_METHODS = dict(store=zipfile.ZIP_STORED, deflate=zipfile.ZIP_DEFLATED)
+
+
+def main(args=None):
+    """Parse the command line, run the conversions, and return the exit status."""
+    parser = argparse.ArgumentParser(
+        prog='novxlib',
+        description='Convert novelibre projects and documents without a GUI.'
+        )
+    parser.add_argument(
+        'sourcePaths',
+        nargs='+',
+        metavar='SOURCE',
+        help='novx project to export, or document to import.'
+        )
+    parser.add_argument(
+        '-s', '--suffix',
+        dest='suffixes',
+        action='append',
+        metavar='SUFFIX',
+        help='target file name suffix for exports; repeat for several targets. Default: all targets.'
+        )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='number of worker processes. Default: number of CPUs.'
+        )
+    parser.add_argument(
+        '-f', '--force',
+        action='store_true',
+        help='overwrite existing target files.'
+        )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='do not use the parsed project cache.'
+        )
+    parser.add_argument(
+        '--compression',
+        choices=sorted(COMPRESSION_METHODS),
+        default=None,
+        help='compression of exported ODF documents; "store" is fastest, for throwaway working copies. Default: deflate.'
+        )
+    parser.add_argument(
+        '--level',
+        type=int,
+        default=None,
+        help='deflate level of exported ODF documents, from 0 to 9. Default: 6.'
+        )
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help='print messages and the export progress to stderr.'
+        )
+    parser.add_argument(
+        '--memory-budget',
+        type=float,
+        default=None,
+        metavar='MB',
+        help='memory budget per conversion in megabytes; report the memory use.'
+        )
+    parser.add_argument(
+        '--journal',
+        metavar='FILE',
+        default=None,
+        help='journal file for resuming an interrupted batch.'
+        )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='keep the documents of a novx project in sync with the project.'
+        )
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=1.0,
+        metavar='SECONDS',
+        help='polling interval in watch mode. Default: 1.'
+        )
+    options = parser.parse_args(args)
+    if options.jobs is not None and options.jobs < 1:
+        parser.error('the number of jobs must be positive.')
+    if options.level is not None and not 0 <= options.level <= 9:
+        parser.error('the compression level must be between 0 and 9.')
+    if options.interval <= 0:
+        parser.error('the polling interval must be positive.')
+    if options.memory_budget is not None and options.memory_budget <= 0:
+        parser.error('the memory budget must be positive.')
+    if options.watch and (len(options.sourcePaths) != 1 or not options.sourcePaths[0].endswith('.novx')):
+        parser.error('watch mode requires exactly one novx project.')
+    if options.watch and (options.force or options.jobs is not None or options.journal):
+        parser.error('watch mode does not accept --force, --jobs, or --journal.')
+    if options.no_cache:
+        # Set in the environment, so that the worker processes inherit it.
+        os.environ['NOVXLIB_NO_CACHE'] = '1'
+    compression = COMPRESSION_METHODS.get(options.compression, None)
+    if options.watch:
+        return _watch(options, compression)
+
+    if options.journal:
+        return _run_journaled(options, compression)
+
+    exitStatus = EXIT_OK
+    try:
+        for result in convert_files(
+            options.sourcePaths,
+            options.suffixes,
+            options.force,
+            options.jobs,
+            compression,
+            options.level,
+            options.progress,
+            options.memory_budget,
+            ):
+            print(json.dumps(result), flush=True)
+            if result['status'] == STATUS_ERROR:
+                exitStatus = EXIT_FAILED
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+    return exitStatus
+
+
+def _run_journaled(options, compression):
+    """Run the conversions with a journal, print the summary, and return the exit status."""
+    runner = ResumableBatchRunner(options.journal, options.jobs)
+    exitStatus = EXIT_OK
+    try:
+        for result in runner.run(
+            options.sourcePaths,
+            options.suffixes,
+            taskArgs=(options.force, compression, options.level, options.progress, options.memory_budget),
+            ):
+            print(json.dumps(result), flush=True)
+            if result['status'] == STATUS_ERROR:
+                exitStatus = EXIT_FAILED
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+    print(json.dumps(runner.get_summary()), file=sys.stderr, flush=True)
+    return exitStatus
+
+
+def _watch(options, compression):
+    """Keep the documents of a project in sync, and return the exit status."""
+
+    def log(message):
+        print(json.dumps({'message': message}), flush=True)
+
+    def log_memory(report):
+        print(json.dumps({'memory': report}), flush=True)
+
+    watcher = NovxWatcher(options.sourcePaths[0], options.suffixes, interval=options.interval, log=log)
+    watcher.exporter.compression = compression
+    watcher.exporter.compressLevel = options.level
+    if options.progress:
+        watcher.exporter.ui = UiProgressHeadless(answer=True)
+        watcher.importer.ui = UiProgressHeadless(answer=True)
+    if options.memory_budget is not None:
+        budget = MemoryBudget(int(options.memory_budget * 1e6))
+        budget.reportHandler = log_memory
+        watcher.exporter.memoryBudget = budget
+        watcher.importer.memoryBudget = budget
+    watcher.run()
+    if watcher.stopSignal is not None:
+        return EXIT_INTERRUPTED
+
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
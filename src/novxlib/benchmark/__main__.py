@@ -0,0 +1,76 @@
+"""Benchmark the novelibre file converters with a synthetic project.
+
+usage: python -m novxlib.benchmark [options] WORKDIR
+
+Exit status:
+    0 -- no regression.
+    1 -- a converter failed, or is slower or needs more memory than the baseline.
+    2 -- invalid command line.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import argparse
+import sys
+
+from novxlib.benchmark.benchmark_runner import BenchmarkRunner
+from novxlib.benchmark.project_generator import ProjectGenerator
+
+
+def main(args=None):
+    """Parse the command line, run the benchmarks, and return the exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m novxlib.benchmark',
+        description='Benchmark the novelibre file converters with a synthetic project.'
+        )
+    parser.add_argument('workDir', metavar='WORKDIR', help='directory for the generated files.')
+    parser.add_argument('--chapters', type=int, default=20)
+    parser.add_argument('--sections', type=int, default=5, help='sections per chapter.')
+    parser.add_argument('--words', type=int, default=1000, help='words per section.')
+    parser.add_argument('--characters', type=int, default=20)
+    parser.add_argument('--locations', type=int, default=10)
+    parser.add_argument('--items', type=int, default=10)
+    parser.add_argument('--plot-lines', type=int, default=3)
+    parser.add_argument('--plot-points', type=int, default=5, help='plot points per plot line.')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per converter.')
+    parser.add_argument('--baseline', help='baseline JSON file to compare with.')
+    parser.add_argument('--save-baseline', help='store the results as a baseline JSON file.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative deterioration.')
+    options = parser.parse_args(args)
+
+    generator = ProjectGenerator(
+        chapters=options.chapters,
+        sectionsPerChapter=options.sections,
+        wordsPerSection=options.words,
+        characters=options.characters,
+        locations=options.locations,
+        items=options.items,
+        plotLines=options.plot_lines,
+        plotPointsPerLine=options.plot_points,
+        )
+    runner = BenchmarkRunner(generator, options.workDir, options.repeat)
+    results = runner.run()
+    print(f'{"benchmark":<24} {"seconds":>9} {"peak MB":>9} {"sections/s":>11} {"MB/s":>8}')
+    for result in results:
+        if result['error']:
+            print(f'{result["name"]:<24} {result["error"]}')
+        else:
+            print(
+                f'{result["name"]:<24} {result["seconds"]:>9.4f} {result["peakMemory"] / 1e6:>9.2f} '
+                f'{result["sectionsPerSecond"]:>11.1f} {result["megabytesPerSecond"]:>8.2f}'
+                )
+    if options.save_baseline:
+        runner.save_baseline(results, options.save_baseline)
+    if options.baseline:
+        regressions = runner.compare(results, runner.load_baseline(options.baseline), options.tolerance)
+        if regressions:
+            for message in regressions:
+                print(f'REGRESSION: {message}', file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Provide a class for timing the novelibre file converters.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import json
+import os
+import shutil
+import time
+import tracemalloc
+
+from novxlib.converter.novx_exporter import NovxExporter
+from novxlib.converter.novx_importer import NovxImporter
+from novxlib.novx.novx_cache import get_default_cache
+from novxlib.ui.ui_headless import UiHeadless
+from novxlib.yw.yw7_stream_writer import Yw7StreamWriter
+from nvlib.model.data.novel import Novel
+from nvlib.model.data.nv_tree import NvTree
+from nvlib.model.novx.novx_file import NovxFile
+
+
+class BenchmarkRunner:
+    """Timer for all export and import file classes, and for the yw7 export.
+
+    For each converter, the fastest of several runs is taken as the time.
+    The peak memory is measured in an extra run with tracemalloc,
+    so that tracing does not distort the times.
+    The parsed project cache is disabled while measuring.
+
+    Public methods:
+        run() -- run all benchmarks and return a list of results.
+        compare(results, baseline, tolerance) -- return a list of regression messages.
+        load_baseline(filePath) -- return the results stored in a baseline file.
+        save_baseline(results, filePath) -- store results as a baseline.
+
+    Public instance variables:
+        generator: ProjectGenerator -- generator of the synthetic project.
+        workDir: str -- directory for the generated files.
+        repeat: int -- number of timed runs per converter.
+    
+    Each result is a dictionary with the keys:
+        name -- benchmark name, e.g. "export:_manuscript".
+        seconds -- time of the fastest run.
+        peakMemory -- peak of the traced memory allocations in bytes.
+        sections -- number of sections of the project.
+        bytes -- size of the file produced by an export, or read by an import.
+        sectionsPerSecond -- section throughput.
+        megabytesPerSecond -- file throughput.
+        error -- error message, or None.
+    """
+
+    def __init__(self, generator, workDir, repeat=3):
+        """Set the benchmark parameters.
+        
+        Positional arguments:
+            generator: ProjectGenerator -- generator of the synthetic project.
+            workDir: str -- directory for the generated files.
+            
+        Optional arguments:
+            repeat: int -- number of timed runs per converter.
+        """
+        self.generator = generator
+        self.workDir = workDir
+        self.repeat = max(1, repeat)
+        self._projectPath = os.path.join(workDir, 'benchmark.novx')
+        self._sections = generator.chapters * generator.sectionsPerChapter
+
+    def run(self):
+        """Run all benchmarks and return a list of results."""
+        os.makedirs(self.workDir, exist_ok=True)
+        self.generator.write(self._projectPath)
+        cache = get_default_cache()
+        cacheEnabled = cache.enabled
+        cache.enabled = False
+        try:
+            results = [self._run_parse()]
+            results.extend(self._run_exports())
+            results.extend(self._run_imports())
+            results.append(self._run_yw7())
+        finally:
+            cache.enabled = cacheEnabled
+        return results
+
+    def compare(self, results, baseline, tolerance=0.25):
+        """Return a list of messages about results that are worse than the baseline.
+        
+        Positional arguments:
+            results: list -- results returned by run().
+            baseline: dict -- baseline results with the names as keys.
+            
+        Optional arguments:
+            tolerance: float -- allowed relative deterioration.
+        """
+        messages = []
+        for result in results:
+            if result['error']:
+                messages.append(f'{result["name"]}: {result["error"]}')
+                continue
+
+            reference = baseline.get(result['name'], None)
+            if reference is None or reference.get('error'):
+                continue
+
+            for key, unit in (('seconds', 's'), ('peakMemory', 'bytes')):
+                if reference[key] and result[key] > reference[key] * (1 + tolerance):
+                    messages.append(
+                        f'{result["name"]}: {key} {result[key]:.4g} {unit} exceeds baseline {reference[key]:.4g} {unit}'
+                        )
+        return messages
+
+    def load_baseline(self, filePath):
+        """Return the results stored in a baseline file as a dictionary with the names as keys.
+        
+        Positional arguments:
+            filePath: str -- path to the baseline JSON file.
+        """
+        with open(filePath, 'r', encoding='utf-8') as f:
+            return {result['name']: result for result in json.load(f)}
+
+    def save_baseline(self, results, filePath):
+        """Store results as a baseline.
+        
+        Positional arguments:
+            results: list -- results returned by run().
+            filePath: str -- path to the baseline JSON file.
+        """
+        with open(filePath, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    def _get_result(self, name, seconds, peakMemory, fileSize, error=None):
+        """Return a result dictionary."""
+        if seconds:
+            sectionsPerSecond = self._sections / seconds
+            megabytesPerSecond = fileSize / seconds / 1e6
+        else:
+            sectionsPerSecond = megabytesPerSecond = 0
+        return dict(
+            name=name,
+            seconds=seconds,
+            peakMemory=peakMemory,
+            sections=self._sections,
+            bytes=fileSize,
+            sectionsPerSecond=sectionsPerSecond,
+            megabytesPerSecond=megabytesPerSecond,
+            error=error,
+            )
+
+    def _measure(self, name, function, setup=None):
+        """Time a function and trace its peak memory; return a result dictionary.
+        
+        The function returns the path of the file whose size is measured,
+        and raises an exception in case of error.
+        The setup function is called before each run, but is not measured.
+        """
+        try:
+            seconds = None
+            for __ in range(self.repeat):
+                if setup is not None:
+                    setup()
+                startTime = time.perf_counter()
+                filePath = function()
+                elapsed = time.perf_counter() - startTime
+                if seconds is None or elapsed < seconds:
+                    seconds = elapsed
+            if setup is not None:
+                setup()
+            tracemalloc.start()
+            try:
+                function()
+                __, peakMemory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        except Exception as ex:
+            return self._get_result(name, 0, 0, 0, str(ex))
+
+        return self._get_result(name, seconds, peakMemory, os.path.getsize(filePath))
+
+    def _run_exports(self):
+        """Return a list of results for all export target classes."""
+        results = []
+        exporter = NovxExporter()
+        for suffix in exporter.exportTargets.get_suffixes():
+
+            def export():
+                exporter.ui = UiHeadless(answer=True)
+                exporter.run(self._projectPath, suffix=suffix)
+                if exporter.ui.infoHowText.startswith('!'):
+                    raise RuntimeError(exporter.ui.infoHowText[1:])
+
+                return exporter.newFile
+
+            results.append(self._measure(f'export:{suffix}', export))
+        return results
+
+    def _run_imports(self):
+        """Return a list of results for all import source classes."""
+        results = []
+        importer = NovxImporter()
+        importDir = os.path.join(self.workDir, 'import')
+        os.makedirs(importDir, exist_ok=True)
+        projectCopy = os.path.join(importDir, os.path.basename(self._projectPath))
+        for suffix in importer.importSources.get_suffixes():
+            fileClass = importer.importSources.get_class(suffix)
+            fileName, __ = os.path.splitext(self._projectPath)
+            documentPath = f'{fileName}{suffix}{fileClass.EXTENSION}'
+            documentCopy = os.path.join(importDir, os.path.basename(documentPath))
+
+            def setup():
+                # The import changes the project, so each run starts with fresh copies.
+                if not os.path.isfile(documentPath):
+                    exporter = NovxExporter()
+                    exporter.ui = UiHeadless(answer=True)
+                    exporter.run(self._projectPath, suffix=suffix)
+                shutil.copyfile(self._projectPath, projectCopy)
+                shutil.copyfile(documentPath, documentCopy)
+
+            def import_document():
+                importer.ui = UiHeadless(answer=True)
+                importer.run(documentCopy, suffix='')
+                if importer.ui.infoHowText.startswith('!'):
+                    raise RuntimeError(importer.ui.infoHowText[1:])
+
+                return documentCopy
+
+            results.append(self._measure(f'import:{suffix}', import_document, setup))
+        return results
+
+    def _run_parse(self):
+        """Return the result for reading the novx file."""
+
+        def parse():
+            source = NovxFile(self._projectPath)
+            source.novel = Novel(tree=NvTree())
+            source.read()
+            return self._projectPath
+
+        return self._measure('parse:novx', parse)
+
+    def _run_yw7(self):
+        """Return the result for the yw7 export, as done by the export_yw7 sample script."""
+        fileName, __ = os.path.splitext(self._projectPath)
+        targetPath = f'{fileName}.yw7'
+
+        def export_yw7():
+            source = NovxFile(self._projectPath)
+            source.novel = Novel(tree=NvTree())
+            source.read()
+            target = Yw7StreamWriter(targetPath)
+            target.novel = source.novel
+            target.wcLog = source.wcLog
+            target.write()
+            return targetPath
+
+        return self._measure('export:yw7', export_yw7)
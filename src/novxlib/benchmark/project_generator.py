@@ -0,0 +1,204 @@
+"""Provide a class for generating synthetic novelibre projects.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import random
+
+from nvlib.model.data.chapter import Chapter
+from nvlib.model.data.character import Character
+from nvlib.model.data.novel import Novel
+from nvlib.model.data.nv_tree import NvTree
+from nvlib.model.data.plot_line import PlotLine
+from nvlib.model.data.plot_point import PlotPoint
+from nvlib.model.data.section import Section
+from nvlib.model.data.world_element import WorldElement
+from nvlib.model.novx.novx_file import NovxFile
+from nvlib.novx_globals import CHAPTER_PREFIX
+from nvlib.novx_globals import CHARACTER_PREFIX
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import ITEM_PREFIX
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import LOCATION_PREFIX
+from nvlib.novx_globals import PLOT_LINE_PREFIX
+from nvlib.novx_globals import PLOT_POINT_PREFIX
+from nvlib.novx_globals import PL_ROOT
+from nvlib.novx_globals import SECTION_PREFIX
+
+_WORDS = (
+    'the', 'night', 'was', 'dark', 'and', 'stormy', 'she', 'said', 'nothing',
+    'about', 'letter', 'window', 'old', 'house', 'river', 'never', 'again',
+    'morning', 'came', 'slowly', 'over', 'hills', 'when', 'he', 'returned',
+)
+
+
+class ProjectGenerator:
+    """Generator for synthetic novelibre projects of configurable size.
+
+    The content is pseudo-random, but reproducible for a given seed.
+
+    Public methods:
+        get_novel() -- return a new synthetic Novel instance.
+        write(filePath) -- write a synthetic novx file.
+
+    Public instance variables:
+        chapters: int -- number of chapters.
+        sectionsPerChapter: int -- number of sections per chapter.
+        wordsPerSection: int -- number of words per section.
+        characters: int -- number of characters.
+        locations: int -- number of locations.
+        items: int -- number of items.
+        plotLines: int -- number of plot lines.
+        plotPointsPerLine: int -- number of plot points per plot line.
+        seed: int -- seed for the random content.
+    """
+
+    def __init__(
+            self,
+            chapters=20,
+            sectionsPerChapter=5,
+            wordsPerSection=1000,
+            characters=20,
+            locations=10,
+            items=10,
+            plotLines=3,
+            plotPointsPerLine=5,
+            seed=0,
+            ):
+        """Set the project size."""
+        self.chapters = chapters
+        self.sectionsPerChapter = sectionsPerChapter
+        self.wordsPerSection = wordsPerSection
+        self.characters = characters
+        self.locations = locations
+        self.items = items
+        self.plotLines = plotLines
+        self.plotPointsPerLine = plotPointsPerLine
+        self.seed = seed
+
+    def get_novel(self):
+        """Return a new synthetic Novel instance."""
+        rnd = random.Random(self.seed)
+        novel = Novel(tree=NvTree())
+        novel.title = 'Synthetic project'
+        novel.authorName = 'novxlib benchmark'
+        novel.desc = self._get_text(rnd, 50)
+
+        crIds = []
+        for i in range(1, self.characters + 1):
+            crId = f'{CHARACTER_PREFIX}{i}'
+            character = Character()
+            character.title = f'Character {i}'
+            character.fullName = f'Character {i} Synthetic'
+            character.desc = self._get_text(rnd, 30)
+            character.bio = self._get_text(rnd, 50)
+            character.goals = self._get_text(rnd, 20)
+            character.isMajor = i <= max(1, self.characters // 5)
+            character.tags = [f'tag{i % 7}']
+            novel.characters[crId] = character
+            novel.tree.append(CR_ROOT, crId)
+            crIds.append(crId)
+
+        lcIds = self._add_world_elements(rnd, novel, novel.locations, LC_ROOT, LOCATION_PREFIX, 'Location', self.locations)
+        itIds = self._add_world_elements(rnd, novel, novel.items, IT_ROOT, ITEM_PREFIX, 'Item', self.items)
+
+        plIds = []
+        for i in range(1, self.plotLines + 1):
+            plId = f'{PLOT_LINE_PREFIX}{i}'
+            plotLine = PlotLine()
+            plotLine.title = f'Plot line {i}'
+            plotLine.shortName = f'PL{i}'
+            plotLine.desc = self._get_text(rnd, 30)
+            plotLine.sections = []
+            novel.plotLines[plId] = plotLine
+            novel.tree.append(PL_ROOT, plId)
+            plIds.append(plId)
+
+        scIds = []
+        scNumber = 0
+        for i in range(1, self.chapters + 1):
+            chId = f'{CHAPTER_PREFIX}{i}'
+            chapter = Chapter()
+            chapter.title = f'Chapter {i}'
+            chapter.desc = self._get_text(rnd, 30)
+            chapter.chLevel = 2
+            chapter.chType = 0
+            novel.chapters[chId] = chapter
+            novel.tree.append(CH_ROOT, chId)
+            for __ in range(self.sectionsPerChapter):
+                scNumber += 1
+                scId = f'{SECTION_PREFIX}{scNumber}'
+                section = Section()
+                section.title = f'Section {scNumber}'
+                section.desc = self._get_text(rnd, 30)
+                section.scType = 0
+                section.status = rnd.randint(1, 5)
+                section.sectionContent = self._get_content(rnd, self.wordsPerSection)
+                section.characters = rnd.sample(crIds, min(3, len(crIds)))
+                section.locations = rnd.sample(lcIds, min(1, len(lcIds)))
+                section.items = rnd.sample(itIds, min(1, len(itIds)))
+                section.tags = [f'tag{scNumber % 11}']
+                if plIds:
+                    plId = plIds[scNumber % len(plIds)]
+                    section.scPlotLines = [plId]
+                    novel.plotLines[plId].sections.append(scId)
+                novel.sections[scId] = section
+                novel.tree.append(chId, scId)
+                scIds.append(scId)
+
+        ppNumber = 0
+        for plId in plIds:
+            for j in range(self.plotPointsPerLine):
+                ppNumber += 1
+                ppId = f'{PLOT_POINT_PREFIX}{ppNumber}'
+                plotPoint = PlotPoint()
+                plotPoint.title = f'Plot point {ppNumber}'
+                plotPoint.desc = self._get_text(rnd, 20)
+                sections = novel.plotLines[plId].sections
+                if sections:
+                    plotPoint.sectionAssoc = sections[j % len(sections)]
+                novel.plotPoints[ppId] = plotPoint
+                novel.tree.append(plId, ppId)
+        return novel
+
+    def write(self, filePath):
+        """Write a synthetic novx file.
+        
+        Positional arguments:
+            filePath: str -- path to the novx file to create.
+        """
+        novxFile = NovxFile(filePath)
+        novxFile.novel = self.get_novel()
+        novxFile.wcLog = {}
+        novxFile.write()
+
+    def _add_world_elements(self, rnd, novel, elements, root, prefix, name, count):
+        """Add locations or items; return a list of their IDs."""
+        elemIds = []
+        for i in range(1, count + 1):
+            elemId = f'{prefix}{i}'
+            element = WorldElement()
+            element.title = f'{name} {i}'
+            element.desc = self._get_text(rnd, 30)
+            element.tags = [f'tag{i % 5}']
+            elements[elemId] = element
+            novel.tree.append(root, elemId)
+            elemIds.append(elemId)
+        return elemIds
+
+    def _get_content(self, rnd, words):
+        """Return section content as novx paragraphs."""
+        paragraphs = []
+        while words > 0:
+            length = min(words, rnd.randint(20, 80))
+            paragraphs.append(f'<p>{self._get_text(rnd, length)}</p>')
+            words -= length
+        return ''.join(paragraphs)
+
+    def _get_text(self, rnd, words):
+        """Return a sentence-like string of random words."""
+        text = ' '.join(rnd.choice(_WORDS) for __ in range(words))
+        return f'{text.capitalize()}.'
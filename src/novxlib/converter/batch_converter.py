@@ -0,0 +1,153 @@
+"""Provide functions for converting many files on a process pool.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+import os
+
+from novxlib.ui.ui_headless import UiHeadless
+from novxlib.ui.ui_progress_headless import UiProgressHeadless
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_SKIPPED = 'skipped'
+
+
+def convert_file(sourcePath, suffixes, overwrite=False, compression=None, compressLevel=None, progress=False,
+                 memoryBudget=None):
+    """Convert a single file without user interaction.
+    
+    Positional arguments:
+        sourcePath: str -- path to the source file.
+        suffixes: list of str -- target file name suffixes for exporting a novx file.
+        
+    Optional arguments:
+        overwrite: bool -- if True, overwrite existing target files.
+        compression: int -- zip compression of exported ODF packages, see NovxExporter.
+        compressLevel: int -- deflate level of exported ODF packages, see NovxExporter.
+        progress: bool -- if True, print messages and the export progress to stderr.
+        memoryBudget: float -- if set, trace the memory against a budget in megabytes.
+
+    A novx file is read once and exported to all targets.
+    Targets whose files exist are skipped, unless overwrite is True.
+    Any other file is imported into its novx project; suffixes are ignored then.
+    Return a list of result dictionaries with the keys 
+    "source", "suffix", "status", "message", and "output".
+    With a memory budget, the results have an additional "memory" key 
+    with the MemoryBudget report of the conversion.
+    """
+    # Import the converters in the worker, so that the main process does not load the file classes.
+    from novxlib.converter.novx_exporter import NovxExporter
+    from novxlib.converter.novx_importer import NovxImporter
+
+    budget = None
+    if memoryBudget is not None:
+        from novxlib.converter.memory_budget import MemoryBudget
+        budget = MemoryBudget(int(memoryBudget * 1e6))
+    if progress:
+        ui = UiProgressHeadless(answer=overwrite)
+    else:
+        ui = UiHeadless(answer=overwrite)
+    if sourcePath.endswith('.novx'):
+        converter = NovxExporter()
+        converter.ui = ui
+        converter.compression = compression
+        converter.compressLevel = compressLevel
+        converter.memoryBudget = budget
+        results = []
+        if not overwrite:
+            suffixes, results = _skip_existing_targets(converter, sourcePath, suffixes)
+        if suffixes is None or suffixes:
+            # Writers run one by one; parallelism is across the source files.
+            messages = converter.export_batch(sourcePath, suffixes, maxWorkers=1, useThreads=True)
+            results.extend(
+                _get_result(sourcePath, suffix, message, converter.newFiles.get(suffix, None))
+                for suffix, message in messages.items()
+                )
+    else:
+        converter = NovxImporter()
+        converter.ui = ui
+        converter.memoryBudget = budget
+        try:
+            converter.run(sourcePath, suffix='')
+        except Exception as ex:
+            ui.set_status(f'!{str(ex)}')
+        results = [_get_result(sourcePath, None, ui.infoHowText, converter.newFile)]
+    if budget is not None:
+        report = budget.get_report()
+        for result in results:
+            result['memory'] = report
+    return results
+
+
+def convert_files(sourcePaths, suffixes, overwrite=False, maxWorkers=None, compression=None, compressLevel=None,
+                  progress=False, memoryBudget=None):
+    """Convert many files on a process pool.
+    
+    Positional arguments:
+        sourcePaths: list of str -- paths to the source files.
+        suffixes: list of str -- target file name suffixes for exporting novx files.
+        
+    Optional arguments:
+        overwrite: bool -- if True, overwrite existing target files.
+        maxWorkers: int -- maximum number of worker processes.
+        compression: int -- zip compression of exported ODF packages, see NovxExporter.
+        compressLevel: int -- deflate level of exported ODF packages, see NovxExporter.
+        progress: bool -- if True, the workers print messages and the export progress to stderr.
+        memoryBudget: float -- if set, trace the memory of each conversion against a budget in megabytes.
+
+    Generate result dictionaries as the conversions are completed. 
+    """
+    with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = {
+            executor.submit(
+                convert_file,
+                sourcePath,
+                suffixes,
+                overwrite,
+                compression,
+                compressLevel,
+                progress,
+                memoryBudget,
+                ): sourcePath
+            for sourcePath in sourcePaths
+            }
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as ex:
+                results = [_get_result(futures[future], None, f'!{str(ex)}')]
+            for result in results:
+                yield result
+
+
+def _get_result(sourcePath, suffix, message, output=None):
+    """Return a result dictionary for a status message."""
+    if message.startswith('!'):
+        return dict(source=sourcePath, suffix=suffix, status=STATUS_ERROR, message=message[1:], output=None)
+
+    return dict(source=sourcePath, suffix=suffix, status=STATUS_OK, message=message, output=output)
+
+
+def _skip_existing_targets(converter, sourcePath, suffixes):
+    """Return the suffixes whose target files do not exist, and the skipped results of the others."""
+    if suffixes is None:
+        suffixes = converter.exportTargets.get_suffixes()
+    pending = []
+    results = []
+    for suffix in suffixes:
+        targetPath = converter.get_target_path(sourcePath, suffix)
+        if targetPath is not None and os.path.isfile(targetPath):
+            results.append(dict(
+                source=sourcePath,
+                suffix=suffix,
+                status=STATUS_SKIPPED,
+                message=f'File exists: "{targetPath}".',
+                output=None,
+                ))
+        else:
+            pending.append(suffix)
+    return pending, results
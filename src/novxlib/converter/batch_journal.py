@@ -0,0 +1,112 @@
+"""Provide a class for an append-only journal of batch conversions.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import json
+import os
+import time
+
+from novxlib.converter.batch_converter import STATUS_OK
+
+
+class BatchJournal:
+    """Append-only JSON lines journal of the conversions of a batch.
+
+    Each line records a conversion attempt with the keys:
+        source -- absolute path of the source file.
+        suffix -- target file name suffix, or None for an import.
+        hash -- content hash of the source file.
+        status -- "ok", "error", or "skipped".
+        message -- status message.
+        attempt -- number of the attempt within the batch run.
+        time -- time of the record in seconds since the epoch.
+    Each record is flushed to the disk, so it survives a crash.
+    A line that was cut off by a crash is ignored on reading.
+
+    Public methods:
+        close() -- close the journal file.
+        is_done(source, suffix, sourceHash) -- return True if the conversion has succeeded.
+        record(source, suffix, sourceHash, status, message, attempt) -- append a record.
+
+    Public instance variables:
+        filePath: str -- path to the journal file.
+    """
+
+    def __init__(self, filePath):
+        """Read the existing records, and open the journal for appending.
+
+        Positional arguments:
+            filePath: str -- path to the journal file.
+        """
+        self.filePath = filePath
+        self._done = set()
+        if os.path.isfile(filePath):
+            with open(filePath, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        key = (entry['source'], entry['suffix'], entry['hash'])
+                        status = entry['status']
+                    except (ValueError, KeyError, TypeError):
+                        continue
+
+                    if status == STATUS_OK:
+                        self._done.add(key)
+                    else:
+                        self._done.discard(key)
+        self._file = open(filePath, 'a', encoding='utf-8')
+        if self._file.tell() and not self._ends_with_newline():
+            # Terminate a line that was cut off, so the next record starts on a new line.
+            self._file.write('\n')
+
+    def close(self):
+        """Close the journal file."""
+        if not self._file.closed:
+            self._file.close()
+
+    def is_done(self, source, suffix, sourceHash):
+        """Return True if the last record of a conversion reports success.
+
+        Positional arguments:
+            source: str -- absolute path of the source file.
+            suffix: str -- target file name suffix, or None for an import.
+            sourceHash: str -- content hash of the source file.
+        """
+        return (source, suffix, sourceHash) in self._done
+
+    def record(self, source, suffix, sourceHash, status, message, attempt):
+        """Append a record, and flush it to the disk.
+
+        Positional arguments:
+            source: str -- absolute path of the source file.
+            suffix: str -- target file name suffix, or None for an import.
+            sourceHash: str -- content hash of the source file.
+            status: str -- "ok", "error", or "skipped".
+            message: str -- status message.
+            attempt: int -- number of the attempt within the batch run.
+        """
+        entry = dict(
+            source=source,
+            suffix=suffix,
+            hash=sourceHash,
+            status=status,
+            message=message,
+            attempt=attempt,
+            time=time.time(),
+            )
+        self._file.write(f'{json.dumps(entry)}\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        key = (source, suffix, sourceHash)
+        if status == STATUS_OK:
+            self._done.add(key)
+        else:
+            self._done.discard(key)
+
+    def _ends_with_newline(self):
+        """Return True if the journal file ends with a line break."""
+        with open(self.filePath, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
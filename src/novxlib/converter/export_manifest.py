@@ -0,0 +1,190 @@
+"""Provide a class for the sidecar manifest of incremental exports.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import json
+import os
+
+from novxlib.model.element_hashes import get_part_digest
+
+
+class ExportManifest:
+    """Record of the model parts each exported document was generated from.
+    
+    The manifest is a JSON file next to the novx project. 
+    It holds the per-element hashes of the last export, and 
+    for each target the part digests it was generated from,
+    and the size and modification time of the written file.
+    A target is only up to date if its part digests match the current ones;
+    while the project file is unchanged, they are derived from the recorded element hashes,
+    because the targets may have been written by different exports.
+
+    Public methods:
+        has_target(suffix) -- return True if a target is recorded.
+        is_source_unchanged(sourcePath) -- return True if the project file is as recorded.
+        is_target_unchanged(suffix, targetPath) -- return True if a target file is as recorded.
+        is_up_to_date(suffix, targetPath, parts, partDigests) -- return True if the target needs no update.
+        read() -- load the manifest file, if any.
+        remove_target(suffix) -- forget a target, e.g. after a failed write.
+        set_hashes(sourcePath, novelHashes) -- record the current state of the project.
+        set_target(suffix, targetPath, parts, partDigests) -- record a written target.
+        write() -- save the manifest file.
+
+    Public instance variables:
+        filePath: str -- path to the manifest file.
+        elementHashes: dict -- per-element hashes of the last export, grouped by parts.
+    """
+    SUFFIX = '_export_manifest'
+    EXTENSION = '.json'
+    VERSION = 1
+
+    def __init__(self, sourcePath):
+        """Set the manifest file path for a project.
+        
+        Positional arguments:
+            sourcePath: str -- path to the novx file.
+        """
+        fileName, __ = os.path.splitext(sourcePath)
+        self.filePath = f'{fileName}{self.SUFFIX}{self.EXTENSION}'
+        self.elementHashes = {}
+        self._source = None
+        self._targets = {}
+        self._recordedDigests = None
+
+    def has_target(self, suffix):
+        """Return True if a target is recorded for the suffix."""
+        return suffix in self._targets
+
+    def is_source_unchanged(self, sourcePath):
+        """Return True if the project file has the recorded size and modification time.
+        
+        Positional arguments:
+            sourcePath: str -- path to the novx file.
+        """
+        return self._source is not None and self._source == self._get_file_stat(sourcePath)
+
+    def is_target_unchanged(self, suffix, targetPath):
+        """Return True if a target is recorded, and its file has the recorded size and modification time.
+        
+        Positional arguments:
+            suffix: str -- target file name suffix.
+            targetPath: str -- path to the target file.
+        """
+        entry = self._targets.get(suffix, None)
+        return entry is not None and entry['path'] == targetPath and entry['stat'] == self._get_file_stat(targetPath)
+
+    def is_up_to_date(self, suffix, targetPath, parts, partDigests=None):
+        """Return True if a target is recorded with the same inputs, and was not changed since.
+        
+        Positional arguments:
+            suffix: str -- target file name suffix.
+            targetPath: str -- path to the target file.
+            parts: tuple of str -- names of the model parts the target depends on.
+        
+        Optional arguments:
+            partDigests: dict -- current part digests. 
+                         If None, the source is known to be unchanged, 
+                         and the digests of the recorded element hashes are used. 
+        """
+        if not self.is_target_unchanged(suffix, targetPath):
+            return False
+
+        entry = self._targets[suffix]
+        if partDigests is None:
+            if self._recordedDigests is None:
+                self._recordedDigests = self.get_part_digests(self.elementHashes)
+            partDigests = self._recordedDigests
+        return all(entry['digests'].get(part, None) == partDigests.get(part, None) for part in parts)
+
+    def read(self):
+        """Load the manifest file. A missing or unreadable manifest is treated as empty."""
+        try:
+            with open(self.filePath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.VERSION:
+                return
+
+            self._source = data['source']
+            self._targets = data['targets']
+            self.elementHashes = data['elements']
+        except (OSError, ValueError, KeyError):
+            self._source = None
+            self._targets = {}
+            self.elementHashes = {}
+        self._recordedDigests = None
+
+    def remove_target(self, suffix):
+        """Forget a target, so it is written by the next export.
+        
+        Positional arguments:
+            suffix: str -- target file name suffix.
+        """
+        self._targets.pop(suffix, None)
+
+    def set_hashes(self, sourcePath, novelHashes):
+        """Record the current state of the project.
+        
+        Positional arguments:
+            sourcePath: str -- path to the novx file.
+            novelHashes: dict -- element hashes as returned by get_novel_hashes().
+        """
+        self._source = self._get_file_stat(sourcePath)
+        self.elementHashes = novelHashes
+        self._recordedDigests = None
+
+    def set_target(self, suffix, targetPath, parts, partDigests):
+        """Record a written target.
+
+        Positional arguments:
+            suffix: str -- target file name suffix.
+            targetPath: str -- path to the target file.
+            parts: tuple of str -- names of the model parts the target depends on.
+            partDigests: dict -- current part digests.
+        """
+        self._targets[suffix] = dict(
+            path=targetPath,
+            stat=self._get_file_stat(targetPath),
+            digests={part: partDigests[part] for part in parts},
+        )
+
+    def write(self):
+        """Save the manifest file. 
+        
+        Return True on success, otherwise False.
+        The manifest is a performance aid, so errors are not raised.
+        """
+        data = dict(
+            version=self.VERSION,
+            source=self._source,
+            targets=self._targets,
+            elements=self.elementHashes,
+        )
+        try:
+            tempPath = f'{self.filePath}.tmp'
+            with open(tempPath, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tempPath, self.filePath)
+        except OSError:
+            return False
+
+        return True
+
+    @staticmethod
+    def get_part_digests(novelHashes):
+        """Return a dictionary with the part names as keys and part digests as values.
+        
+        Positional arguments:
+            novelHashes: dict -- element hashes as returned by get_novel_hashes().
+        """
+        return {part: get_part_digest(elementHashes) for part, elementHashes in novelHashes.items()}
+
+    def _get_file_stat(self, filePath):
+        """Return a [size, mtime] list for a file, or None if the file does not exist."""
+        try:
+            stat = os.stat(filePath)
+        except OSError:
+            return None
+
+        return [stat.st_size, stat.st_mtime_ns]
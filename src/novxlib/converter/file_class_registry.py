@@ -0,0 +1,235 @@
+"""Provide a registry of file classes that are imported on demand.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from importlib import import_module
+import os
+import warnings
+
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import _
+
+
+class FileClassRegistry:
+    """Index of file classes by file name suffix and extension.
+    
+    Classes can be registered by their dotted path, 
+    e.g. "nvlib.model.ods.ods_w_charlist.OdsWCharList". 
+    Then the module is only imported when the class is looked up,
+    and the class's SUFFIX and EXTENSION are checked against the entry. 
+
+    Public methods:
+        copy() -- return a new registry with the same entries.
+        find_class(filePath) -- return the class matching the file name ending, or None.
+        get_class(suffix) -- return the class registered for a suffix, or None.
+        get_classes() -- return a list of all registered classes.
+        get_suffixes() -- return a list of all registered suffixes.
+        register(suffix, extension, fileClass) -- add a file class.
+        register_class(fileClass) -- add a file class with its own suffix and extension.
+        unregister(suffix, extension) -- remove a file class.
+    """
+
+    def __init__(self, entries=None):
+        """Register the initial file classes.
+        
+        Optional arguments:
+            entries: list of (suffix, extension, fileClass) tuples.
+        """
+        self._classes = {}
+        # key: suffix + extension; value: file class or its dotted path
+
+        self._keys = {}
+        # key: suffix; value: key of self._classes
+
+        if entries is not None:
+            for suffix, extension, fileClass in entries:
+                self.register(suffix, extension, fileClass)
+
+    def copy(self):
+        """Return a new registry with the same entries."""
+        registry = FileClassRegistry()
+        registry._classes = self._classes.copy()
+        registry._keys = self._keys.copy()
+        return registry
+
+    def find_class(self, filePath):
+        """Return the file class matching the file name ending, or None.
+
+        Positional arguments:
+            filePath: str -- path to the file.
+        
+        The most specific suffix wins, i.e. the one beginning 
+        with the leftmost underscore in the file name.
+        """
+        fileName, extension = os.path.splitext(os.path.basename(filePath))
+        start = fileName.find('_')
+        while start >= 0:
+            key = f'{fileName[start:]}{extension}'
+            if key in self._classes:
+                return self._load(key)
+
+            start = fileName.find('_', start + 1)
+        return None
+
+    def get_class(self, suffix):
+        """Return the file class registered for a suffix, or None.
+
+        Positional arguments:
+            suffix: str -- file name suffix. None is treated like an empty string.
+        """
+        if suffix is None:
+            suffix = ''
+        key = self._keys.get(suffix, None)
+        if key is None:
+            return None
+
+        return self._load(key)
+
+    def get_classes(self):
+        """Return a list of all registered classes, importing them if necessary."""
+        return [self._load(key) for key in self._classes]
+
+    def get_suffixes(self):
+        """Return a list of all registered suffixes."""
+        return list(self._keys)
+
+    def register(self, suffix, extension, fileClass):
+        """Add a file class, replacing any class registered for the same suffix and extension.
+        
+        Positional arguments:
+            suffix: str -- file name suffix.
+            extension: str -- file extension including the dot.
+            fileClass -- the class, or its dotted path as a string.
+        """
+        if suffix is None:
+            suffix = ''
+        key = f'{suffix}{extension}'
+        self._classes[key] = fileClass
+        self._keys[suffix] = key
+
+    def register_class(self, fileClass):
+        """Add a file class with the suffix and extension given by its class constants.
+        
+        Positional arguments:
+            fileClass -- the class.
+        """
+        self.register(fileClass.SUFFIX, fileClass.EXTENSION, fileClass)
+
+    def unregister(self, suffix, extension):
+        """Remove a file class.
+        
+        Positional arguments:
+            suffix: str -- file name suffix.
+            extension: str -- file extension including the dot.
+        """
+        if suffix is None:
+            suffix = ''
+        key = f'{suffix}{extension}'
+        self._classes.pop(key, None)
+        if self._keys.get(suffix, None) == key:
+            del self._keys[suffix]
+
+    def _load(self, key):
+        """Return the file class for a key, importing its module on first use."""
+        fileClass = self._classes[key]
+        if isinstance(fileClass, str):
+            moduleName, className = fileClass.rsplit('.', 1)
+            fileClass = getattr(import_module(moduleName), className)
+            suffix = fileClass.SUFFIX
+            if suffix is None:
+                suffix = ''
+            if key != f'{suffix}{fileClass.EXTENSION}':
+                raise Error(f'{_("Wrong file class")}: "{fileClass.__name__}" for "{key}".')
+
+            self._classes[key] = fileClass
+        return fileClass
+
+
+class FileClassList:
+    """Live view of the classes of a FileClassRegistry, for the legacy class list constants.
+
+    The classes are only imported when the view is read.
+    Adding or removing classes registers or unregisters them.
+    
+    Public methods:
+        append(fileClass) -- register a class.
+        extend(fileClasses) -- register classes.
+        insert(index, fileClass) -- register a class; the registry has no order.
+        remove(fileClass) -- unregister a class.
+    """
+
+    def __init__(self, registry):
+        """Set the registry.
+        
+        Positional arguments:
+            registry: FileClassRegistry -- the registry to view.
+        """
+        self._registry = registry
+
+    def __contains__(self, fileClass):
+        return fileClass in self._registry.get_classes()
+
+    def __getitem__(self, index):
+        return self._registry.get_classes()[index]
+
+    def __iter__(self):
+        return iter(self._registry.get_classes())
+
+    def __len__(self):
+        return len(self._registry.get_classes())
+
+    def append(self, fileClass):
+        """Register a class."""
+        self._warn()
+        self._registry.register_class(fileClass)
+
+    def extend(self, fileClasses):
+        """Register classes."""
+        for fileClass in fileClasses:
+            self.append(fileClass)
+
+    def insert(self, index, fileClass):
+        """Register a class. The index is ignored, because the registry has no order."""
+        self.append(fileClass)
+
+    def remove(self, fileClass):
+        """Unregister a class."""
+        self._warn()
+        self._registry.unregister(fileClass.SUFFIX, fileClass.EXTENSION)
+
+    def _warn(self):
+        """Point to the registry, which replaces the class list constants."""
+        warnings.warn(
+            'Changing a file class list is deprecated; use the register_class() method of the registry.',
+            DeprecationWarning,
+            stacklevel=3,
+            )
+
+
+class RegistryClassList:
+    """Descriptor that provides a FileClassRegistry as a legacy class list, e.g. EXPORT_TARGET_CLASSES.
+
+    Read on a class, it lists the classes of the class registry;
+    read on an instance, it lists the classes of the instance registry, if already created.
+    """
+
+    def __init__(self, classRegistry, instanceRegistry):
+        """Set the attribute names of the registries.
+        
+        Positional arguments:
+            classRegistry: str -- name of the class attribute holding the registry of all instances.
+            instanceRegistry: str -- name of the instance attribute holding the registry of the instance.
+        """
+        self._classRegistry = classRegistry
+        self._instanceRegistry = instanceRegistry
+
+    def __get__(self, instance, owner):
+        """Return a FileClassList viewing the registry."""
+        registry = None
+        if instance is not None:
+            registry = instance.__dict__.get(self._instanceRegistry, None)
+        if registry is None:
+            registry = getattr(owner, self._classRegistry)
+        return FileClassList(registry)
@@ -0,0 +1,35 @@
+"""Provide a class for writing timing events to a JSON lines file.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import json
+import threading
+
+
+class JsonLinesTrace:
+    """PhaseTimer subscriber that appends each event as a line of JSON to a file.
+    
+    Several processes may append to the same file, 
+    because each event is written with a single call.
+
+    Public instance variables:
+        filePath: str -- path to the trace file.
+    """
+
+    def __init__(self, filePath):
+        """Set the trace file path.
+        
+        Positional arguments:
+            filePath: str -- path to the trace file.
+        """
+        self.filePath = filePath
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        """Append an event to the trace file."""
+        line = f'{json.dumps(event, default=str)}\n'
+        with self._lock:
+            with open(self.filePath, 'a', encoding='utf-8') as f:
+                f.write(line)
@@ -0,0 +1,237 @@
+"""Provide a class for tracing the memory of conversions against a budget.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from contextlib import contextmanager
+import threading
+import tracemalloc
+
+
+class MemoryBudget:
+    """Memory budget of a conversion, traced with tracemalloc.
+
+    While tracing, the budget subscribes to a PhaseTimer, and records the peak
+    of the traced memory at the end of each phase, per phase and per target class.
+    Where tracemalloc.reset_peak() is available (Python 3.9+), the peak is reset
+    after each event, so each phase gets its own peak; otherwise the peaks are cumulative.
+    Phases that are reported at the same time, as OdfStreamWriter does, share a peak.
+    Snapshots of the allocation sites are taken when the traced memory reaches a new high,
+    so the report lists the sites that contributed most to the peak.
+
+    Converters ask is_near_limit() to switch to strategies that need less memory.
+
+    Public methods:
+        format_report(report=None) -- return the report as text.
+        get_report() -- return the report as a dictionary.
+        is_near_limit() -- return True if the traced memory is close to the budget.
+        start(phaseTimer=None) -- start tracing.
+        stop(phaseTimer=None) -- stop tracing.
+        trace(phaseTimer=None) -- context manager that traces the enclosed code.
+
+    Public instance variables:
+        limit: int -- memory budget in bytes.
+        threshold: float -- fraction of the budget above which the memory is considered close to the limit.
+        topCount: int -- number of allocation sites in the report.
+        frames: int -- number of stack frames stored per allocation.
+        exceeded: bool -- True if the traced peak exceeded the budget.
+        reportHandler -- if set, function called with the report dictionary when tracing stops.
+    """
+
+    def __init__(self, limit, threshold=0.8, topCount=10, frames=1):
+        """Set the budget.
+
+        Positional arguments:
+            limit: int -- memory budget in bytes.
+
+        Optional arguments:
+            threshold: float -- fraction of the budget above which the memory is considered close to the limit.
+            topCount: int -- number of allocation sites in the report.
+            frames: int -- number of stack frames stored per allocation.
+        """
+        self.limit = limit
+        self.threshold = threshold
+        self.topCount = topCount
+        self.frames = frames
+        self.reportHandler = None
+        self._lock = threading.Lock()
+        self._startedTracing = False
+        self._depth = 0
+        self._clear()
+
+    def format_report(self, report=None):
+        """Return the report as text.
+
+        Optional arguments:
+            report: dict -- report as returned by get_report(). If None, get the current report.
+        """
+        if report is None:
+            report = self.get_report()
+        lines = [
+            f'Memory budget: {self._get_size(report["limit"])}, '
+            f'peak: {self._get_size(report["peak"])}'
+            f'{" (exceeded)" if report["exceeded"] else ""}'
+            ]
+        for title, peaks in (('Phases', report['phases']), ('Targets', report['targets'])):
+            if peaks:
+                lines.append(f'{title}:')
+                for name, size in sorted(peaks.items(), key=lambda item: item[1], reverse=True):
+                    lines.append(f'    {name}: {self._get_size(size)}')
+        if report['topSites']:
+            lines.append('Top allocation sites:')
+            for site in report['topSites']:
+                lines.append(f'    {site["site"]}: {self._get_size(site["size"])} in {site["count"]} blocks')
+        return '\n'.join(lines)
+
+    def get_report(self):
+        """Return the report as a dictionary.
+
+        The report dictionary has the keys:
+            limit -- memory budget in bytes.
+            peak -- peak of the traced memory in bytes.
+            exceeded -- True if the peak exceeded the budget.
+            phases -- peaks in bytes, with the phase names as keys.
+            targets -- peaks in bytes, with the target class names as keys.
+            topSites -- list of dictionaries with the keys "site", "size", and "count",
+                        for the largest allocation sites at the highest traced memory.
+        """
+        with self._lock:
+            if tracemalloc.is_tracing():
+                self._update_peak(tracemalloc.get_traced_memory()[1])
+            topSites = []
+            if self._snapshot is not None:
+                for statistic in self._snapshot.statistics('lineno')[:self.topCount]:
+                    frame = statistic.traceback[0]
+                    topSites.append(dict(
+                        site=f'{frame.filename}:{frame.lineno}',
+                        size=statistic.size,
+                        count=statistic.count,
+                        ))
+            return dict(
+                limit=self.limit,
+                peak=self._peak,
+                exceeded=self.exceeded,
+                phases=dict(self._phasePeaks),
+                targets=dict(self._targetPeaks),
+                topSites=topSites,
+                )
+
+    def is_near_limit(self):
+        """Return True if the traced memory has reached the threshold of the budget."""
+        if not tracemalloc.is_tracing():
+            return False
+
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            self._update_peak(peak)
+            self._take_snapshot(current)
+        return current >= self.limit * self.threshold
+
+    def start(self, phaseTimer=None):
+        """Start tracing, and subscribe to a PhaseTimer.
+
+        Optional arguments:
+            phaseTimer: PhaseTimer -- emitter of the phase events of the conversion.
+
+        If tracemalloc is already tracing, it is left running on stop().
+        """
+        self._clear()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._startedTracing = True
+        if phaseTimer is not None:
+            phaseTimer.subscribe(self._on_event)
+
+    def stop(self, phaseTimer=None):
+        """Record the final peak, unsubscribe from the PhaseTimer, stop tracing, and pass the report.
+
+        Optional arguments:
+            phaseTimer: PhaseTimer -- the emitter passed to start().
+        """
+        if phaseTimer is not None:
+            phaseTimer.unsubscribe(self._on_event)
+        if tracemalloc.is_tracing():
+            with self._lock:
+                self._update_peak(tracemalloc.get_traced_memory()[1])
+        if self._startedTracing:
+            tracemalloc.stop()
+            self._startedTracing = False
+        if self.reportHandler is not None:
+            self.reportHandler(self.get_report())
+
+    @contextmanager
+    def trace(self, phaseTimer=None):
+        """Trace the memory while the enclosed code runs.
+
+        Optional arguments:
+            phaseTimer: PhaseTimer -- emitter of the phase events of the conversion.
+
+        Nested calls trace as part of the outermost one, 
+        so the report covers the whole conversion.
+        """
+        if self._depth:
+            self._depth += 1
+            try:
+                yield self
+
+            finally:
+                self._depth -= 1
+            return
+
+        self.start(phaseTimer)
+        self._depth = 1
+        try:
+            yield self
+
+        finally:
+            self._depth = 0
+            self.stop(phaseTimer)
+
+    def _clear(self):
+        """Reset the measurements."""
+        self.exceeded = False
+        self._peak = 0
+        self._phasePeaks = {}
+        self._targetPeaks = {}
+        self._snapshot = None
+        self._snapshotSize = 0
+
+    def _get_size(self, size):
+        """Return a size in bytes as text in megabytes."""
+        return f'{size / 1e6:.1f} MB'
+
+    def _on_event(self, event):
+        """Record the peak of a phase; called by the PhaseTimer."""
+        if not tracemalloc.is_tracing():
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            self._update_peak(peak)
+            phase = event['phase']
+            self._phasePeaks[phase] = max(self._phasePeaks.get(phase, 0), peak)
+            targetClass = event.get('targetClass', None)
+            if targetClass is not None:
+                self._targetPeaks[targetClass] = max(self._targetPeaks.get(targetClass, 0), peak)
+            self._take_snapshot(current)
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+
+    def _take_snapshot(self, current):
+        """Keep a snapshot of the allocation sites, if the traced memory is 10 % above the last snapshot."""
+        if current <= self._snapshotSize * 1.1:
+            return
+
+        self._snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+        self._snapshotSize = current
+
+    def _update_peak(self, peak):
+        """Update the overall peak, and note if the budget is exceeded."""
+        if peak > self._peak:
+            self._peak = peak
+        if peak > self.limit:
+            self.exceeded = True
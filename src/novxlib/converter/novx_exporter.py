@@ -4,56 +4,645 @@ Copyright (c) 2024 Peter Triesberger
 For further information see https://github.com/peter88213/novelibre
 License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
 """
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import os
+import pickle
+import tempfile
+import uuid
+
+from novxlib.converter.export_manifest import ExportManifest
+from novxlib.converter.file_class_registry import FileClassRegistry
+from novxlib.converter.file_class_registry import RegistryClassList
+from novxlib.converter.phase_timer import LOCATE_SOURCE
+from novxlib.converter.phase_timer import PhaseTimer
+from novxlib.converter.phase_timer import get_default_timer
+from novxlib.converter.phase_timing_mixin import PhaseTimingMixin
+from novxlib.converter.registry_export_target_factory import RegistryExportTargetFactory
+from novxlib.model.element_hashes import ALL_PARTS
+from novxlib.model.element_hashes import CHAPTERS
+from novxlib.model.element_hashes import CHARACTERS
+from novxlib.model.element_hashes import ITEMS
+from novxlib.model.element_hashes import LOCATIONS
+from novxlib.model.element_hashes import PLOT_LINES
+from novxlib.model.element_hashes import PLOT_POINTS
+from novxlib.model.element_hashes import PROJECT
+from novxlib.model.element_hashes import SECTIONS
+from novxlib.model.element_hashes import get_novel_hashes
+from novxlib.model.novel_snapshot import NovelSnapshot
+from novxlib.model.xref_index import XrefIndex
+from novxlib.novx.cached_novx_file import CachedNovxFile
+from novxlib.odf.odf_stream_writer import OdfStreamWriter
 from nvlib.model.converter.converter_ff import ConverterFf
-from nvlib.model.novx.novx_file import NovxFile
-from nvlib.model.ods.ods_w_charlist import OdsWCharList
-from nvlib.model.ods.ods_w_grid import OdsWGrid
-from nvlib.model.ods.ods_w_itemlist import OdsWItemList
-from nvlib.model.ods.ods_w_loclist import OdsWLocList
-from nvlib.model.ods.ods_w_plot_list import OdsWPlotList
-from nvlib.model.ods.ods_w_sectionlist import OdsWSectionList
-from nvlib.model.odt.odt_w_brief_synopsis import OdtWBriefSynopsis
-from nvlib.model.odt.odt_w_chapterdesc import OdtWChapterDesc
-from nvlib.model.odt.odt_w_characters import OdtWCharacters
-from nvlib.model.odt.odt_w_export import OdtWExport
-from nvlib.model.odt.odt_w_items import OdtWItems
-from nvlib.model.odt.odt_w_locations import OdtWLocations
-from nvlib.model.odt.odt_w_manuscript import OdtWManuscript
-from nvlib.model.odt.odt_w_partdesc import OdtWPartDesc
-from nvlib.model.odt.odt_w_plotlines import OdtWPlotlines
-from nvlib.model.odt.odt_w_proof import OdtWProof
-from nvlib.model.odt.odt_w_sectiondesc import OdtWSectionDesc
-from nvlib.model.odt.odt_w_stages import OdtWStages
-from nvlib.model.odt.odt_w_xref import OdtWXref
-
-
-class NovxExporter(ConverterFf):
+from nvlib.model.data.novel import Novel
+from nvlib.model.data.nv_tree import NvTree
+from nvlib.novx_globals import BRF_SYNOPSIS_SUFFIX
+from nvlib.novx_globals import CHAPTERS_SUFFIX
+from nvlib.novx_globals import CHARACTERS_SUFFIX
+from nvlib.novx_globals import CHARLIST_SUFFIX
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import GRID_SUFFIX
+from nvlib.novx_globals import ITEMLIST_SUFFIX
+from nvlib.novx_globals import ITEMS_SUFFIX
+from nvlib.novx_globals import LOCATIONS_SUFFIX
+from nvlib.novx_globals import LOCLIST_SUFFIX
+from nvlib.novx_globals import MANUSCRIPT_SUFFIX
+from nvlib.novx_globals import Notification
+from nvlib.novx_globals import PARTS_SUFFIX
+from nvlib.novx_globals import PLOTLINES_SUFFIX
+from nvlib.novx_globals import PLOTLIST_SUFFIX
+from nvlib.novx_globals import PROOF_SUFFIX
+from nvlib.novx_globals import SECTIONLIST_SUFFIX
+from nvlib.novx_globals import SECTIONS_SUFFIX
+from nvlib.novx_globals import STAGES_SUFFIX
+from nvlib.novx_globals import XREF_SUFFIX
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+_workerBatchId = None
+_workerBatch = None
+
+
+def _write_target(target, context, timing, batchId, batchPath):
+    """Write a target file in a process pool worker.
+    
+    Positional arguments:
+        target -- target file object without a novel.
+        context: dict -- information added to the timing events.
+        timing: bool -- if True, collect timing events.
+        batchId: str -- unique ID of the batch.
+        batchPath: str -- path of the file with the pickled tuple of the novel and its XrefIndex.
+    
+    The novel is pickled to a temporary file once per batch by the main process, 
+    and loaded once per batch by each worker, which keeps it for the next targets.
+    So only the path is passed with each target.
+    Return a tuple with the status message and a list of timing events.
+    Timing events are collected here, because the subscribers
+    of the main process are not available in the worker.
+    """
+    global _workerBatchId
+    global _workerBatch
+    if batchId != _workerBatchId:
+        with open(batchPath, 'rb') as f:
+            _workerBatch = pickle.load(f)
+        _workerBatchId = batchId
+    novel, xrefIndex = _workerBatch
+    target.novel = get_target_novel(novel)
+    if isinstance(target, OdfStreamWriter):
+        target.xrefIndex = xrefIndex
+    events = []
+    if timing:
+        phaseTimer = PhaseTimer()
+        phaseTimer.subscribe(events.append)
+        phaseTimer.instrument_target(target, **context)
+    return write_target(target), events
+
+
+def get_target_novel(novel):
+    """Return the novel for a target; a view of it, if it is a NovelSnapshot.
+    
+    Positional arguments:
+        novel -- Novel or NovelSnapshot.
+    """
+    if isinstance(novel, NovelSnapshot):
+        return novel.get_view()
+
+    return novel
+
+
+def write_target(target):
+    """Write a target file whose novel is already set.
+    
+    Positional arguments:
+        target -- target file object.
+    
+    Return a status message. Error messages start with "!".
+    """
+    try:
+        target.write()
+    except Error as ex:
+        return f'!{str(ex)}'
+
+    return f'{_("File written")}: "{norm_path(target.filePath)}".'
+
+
+class NovxExporter(PhaseTimingMixin, ConverterFf):
     """A converter for universal export from a novelibre project.
 
     Instantiate a NovxFile object as sourceFile and a
     Novel subclass object as targetFile for file conversion.
+    
+    The target classes are looked up in a registry, 
+    so only the class actually selected is imported.
+    Plugins can add target classes for all instances by calling 
+    NovxExporter.EXPORT_TARGETS.register_class(), or for a single instance 
+    by calling its exportTargets.register_class().
+
+    Class constants:
+        EXPORT_TARGETS: FileClassRegistry -- the target classes of all instances.
+        EXPORT_TARGET_CLASSES: FileClassList -- deprecated view of the target classes.
+                               Read on an instance, it views exportTargets.
+        TARGET_DEPENDENCIES: dict -- the model parts each target reads, with the suffixes as keys.
+                             Targets not listed depend on all parts.
+        XREF_INDEX_SUFFIX: str -- file name suffix of the cross reference index sidecar file.
+
+    Public instance variables:
+        exportTargets: FileClassRegistry -- the target classes of this instance.
+        phaseTimer: PhaseTimer -- receives the timing events of the conversion phases.
+        newFiles: dict -- paths of the files written by the last batch, with the suffixes as keys.
+        compression: int -- zipfile.ZIP_DEFLATED, or zipfile.ZIP_STORED for throwaway working copies.
+                     If None, use the ODF writers' default.
+        compressLevel: int -- deflate level of the ODF packages from 0 to 9, or None for the default.
+        useSnapshot: bool -- if True, the targets of a batch render from a compact NovelSnapshot 
+                     of the novel, each from its own view; the novel itself is not changed.
+                     The snapshot is sent to the worker processes instead of the novel.
+        memoryBudget: MemoryBudget -- if set, trace the memory of the conversions against the budget.
+                      Batches are then written on threads, because worker processes are not traced.
+                      Close to the limit, the targets are written one at a time, 
+                      the ODF stream writers encode large texts in chunks,
+                      and single exports release the section content after each chapter.
+
+    Public methods:
+        export_batch(sourcePath, suffixes=None, **kwargs) -- read the source once and write many targets.
+        export_filtered(source, suffix, sectionIndex, filters, **kwargs) -- write a filtered document per filter.
+        export_incremental(sourcePath, suffixes=None, **kwargs) -- write only the targets whose inputs have changed.
+        get_dependencies(suffix) -- return the model parts a target depends on.
+        get_target_path(sourcePath, suffix, infix='') -- return the path of a target file.
+        read_source(sourcePath) -- return a source file object with the novel read.
+        write_targets(source, suffixes=None, **kwargs) -- write many targets from a source that has been read.
 
     Overrides the superclass constants EXPORT_SOURCE_CLASSES, EXPORT_TARGET_CLASSES.    
     """
-    EXPORT_SOURCE_CLASSES = [NovxFile]
-    EXPORT_TARGET_CLASSES = [
-        OdsWCharList,
-        OdsWGrid,
-        OdsWItemList,
-        OdsWLocList,
-        OdsWPlotList,
-        OdsWSectionList,
-        OdtWBriefSynopsis,
-        OdtWChapterDesc,
-        OdtWCharacters,
-        OdtWExport,
-        OdtWItems,
-        OdtWLocations,
-        OdtWManuscript,
-        OdtWPartDesc,
-        OdtWPlotlines,
-        OdtWProof,
-        OdtWSectionDesc,
-        OdtWStages,
-        OdtWXref,
-    ]
+    EXPORT_SOURCE_CLASSES = [CachedNovxFile]
+    EXPORT_TARGETS = FileClassRegistry([
+        (CHARLIST_SUFFIX, '.ods', 'novxlib.ods.ods_w_charlist_stream.OdsWCharListStream'),
+        (GRID_SUFFIX, '.ods', 'novxlib.ods.ods_w_grid_stream.OdsWGridStream'),
+        (ITEMLIST_SUFFIX, '.ods', 'novxlib.ods.ods_w_itemlist_stream.OdsWItemListStream'),
+        (LOCLIST_SUFFIX, '.ods', 'novxlib.ods.ods_w_loclist_stream.OdsWLocListStream'),
+        (PLOTLIST_SUFFIX, '.ods', 'novxlib.ods.ods_w_plot_list_stream.OdsWPlotListStream'),
+        (SECTIONLIST_SUFFIX, '.ods', 'novxlib.ods.ods_w_sectionlist_stream.OdsWSectionListStream'),
+        (BRF_SYNOPSIS_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_brief_synopsis.OdtWBriefSynopsis'),
+        (CHAPTERS_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_chapterdesc.OdtWChapterDesc'),
+        (CHARACTERS_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_characters.OdtWCharacters'),
+        ('', '.odt', 'novxlib.odt.odt_w_export_stream.OdtWExportStream'),
+        (ITEMS_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_items.OdtWItems'),
+        (LOCATIONS_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_locations.OdtWLocations'),
+        (MANUSCRIPT_SUFFIX, '.odt', 'novxlib.odt.odt_w_manuscript_stream.OdtWManuscriptStream'),
+        (PARTS_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_partdesc.OdtWPartDesc'),
+        (PLOTLINES_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_plotlines.OdtWPlotlines'),
+        (PROOF_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_proof.OdtWProof'),
+        (SECTIONS_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_sectiondesc.OdtWSectionDesc'),
+        (STAGES_SUFFIX, '.odt', 'nvlib.model.odt.odt_w_stages.OdtWStages'),
+        (XREF_SUFFIX, '.odt', 'novxlib.odt.odt_w_xref_stream.OdtWXrefStream'),
+        ])
+    EXPORT_TARGET_CLASSES = RegistryClassList('EXPORT_TARGETS', 'exportTargets')
+    XREF_INDEX_SUFFIX = '_xref_index'
+    TARGET_DEPENDENCIES = {
+        CHARLIST_SUFFIX: (PROJECT, CHARACTERS),
+        GRID_SUFFIX: (PROJECT, CHAPTERS, SECTIONS, CHARACTERS, LOCATIONS, ITEMS, PLOT_LINES, PLOT_POINTS),
+        ITEMLIST_SUFFIX: (PROJECT, ITEMS),
+        LOCLIST_SUFFIX: (PROJECT, LOCATIONS),
+        PLOTLIST_SUFFIX: (PROJECT, CHAPTERS, SECTIONS, PLOT_LINES, PLOT_POINTS),
+        SECTIONLIST_SUFFIX: (PROJECT, CHAPTERS, SECTIONS, CHARACTERS, LOCATIONS, ITEMS, PLOT_LINES),
+        BRF_SYNOPSIS_SUFFIX: (PROJECT, CHAPTERS, SECTIONS),
+        CHAPTERS_SUFFIX: (PROJECT, CHAPTERS),
+        CHARACTERS_SUFFIX: (PROJECT, CHARACTERS),
+        '': (PROJECT, CHAPTERS, SECTIONS, CHARACTERS, LOCATIONS, ITEMS),
+        ITEMS_SUFFIX: (PROJECT, ITEMS),
+        LOCATIONS_SUFFIX: (PROJECT, LOCATIONS),
+        MANUSCRIPT_SUFFIX: (PROJECT, CHAPTERS, SECTIONS),
+        PARTS_SUFFIX: (PROJECT, CHAPTERS),
+        PLOTLINES_SUFFIX: (PROJECT, SECTIONS, PLOT_LINES, PLOT_POINTS),
+        PROOF_SUFFIX: (PROJECT, CHAPTERS, SECTIONS),
+        SECTIONS_SUFFIX: (PROJECT, CHAPTERS, SECTIONS),
+        STAGES_SUFFIX: (PROJECT, CHAPTERS, SECTIONS),
+        XREF_SUFFIX: (PROJECT, CHAPTERS, SECTIONS, CHARACTERS, LOCATIONS, ITEMS),
+    }
+
+    def __init__(self):
+        """Initialize instance variables.
+        
+        Extends the superclass constructor.
+        """
+        super().__init__()
+        self.newFiles = {}
+        self.exportTargets = self.EXPORT_TARGETS.copy()
+        self.exportTargetFactory = RegistryExportTargetFactory(self.exportTargets)
+        self.phaseTimer = get_default_timer()
+        self.compression = None
+        self.compressLevel = None
+        self.useSnapshot = False
+        self.memoryBudget = None
+
+    def run(self, sourcePath, **kwargs):
+        """Trace the memory, if a budget is set.
+        
+        Extends the superclass method.
+        """
+        with self._trace_memory():
+            super().run(sourcePath, **kwargs)
+
+    def export_from_novx(self, source, target):
+        """Report the conversion phases to the phase timer.
+        
+        Extends the superclass method.
+        """
+        context = self._get_timing_context(source)
+        self._emit_locate_source(context)
+        self.phaseTimer.instrument_read(source, **context)
+        self._set_compression(target)
+        self._set_progress(target)
+        self._set_memory_budget(target, True)
+        self.phaseTimer.instrument_target(target, **context)
+        super().export_from_novx(source, target)
+
+    def export_batch(self, sourcePath, suffixes=None, **kwargs):
+        """Read a novelibre project once and export it to several targets.
+        
+        Positional arguments:
+            sourcePath: str -- path of the novelibre project file.
+            
+        Optional arguments:
+            suffixes: list of str -- target file name suffixes. 
+                      If None, export to all registered targets.
+
+        Optional keyword arguments:
+            maxWorkers: int -- maximum number of writers running at the same time.
+            useThreads: bool -- if True, use a thread pool instead of a process pool.
+            
+        All other keyword arguments are passed to the target file constructors.
+        Return a dictionary with the suffixes as keys and status messages as values.
+        Error messages start with "!".
+        """
+        self.newFile = None
+        self.newFiles = {}
+        with self._trace_memory():
+            try:
+                source = self.read_source(sourcePath)
+            except Error as ex:
+                message = f'!{str(ex)}'
+                self.ui.set_status(message)
+                return {suffix: message for suffix in self._get_batch_suffixes(suffixes)}
+
+            return self.write_targets(source, suffixes, **kwargs)
+
+    def export_filtered(self, source, suffix, sectionIndex, filters, maxWorkers=None, useThreads=False,
+                        hideEmptyChapters=True, **kwargs):
+        """Write a filtered document per filter from a novelibre project that has been read.
+        
+        Positional arguments:
+            source: NovxFile -- source file object with the novel read.
+            suffix: str -- target file name suffix.
+            sectionIndex: SectionIndex -- index of the novel the filters were created with.
+            filters: dict -- ElementSetFilter instances for the sections, 
+                     with file name infixes as keys, e.g. {'_Alice': sectionIndex.viewpoint('cr1')}.
+
+        Optional arguments:
+            maxWorkers: int -- maximum number of writers running at the same time.
+            useThreads: bool -- if True, use a thread pool instead of a process pool.
+            hideEmptyChapters: bool -- if True, skip the chapters without accepted sections.
+        
+        The target file names are composed of the project name, 
+        the infix, the suffix, and the extension.
+        All other keyword arguments are passed to the target file constructors.
+        Return a dictionary with the infixes as keys and status messages as values.
+        Error messages start with "!".
+        """
+        results = {}
+        targets = {}
+        fileClass = self.exportTargets.get_class(suffix)
+        for infix, sectionFilter in filters.items():
+            try:
+                if fileClass is None:
+                    raise Error(f'{_("Export type is not supported")}: "{suffix}".')
+
+                target = fileClass(self.get_target_path(source.filePath, suffix, infix), suffix=suffix, **kwargs)
+                self.check(source, target)
+            except (Error, Notification) as ex:
+                results[infix] = f'!{str(ex)}'
+            else:
+                sectionIndex.apply_filter(target, sectionFilter, hideEmptyChapters)
+                self._set_compression(target)
+                targets[infix] = target
+
+        with self._trace_memory():
+            self._write_target_objects(source, targets, results, maxWorkers, useThreads, False)
+        return results
+
+    def export_incremental(self, sourcePath, suffixes=None, **kwargs):
+        """Export a novelibre project, skipping the targets whose inputs have not changed.
+        
+        Positional arguments:
+            sourcePath: str -- path of the novelibre project file.
+            
+        Optional arguments:
+            suffixes: list of str -- target file name suffixes. 
+                      If None, export to all registered targets.
+
+        The keyword arguments are passed to write_targets().
+        A sidecar ExportManifest records the element hashes of the project
+        and the model parts each written target depends on. 
+        If the project file is unchanged, it is not even read.
+        Targets that fail to be written are removed from the manifest.
+        Return a dictionary with the suffixes as keys and status messages as values.
+        Error messages start with "!".
+        """
+        with self._trace_memory():
+            self.newFile = None
+            self.newFiles = {}
+            suffixes = self._get_batch_suffixes(suffixes)
+            targetPaths = {}
+            for suffix in suffixes:
+                targetPath = self.get_target_path(sourcePath, suffix)
+                if targetPath is not None:
+                    targetPaths[suffix] = targetPath
+            manifest = ExportManifest(sourcePath)
+            manifest.read()
+            results = {}
+            if manifest.is_source_unchanged(sourcePath):
+                for suffix, targetPath in targetPaths.items():
+                    if manifest.is_up_to_date(suffix, targetPath, self.get_dependencies(suffix)):
+                        results[suffix] = f'{_("File is up to date")}: "{norm_path(targetPath)}".'
+                if len(results) == len(suffixes):
+                    self.ui.set_status(f'{_("All files are up to date")}.')
+                    return results
+
+            results = {}
+            try:
+                source = self.read_source(sourcePath)
+            except Error as ex:
+                message = f'!{str(ex)}'
+                self.ui.set_status(message)
+                return {suffix: message for suffix in suffixes}
+
+            novelHashes = get_novel_hashes(source.novel)
+            partDigests = manifest.get_part_digests(novelHashes)
+            staleSuffixes = []
+            for suffix in suffixes:
+                targetPath = targetPaths.get(suffix, None)
+                if targetPath is not None and manifest.is_up_to_date(
+                        suffix,
+                        targetPath,
+                        self.get_dependencies(suffix),
+                        partDigests
+                        ):
+                    results[suffix] = f'{_("File is up to date")}: "{norm_path(targetPath)}".'
+                else:
+                    staleSuffixes.append(suffix)
+            if staleSuffixes:
+                results.update(self.write_targets(source, staleSuffixes, **kwargs))
+            else:
+                self.ui.set_status(f'{_("All files are up to date")}.')
+            for suffix in staleSuffixes:
+                if suffix in self.newFiles:
+                    manifest.set_target(suffix, self.newFiles[suffix], self.get_dependencies(suffix), partDigests)
+                else:
+                    # The target may have been changed by the failed write.
+                    manifest.remove_target(suffix)
+            manifest.set_hashes(sourcePath, novelHashes)
+            manifest.write()
+            return results
+
+    def get_dependencies(self, suffix):
+        """Return a tuple with the names of the model parts a target depends on."""
+        return self.TARGET_DEPENDENCIES.get(suffix, ALL_PARTS)
+
+    def get_target_path(self, sourcePath, suffix, infix=''):
+        """Return the path of the target file for a suffix, or None if the suffix is not registered.
+        
+        Positional arguments:
+            sourcePath: str -- path of the novelibre project file.
+            suffix: str -- target file name suffix.
+            
+        Optional arguments:
+            infix: str -- inserted between the project name and the suffix.
+        """
+        fileClass = self.exportTargets.get_class(suffix)
+        if fileClass is None:
+            return None
+
+        fileName, __ = os.path.splitext(sourcePath)
+        if suffix is None:
+            suffix = ''
+        return f'{fileName}{infix}{suffix}{fileClass.EXTENSION}'
+
+    def read_source(self, sourcePath):
+        """Return a source file object with the novel read.
+        
+        Raise the "Error" exception in case of error.
+        """
+        with self.phaseTimer.phase(LOCATE_SOURCE, converter=type(self).__name__, source=sourcePath):
+            source, __ = self.exportSourceFactory.make_file_objects(sourcePath, suffix='')
+        self.phaseTimer.instrument_read(source, **self._get_timing_context(source))
+        source.novel = Novel(tree=NvTree())
+        source.read()
+        return source
+
+    def write_targets(self, source, suffixes=None, maxWorkers=None, useThreads=False, saveXref=False, **kwargs):
+        """Write several targets concurrently from a novelibre project that has been read.
+        
+        Positional arguments:
+            source: NovxFile -- source file object with the novel read.
+
+        Optional arguments:
+            suffixes: list of str -- target file name suffixes. 
+                      If None, export to all registered targets.
+            maxWorkers: int -- maximum number of writers running at the same time.
+            useThreads: bool -- if True, use a thread pool instead of a process pool.
+            saveXref: bool -- if True, save the cross reference index as a sidecar file.
+        
+        The cross references are computed once, and shared by all targets that use them.
+        The default is a process pool, which also runs the rendering in parallel.
+        With useThreads, only the ODF writers derived from OdfStreamWriter 
+        run on threads. The other writers change the working directory, 
+        so they are written one at a time after the threads have finished.
+        All other keyword arguments are passed to the target file constructors.
+        Return a dictionary with the suffixes as keys and status messages as values.
+        Error messages start with "!".
+        """
+        results = {}
+        targets = {}
+        for suffix in self._get_batch_suffixes(suffixes):
+            try:
+                __, target = self.exportTargetFactory.make_file_objects(source.filePath, suffix=suffix, **kwargs)
+                self.check(source, target)
+            except (Error, Notification) as ex:
+                results[suffix] = f'!{str(ex)}'
+            else:
+                self._set_compression(target)
+                targets[suffix] = target
+
+        with self._trace_memory():
+            self._write_target_objects(source, targets, results, maxWorkers, useThreads, saveXref)
+        return results
+
+    def _get_batch_suffixes(self, suffixes):
+        """Return a list of target suffixes; if suffixes is None, use all targets."""
+        if suffixes is None:
+            return self.exportTargets.get_suffixes()
+
+        return list(suffixes)
+
+    def _set_compression(self, target):
+        """Pass the compression settings to an ODF stream writer."""
+        if not isinstance(target, OdfStreamWriter):
+            return
+
+        if self.compression is not None:
+            target.compression = self.compression
+        if self.compressLevel is not None:
+            target.compressLevel = self.compressLevel
+
+    def _set_memory_budget(self, target, releaseContent=False):
+        """Pass the memory budget to an ODF stream writer.
+        
+        Positional arguments:
+            target -- target file object.
+        
+        Optional arguments:
+            releaseContent: bool -- if True, the writer may release the section content
+                            after each chapter; only for targets that do not share the novel.
+        """
+        if not isinstance(target, OdfStreamWriter) or self.memoryBudget is None:
+            return
+
+        target.memoryBudget = self.memoryBudget
+        target.releaseContent = releaseContent
+
+    def _set_progress(self, target):
+        """Pass the UI's progress function and cancel event to a streaming target, if the UI has them.
+        
+        Process pool workers cannot reach the UI, so only threads and single exports report progress.
+        """
+        if not isinstance(target, OdfStreamWriter):
+            return
+
+        target.progress = getattr(self.ui, 'show_progress', None)
+        target.cancelEvent = getattr(self.ui, 'cancelEvent', None)
+
+    @contextmanager
+    def _trace_memory(self):
+        """Trace the memory of the enclosed code, if a memory budget is set."""
+        if self.memoryBudget is None:
+            yield
+            return
+
+        with self.memoryBudget.trace(self.phaseTimer):
+            yield
+
+    def _write_now(self, target):
+        """Write a target in the calling thread, and return a completed Future with the status message."""
+        future = Future()
+        try:
+            future.set_result(write_target(target))
+        except Exception as ex:
+            future.set_exception(ex)
+        return future
+
+    def _write_target_objects(self, source, targets, results, maxWorkers, useThreads, saveXref):
+        """Write the target objects concurrently, and add their status messages to results.
+        
+        Positional arguments:
+            source: NovxFile -- source file object with the novel read.
+            targets: dict -- target objects to write, with keys for the results.
+            results: dict -- status messages; completed in place.
+            maxWorkers, useThreads, saveXref -- see write_targets().
+        
+        With a memory budget, the targets are written on threads,
+        and one at a time if the budget is close to its limit.
+        """
+        self.newFile = None
+        self.newFiles = {}
+        if targets and self.memoryBudget is not None:
+            useThreads = True
+            if self.memoryBudget.is_near_limit():
+                maxWorkers = 1
+        if targets:
+            self.ui.set_info_what(
+                _('Input: {0} "{1}"\nOutput: {2}').format(
+                    source.DESCRIPTION,
+                    norm_path(source.filePath),
+                    ', '.join(target.DESCRIPTION for target in targets.values())
+                    )
+                )
+            context = self._get_timing_context(source)
+            novel = source.novel
+            if self.useSnapshot:
+                novel = NovelSnapshot(novel)
+            xrefIndex = None
+            if saveXref or any(isinstance(target, OdfStreamWriter) for target in targets.values()):
+                xrefIndex = XrefIndex()
+                xrefIndex.build(source.novel)
+                xrefIndex.freeze()
+            if saveXref:
+                fileName, __ = os.path.splitext(source.filePath)
+                try:
+                    xrefIndex.write(f'{fileName}{self.XREF_INDEX_SUFFIX}.json')
+                except OSError:
+                    pass
+            if useThreads:
+                for target in targets.values():
+                    target.novel = get_target_novel(novel)
+                    if isinstance(target, OdfStreamWriter):
+                        target.xrefIndex = xrefIndex
+                    self._set_progress(target)
+                    self._set_memory_budget(target)
+                    self.phaseTimer.instrument_target(target, **context)
+                with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+                    futures = {
+                        key: executor.submit(write_target, target)
+                        for key, target in targets.items()
+                        if isinstance(target, OdfStreamWriter)
+                        }
+                for key, target in targets.items():
+                    if key not in futures:
+                        futures[key] = self._write_now(target)
+            else:
+                batchId = uuid.uuid4().hex
+                batchPath = self._write_batch_file(novel, xrefIndex)
+                for target in targets.values():
+                    target.novel = None
+                try:
+                    with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+                        futures = {
+                            key: executor.submit(_write_target, target, context, self.phaseTimer.enabled, batchId, batchPath)
+                            for key, target in targets.items()
+                            }
+                finally:
+                    try:
+                        os.remove(batchPath)
+                    except OSError:
+                        pass
+            for key, future in futures.items():
+                try:
+                    if useThreads:
+                        results[key] = future.result()
+                    else:
+                        results[key], events = future.result()
+                        for event in events:
+                            self.phaseTimer.emit(event)
+                except Exception as ex:
+                    results[key] = f'!{str(ex)}'
+                else:
+                    if not results[key].startswith('!'):
+                        self.newFiles[key] = targets[key].filePath
+
+        failures = [message for message in results.values() if message.startswith('!')]
+        if failures:
+            self.ui.set_status(f'!{_("Export failed")} ({len(failures)}/{len(results)}): {failures[0][1:]}')
+        else:
+            self.ui.set_status(f'{len(results)} {_("files written")}.')
+
+    def _write_batch_file(self, novel, xrefIndex):
+        """Pickle the novel and its XrefIndex to a temporary file for the process pool workers; return its path."""
+        fd, batchPath = tempfile.mkstemp(suffix='.pickle')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((novel, xrefIndex), f, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            os.remove(batchPath)
+            raise
+
+        return batchPath
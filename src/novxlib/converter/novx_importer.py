@@ -4,62 +4,168 @@ Copyright (c) 2024 Peter Triesberger
 For further information see https://github.com/peter88213/novelibre
 License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
 """
+from novxlib.converter.file_class_registry import FileClassRegistry
+from novxlib.converter.file_class_registry import RegistryClassList
+from novxlib.converter.phase_timer import get_default_timer
+from novxlib.converter.phase_timing_mixin import PhaseTimingMixin
+from novxlib.converter.registry_import_source_factory import RegistryImportSourceFactory
+from novxlib.converter.streaming_new_project_factory import StreamingNewProjectFactory
+from novxlib.novx.cached_novx_file import CachedNovxFile
+from novxlib.novx.file_lock import get_file_lock
 from nvlib.model.converter.converter_ff import ConverterFf
-from nvlib.model.converter.new_project_factory import NewProjectFactory
-from nvlib.model.novx.novx_file import NovxFile
-from nvlib.model.ods.ods_r_charlist import OdsRCharList
-from nvlib.model.ods.ods_r_grid import OdsRGrid
-from nvlib.model.ods.ods_r_itemlist import OdsRItemList
-from nvlib.model.ods.ods_r_loclist import OdsRLocList
-from nvlib.model.odt.odt_r_chapterdesc import OdtRChapterDesc
-from nvlib.model.odt.odt_r_characters import OdtRCharacters
-from nvlib.model.odt.odt_r_items import OdtRItems
-from nvlib.model.odt.odt_r_locations import OdtRLocations
-from nvlib.model.odt.odt_r_manuscript import OdtRManuscript
-from nvlib.model.odt.odt_r_partdesc import OdtRPartDesc
-from nvlib.model.odt.odt_r_plotlines import OdtRPlotlines
-from nvlib.model.odt.odt_r_proof import OdtRProof
-from nvlib.model.odt.odt_r_sectiondesc import OdtRSectionDesc
-from nvlib.model.odt.odt_r_stages import OdtRStages
-
-
-class NovxImporter(ConverterFf):
+from nvlib.novx_globals import CHAPTERS_SUFFIX
+from nvlib.novx_globals import CHARACTERS_SUFFIX
+from nvlib.novx_globals import CHARLIST_SUFFIX
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import GRID_SUFFIX
+from nvlib.novx_globals import ITEMLIST_SUFFIX
+from nvlib.novx_globals import ITEMS_SUFFIX
+from nvlib.novx_globals import LOCATIONS_SUFFIX
+from nvlib.novx_globals import LOCLIST_SUFFIX
+from nvlib.novx_globals import MANUSCRIPT_SUFFIX
+from nvlib.novx_globals import Notification
+from nvlib.novx_globals import PARTS_SUFFIX
+from nvlib.novx_globals import PLOTLINES_SUFFIX
+from nvlib.novx_globals import PROOF_SUFFIX
+from nvlib.novx_globals import SECTIONS_SUFFIX
+from nvlib.novx_globals import STAGES_SUFFIX
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+
+class NovxImporter(PhaseTimingMixin, ConverterFf):
     """A converter for universal import.
 
     Support novelibre projects and most of the File subclasses 
     that can be read or written by OpenOffice/LibreOffice.
 
+    The source classes are looked up in a registry by file name ending,
+    so only the class actually selected is imported.
+    Plugins can add source classes for all instances by calling 
+    NovxImporter.IMPORT_SOURCES.register_class(), or for a single instance 
+    by calling its importSources.register_class().
+
     Overrides the superclass constants EXPORT_SOURCE_CLASSES,
     EXPORT_TARGET_CLASSES, IMPORT_SOURCE_CLASSES, IMPORT_TARGET_CLASSES.
 
+    Public instance variables:
+        importSources: FileClassRegistry -- the source classes of this instance.
+        diffImport: bool -- if True, write the project only if the import changed it.
+        changedElements: dict -- IDs of the elements changed by the last import, grouped by parts.
+        project: NovxFile -- the project file object of the last successful import, 
+                 holding the novel as written; None if the import failed.
+        phaseTimer: PhaseTimer -- receives the timing events of the conversion phases.
+        memoryBudget: MemoryBudget -- if set, trace the memory of the conversions against the budget.
+                      Close to the limit, the changes are not tracked, 
+                      so the element hashes of the novel are not held twice.
+
     Class constants:
-        CREATE_SOURCE_CLASSES -- list of classes that - additional to HtmlImport
-                        and HtmlOutline - can be exported to a new novelibre project.
+        IMPORT_SOURCES: FileClassRegistry -- the source classes of all instances.
+        IMPORT_SOURCE_CLASSES: FileClassList -- deprecated view of the source classes.
+                               Read on an instance, it views importSources.
+        CREATE_SOURCE_CLASSES -- list of classes that - additional to HtmlImportStream
+                        and HtmlOutlineStream - can be exported to a new novelibre project.
     """
-    EXPORT_SOURCE_CLASSES = [NovxFile]
-    IMPORT_SOURCE_CLASSES = [
-        OdsRCharList,
-        OdsRGrid,
-        OdsRItemList,
-        OdsRLocList,
-        OdtRChapterDesc,
-        OdtRCharacters,
-        OdtRItems,
-        OdtRLocations,
-        OdtRManuscript,
-        OdtRPartDesc,
-        OdtRPlotlines,
-        OdtRProof,
-        OdtRSectionDesc,
-        OdtRStages,
-    ]
-    IMPORT_TARGET_CLASSES = [NovxFile]
+    EXPORT_SOURCE_CLASSES = [CachedNovxFile]
+    IMPORT_SOURCES = FileClassRegistry([
+        (CHARLIST_SUFFIX, '.ods', 'novxlib.ods.ods_r_charlist_stream.OdsRCharListStream'),
+        (GRID_SUFFIX, '.ods', 'novxlib.ods.ods_r_grid_stream.OdsRGridStream'),
+        (ITEMLIST_SUFFIX, '.ods', 'novxlib.ods.ods_r_itemlist_stream.OdsRItemListStream'),
+        (LOCLIST_SUFFIX, '.ods', 'novxlib.ods.ods_r_loclist_stream.OdsRLocListStream'),
+        (CHAPTERS_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_chapterdesc.OdtRChapterDesc'),
+        (CHARACTERS_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_characters.OdtRCharacters'),
+        (ITEMS_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_items.OdtRItems'),
+        (LOCATIONS_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_locations.OdtRLocations'),
+        (MANUSCRIPT_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_manuscript.OdtRManuscript'),
+        (PARTS_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_partdesc.OdtRPartDesc'),
+        (PLOTLINES_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_plotlines.OdtRPlotlines'),
+        (PROOF_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_proof.OdtRProof'),
+        (SECTIONS_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_sectiondesc.OdtRSectionDesc'),
+        (STAGES_SUFFIX, '.odt', 'nvlib.model.odt.odt_r_stages.OdtRStages'),
+        ])
+    IMPORT_SOURCE_CLASSES = RegistryClassList('IMPORT_SOURCES', 'importSources')
+    IMPORT_TARGET_CLASSES = [CachedNovxFile]
     CREATE_SOURCE_CLASSES = []
 
     def __init__(self):
-        """Change the newProjectFactory strategy.
+        """Change the importSourceFactory and newProjectFactory strategies.
         
         Extends the superclass constructor.
         """
         super().__init__()
-        self.newProjectFactory = NewProjectFactory(self.CREATE_SOURCE_CLASSES)
+        self.importSources = self.IMPORT_SOURCES.copy()
+        self.importSourceFactory = RegistryImportSourceFactory(self.importSources)
+        self.newProjectFactory = StreamingNewProjectFactory(self.CREATE_SOURCE_CLASSES)
+        self.phaseTimer = get_default_timer()
+        self.diffImport = True
+        self.changedElements = None
+        self.project = None
+        self.memoryBudget = None
+
+    def run(self, sourcePath, **kwargs):
+        """Trace the memory, if a budget is set.
+        
+        Extends the superclass method.
+        """
+        if self.memoryBudget is None:
+            super().run(sourcePath, **kwargs)
+            return
+
+        with self.memoryBudget.trace(self.phaseTimer):
+            super().run(sourcePath, **kwargs)
+
+    def import_to_novx(self, source, target):
+        """Hold the project's exclusive lock, and report the conversion phases to the phase timer.
+        
+        The lock is held from reading to writing back the project, 
+        so no concurrent import can get lost.
+        Extends the superclass method.
+        """
+        self.changedElements = None
+        self.project = None
+        if hasattr(target, 'diffWrite'):
+            target.diffWrite = self.diffImport and not (
+                self.memoryBudget is not None and self.memoryBudget.is_near_limit()
+                )
+        self._check_canceled(target)
+        context = self._get_timing_context(source)
+        self._emit_locate_source(context)
+        self.phaseTimer.instrument_read(target, **context)
+        self.phaseTimer.instrument_read(source, **context)
+        self.phaseTimer.instrument_write_back(target, **context)
+        try:
+            with get_file_lock(target.filePath).exclusive(getattr(target, 'lockTimeout', None)):
+                super().import_to_novx(source, target)
+        except Error as ex:
+            self.newFile = None
+            self.ui.set_status(f'!{str(ex)}')
+            return
+
+        self.project = target
+        if getattr(target, 'diffWrite', False):
+            self.changedElements = target.changedElements
+        if self.changedElements == {}:
+            self.ui.set_status(f'{_("No changes")}: "{norm_path(target.filePath)}".')
+
+    def _check_canceled(self, target):
+        """Do not write the target if the UI's cancel event is set.
+        
+        Positional arguments:
+            target: NovxFile -- the project to update.
+            
+        The project is written as a whole, so the import is canceled 
+        at the latest before the project file is replaced.
+        """
+        cancelEvent = getattr(self.ui, 'cancelEvent', None)
+        if cancelEvent is None:
+            return
+
+        write = target.write
+
+        def checked_write():
+            if cancelEvent.is_set():
+                raise Notification(f'{_("Conversion canceled by the user")}: "{norm_path(target.filePath)}".')
+
+            return write()
+
+        target.write = checked_write
@@ -0,0 +1,263 @@
+"""Provide a class that keeps exported documents in sync with a novelibre project.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+import signal
+import threading
+import time
+
+from novxlib.converter.export_manifest import ExportManifest
+from novxlib.converter.novx_exporter import NovxExporter
+from novxlib.converter.novx_importer import NovxImporter
+from novxlib.model.element_hashes import get_novel_hashes
+from novxlib.ui.ui_headless import UiHeadless
+from nvlib.novx_globals import Error
+
+
+class NovxWatcher:
+    """Long-running watcher for a novelibre project and its working documents.
+    
+    The parsed project is kept in memory. 
+    When the novx file is changed by another application, it is read again, 
+    and only the documents whose model parts have changed are regenerated.
+    When a working document that can be written back changes, 
+    it is imported into the project. Then the documents are regenerated
+    from the novel the import has written, so the project is not read again.
+    Changes are processed after the file has been stable for the debounce time. 
+    The written documents are recorded in the ExportManifest of the project,
+    so on startup, only the documents that are out of date are regenerated.
+    Documents that were changed while the watcher was not running are 
+    written back first, if possible.
+
+    Public methods:
+        poll() -- check once for changes, and process them.
+        run() -- watch until stop() is called, or a SIGINT or SIGTERM signal is received.
+        stop() -- request a graceful shutdown.
+
+    Public instance variables:
+        sourcePath: str -- path to the novx file.
+        suffixes: list of str -- suffixes of the documents to keep in sync.
+        interval: float -- polling interval in seconds.
+        debounce: float -- time in seconds a changed file must be stable before processing.
+        exporter: NovxExporter -- converter for regenerating the documents.
+        importer: NovxImporter -- converter for writing documents back.
+        log -- function that receives a status message for each processed document.
+        stopSignal: int -- number of the signal that stopped the watcher, or None.
+    """
+
+    def __init__(self, sourcePath, suffixes=None, interval=1.0, debounce=2.0, log=print):
+        """Set up the converters.
+        
+        Positional arguments:
+            sourcePath: str -- path to the novx file.
+        
+        Optional arguments:
+            suffixes: list of str -- suffixes of the documents to keep in sync.
+                      If None, keep all registered export targets in sync.
+            interval: float -- polling interval in seconds.
+            debounce: float -- time in seconds a changed file must be stable before processing.
+            log -- function that receives a status message for each processed document.
+        """
+        self.sourcePath = sourcePath
+        self.interval = interval
+        self.debounce = debounce
+        self.log = log
+        self.stopSignal = None
+        self.exporter = NovxExporter()
+        self.exporter.ui = UiHeadless(answer=True)
+        if suffixes is None:
+            suffixes = self.exporter.exportTargets.get_suffixes()
+        self.suffixes = list(suffixes)
+        self.importer = NovxImporter()
+        self.importer.ui = UiHeadless(answer=True)
+        self._stopEvent = threading.Event()
+        self._source = None
+        self._manifest = ExportManifest(sourcePath)
+        self._partDigests = None
+        self._stats = {}
+        # key: file path; value: (size, mtime) when last processed
+
+        self._pending = {}
+        # key: file path; value: (stat, time of detection)
+
+        self._documents = {}
+        # key: suffix; value: document path
+
+        for suffix in self.suffixes:
+            targetPath = self.exporter.get_target_path(sourcePath, suffix)
+            if targetPath is not None:
+                self._documents[suffix] = targetPath
+
+    def poll(self):
+        """Check once for changes, and process the files that have become stable."""
+        now = time.monotonic()
+        for filePath in [self.sourcePath] + list(self._documents.values()):
+            stat = self._get_stat(filePath)
+            if stat == self._stats.get(filePath, None):
+                self._pending.pop(filePath, None)
+                continue
+
+            pending = self._pending.get(filePath, None)
+            if pending is None or pending[0] != stat:
+                self._pending[filePath] = (stat, now)
+                continue
+
+            if now - pending[1] < self.debounce:
+                continue
+
+            del self._pending[filePath]
+            if filePath == self.sourcePath:
+                self._reload()
+            elif stat is None:
+                # The document has been deleted; regenerate it.
+                self._stats[filePath] = stat
+                self._export([suffix for suffix, path in self._documents.items() if path == filePath])
+                self._manifest.write()
+            else:
+                self._write_back(filePath)
+
+    def run(self):
+        """Export the documents, and keep them in sync until stop() is called.
+        
+        If called in the main thread, SIGINT and SIGTERM request a graceful shutdown,
+        and the signal number is stored in stopSignal.
+        The previous signal handlers are restored on return.
+        """
+        self._stopEvent.clear()
+        self.stopSignal = None
+        self._source = None
+        self._partDigests = None
+        previousHandlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signalNumber in (signal.SIGINT, signal.SIGTERM):
+                previousHandlers[signalNumber] = signal.signal(signalNumber, self._handle_signal)
+        try:
+            self._manifest.read()
+            self._write_back_edited()
+            if self._source is None:
+                self._reload()
+            while not self._stopEvent.wait(self.interval):
+                self.poll()
+        finally:
+            for signalNumber, handler in previousHandlers.items():
+                signal.signal(signalNumber, handler)
+        self.log('Watcher stopped.')
+
+    def stop(self):
+        """Request a graceful shutdown. The current conversion is completed."""
+        self._stopEvent.set()
+
+    def _export(self, suffixes):
+        """Regenerate documents from the project in memory."""
+        if not suffixes or self._source is None:
+            return
+
+        results = self.exporter.write_targets(self._source, suffixes, maxWorkers=1, useThreads=True)
+        for suffix, message in results.items():
+            documentPath = self._documents.get(suffix, None)
+            if documentPath is not None:
+                self._stats[documentPath] = self._get_stat(documentPath)
+            if suffix in self.exporter.newFiles:
+                self._manifest.set_target(
+                    suffix,
+                    self.exporter.newFiles[suffix],
+                    self.exporter.get_dependencies(suffix),
+                    self._partDigests
+                    )
+            else:
+                # The document may have been changed by the failed write.
+                self._manifest.remove_target(suffix)
+            self.log(message)
+
+    def _get_stat(self, filePath):
+        """Return a (size, mtime) tuple for a file, or None if the file does not exist."""
+        try:
+            stat = os.stat(filePath)
+        except OSError:
+            return None
+
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _handle_signal(self, signalNumber, frame):
+        """Request a graceful shutdown on SIGINT or SIGTERM."""
+        self.stopSignal = signalNumber
+        self.stop()
+
+    def _reload(self):
+        """Read the project, and regenerate the documents whose model parts have changed."""
+        self._stats[self.sourcePath] = self._get_stat(self.sourcePath)
+        try:
+            source = self.exporter.read_source(self.sourcePath)
+        except Error as ex:
+            self.log(f'!{str(ex)}')
+            return
+
+        self._update(source)
+
+    def _update(self, source):
+        """Keep a project that has been read, and regenerate the documents whose model parts have changed.
+        
+        Positional arguments:
+            source: NovxFile -- project file object with the novel read.
+
+        On the first call, the documents are checked against the ExportManifest.
+        """
+        novelHashes = get_novel_hashes(source.novel)
+        partDigests = ExportManifest.get_part_digests(novelHashes)
+        staleSuffixes = []
+        for suffix in self.suffixes:
+            parts = self.exporter.get_dependencies(suffix)
+            documentPath = self._documents.get(suffix, None)
+            if documentPath is None or not os.path.isfile(documentPath):
+                staleSuffixes.append(suffix)
+            elif self._partDigests is None:
+                if not self._manifest.is_up_to_date(suffix, documentPath, parts, partDigests):
+                    staleSuffixes.append(suffix)
+                else:
+                    self._stats[documentPath] = self._get_stat(documentPath)
+            elif any(partDigests[part] != self._partDigests.get(part, None) for part in parts):
+                staleSuffixes.append(suffix)
+        self._source = source
+        self._partDigests = partDigests
+        self._manifest.set_hashes(self.sourcePath, novelHashes)
+        self._export(staleSuffixes)
+        self._manifest.write()
+
+    def _write_back(self, documentPath):
+        """Import a changed document, if it can be written back, and regenerate the other documents."""
+        self._stats[documentPath] = self._get_stat(documentPath)
+        if self.importer.importSources.find_class(documentPath) is None:
+            return
+
+        self.importer.run(documentPath, suffix='')
+        self.log(self.importer.ui.infoHowText)
+        project = self.importer.project
+        self.importer.project = None
+        if project is None or self.importer.changedElements == {}:
+            return
+
+        # The project file has been written from this novel, so it need not be read again.
+        self._stats[self.sourcePath] = self._get_stat(self.sourcePath)
+        self._pending.pop(self.sourcePath, None)
+        self._update(project)
+
+    def _write_back_edited(self):
+        """Write back the documents that were changed while the watcher was not running.
+        
+        A document counts as changed if it differs from its ExportManifest record.
+        Without a record, it counts as changed if it is newer than the project.
+        """
+        sourceStat = self._get_stat(self.sourcePath)
+        if sourceStat is None:
+            return
+
+        for suffix, documentPath in self._documents.items():
+            documentStat = self._get_stat(documentPath)
+            if documentStat is None or self._manifest.is_target_unchanged(suffix, documentPath):
+                continue
+
+            if self._manifest.has_target(suffix) or documentStat[1] > sourceStat[1]:
+                self._write_back(documentPath)
@@ -0,0 +1,256 @@
+"""Provide a class for emitting timing events of conversion phases.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+LOCATE_SOURCE = 'locate source'
+PARSE_XML = 'parse XML'
+BUILD_MODEL = 'build model'
+RENDER_TARGET = 'render target'
+COMPRESS = 'compress/zip'
+WRITE_TO_DISK = 'write to disk'
+WRITE_BACK = 'write back'
+
+_defaultTimer = None
+
+
+def get_default_timer():
+    """Return the process wide PhaseTimer instance.
+    
+    If the NOVXLIB_TRACE_FILE environment variable is set,
+    the events are also written to that JSON lines file.
+    """
+    global _defaultTimer
+    if _defaultTimer is None:
+        _defaultTimer = PhaseTimer()
+        traceFile = os.environ.get('NOVXLIB_TRACE_FILE', None)
+        if traceFile:
+            from novxlib.converter.json_lines_trace import JsonLinesTrace
+            _defaultTimer.subscribe(JsonLinesTrace(traceFile))
+    return _defaultTimer
+
+
+class PhaseTimer:
+    """Emitter of timing events for the phases of a conversion.
+    
+    An event is a dictionary with the keys:
+        phase -- one of the phase constants of this module.
+        start -- start time in seconds since the epoch.
+        duration -- duration in seconds.
+        pid -- process ID.
+    and the context keys passed by the converter, 
+    e.g. "converter", "source", "target", "targetClass".
+
+    The source file's read() time is reported as PARSE_XML, because
+    NovxFile parses the XML and builds the model in one call.
+    If the model is restored from the project cache instead, 
+    the time is reported as BUILD_MODEL.
+
+    Public methods:
+        emit(event) -- pass an event to all subscribers.
+        emit_phase(name, startTime, duration, **context) -- pass a phase event to all subscribers.
+        instrument_read(fileObj, **context) -- report the time of fileObj.read().
+        instrument_target(target, **context) -- report the phases of target.write().
+        instrument_write_back(fileObj, **context) -- report the time of fileObj.write().
+        phase(name, **context) -- context manager that times a phase.
+        subscribe(callback) -- add a callback that receives each event.
+        unsubscribe(callback) -- remove a callback.
+    
+    Public instance variables:
+        enabled: bool -- True if there is at least one subscriber.
+    """
+
+    def __init__(self):
+        """Initialize instance variables."""
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self._subscribers)
+
+    def emit(self, event):
+        """Pass an event to all subscribers.
+        
+        Positional arguments:
+            event: dict -- the timing event.
+            
+        Subscriber errors must not break the conversion, so they are ignored.
+        """
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception:
+                pass
+
+    def emit_phase(self, name, startTime, duration, **context):
+        """Pass an event for a phase timed by the caller to all subscribers.
+        
+        Positional arguments:
+            name: str -- one of the phase constants of this module.
+            startTime: float -- start time in seconds since the epoch.
+            duration: float -- duration in seconds.
+        
+        The keyword arguments are added to the event.
+        """
+        self.emit(self._get_event(name, startTime, duration, context))
+
+    def instrument_read(self, fileObj, **context):
+        """Report the time of fileObj.read().
+
+        Positional arguments:
+            fileObj -- a File subclass instance.
+        """
+        if not self.enabled:
+            return
+
+        read = fileObj.read
+
+        def timed_read():
+            with self.phase(PARSE_XML, file=fileObj.filePath, **context) as event:
+                read()
+                if getattr(fileObj, 'cacheHit', False):
+                    event['phase'] = BUILD_MODEL
+
+        fileObj.read = timed_read
+
+    def instrument_target(self, target, **context):
+        """Report the phases of target.write().
+
+        Positional arguments:
+            target -- a FileExport subclass instance.
+
+        OdfStreamWriter instances report rendering, compression 
+        and disk writing separately. For other writers, the text 
+        generation is reported as RENDER_TARGET and the rest as WRITE_TO_DISK.
+        For the other ODF writers, the time from the text generation 
+        to the removal of the temporary directory, i.e. writing content.xml 
+        and zipping the package, is reported as COMPRESS.
+        """
+        if not self.enabled:
+            return
+
+        context = dict(file=target.filePath, targetClass=type(target).__name__, **context)
+        if hasattr(target, '_write_components'):
+            # This is an OdfStreamWriter.
+            target.phaseTimer = self
+            target.phaseContext = context
+            return
+
+        getText = target._get_text
+        write = target.write
+        times = {}
+
+        def timed_get_text():
+            startCounter = time.perf_counter()
+            try:
+                return getText()
+            finally:
+                times['renderEnd'] = time.perf_counter()
+                times[RENDER_TARGET] += times['renderEnd'] - startCounter
+
+        def timed_write():
+            startTime = time.time()
+            startCounter = time.perf_counter()
+            times.clear()
+            times[RENDER_TARGET] = 0.0
+            times[COMPRESS] = 0.0
+            try:
+                return write()
+            finally:
+                duration = time.perf_counter() - startCounter
+                self.emit(self._get_event(RENDER_TARGET, startTime, times[RENDER_TARGET], context))
+                if isOdfFile:
+                    self.emit(self._get_event(COMPRESS, startTime, times[COMPRESS], context))
+                writeTime = duration - times[RENDER_TARGET] - times[COMPRESS]
+                self.emit(self._get_event(WRITE_TO_DISK, startTime, writeTime, context))
+
+        isOdfFile = hasattr(target, '_set_up') and hasattr(target, '_tear_down')
+        if isOdfFile:
+            tearDown = target._tear_down
+
+            def timed_tear_down():
+                renderEnd = times.pop('renderEnd', None)
+                if renderEnd is not None:
+                    times[COMPRESS] += time.perf_counter() - renderEnd
+                return tearDown()
+
+            target._tear_down = timed_tear_down
+        target._get_text = timed_get_text
+        target.write = timed_write
+
+    def instrument_write_back(self, fileObj, **context):
+        """Report the time of fileObj.write() as WRITE_BACK.
+
+        Positional arguments:
+            fileObj -- a File subclass instance.
+
+        CachedNovxFile instances report the time only if the file is actually written.
+        """
+        if not self.enabled:
+            return
+
+        if hasattr(fileObj, 'diffWrite'):
+            # This is a CachedNovxFile.
+            fileObj.phaseTimer = self
+            fileObj.phaseContext = context
+            return
+
+        write = fileObj.write
+
+        def timed_write():
+            with self.phase(WRITE_BACK, file=fileObj.filePath, **context):
+                return write()
+
+        fileObj.write = timed_write
+
+    @contextmanager
+    def phase(self, name, **context):
+        """Time the enclosed code and emit the event on exit.
+        
+        Positional arguments:
+            name: str -- one of the phase constants of this module.
+        
+        The keyword arguments are added to the event.
+        The event dictionary is bound to the "as" target, so the 
+        enclosed code can add information or change the phase name.
+        """
+        event = self._get_event(name, time.time(), 0, context)
+        startCounter = time.perf_counter()
+        try:
+            yield event
+        finally:
+            event['duration'] = time.perf_counter() - startCounter
+            self.emit(event)
+
+    def subscribe(self, callback):
+        """Add a callback that receives each event.
+        
+        Positional arguments:
+            callback -- function with the event dictionary as argument.
+                        It may be called from several threads. 
+        """
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers = self._subscribers + [callback]
+
+    def unsubscribe(self, callback):
+        """Remove a callback.
+        
+        Positional arguments:
+            callback -- function previously subscribed.
+        """
+        with self._lock:
+            self._subscribers = [subscriber for subscriber in self._subscribers if subscriber != callback]
+
+    def _get_event(self, name, startTime, duration, context):
+        """Return an event dictionary."""
+        event = dict(phase=name, start=startTime, duration=duration, pid=os.getpid())
+        event.update(context)
+        return event
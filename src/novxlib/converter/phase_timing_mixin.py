@@ -0,0 +1,40 @@
+"""Provide a mixin class for converters that report their phases to a PhaseTimer.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import time
+
+from novxlib.converter.phase_timer import LOCATE_SOURCE
+
+
+class PhaseTimingMixin:
+    """Mixin for converters that report the LOCATE_SOURCE phase and add context to the timing events.
+
+    The converter must have a phaseTimer instance variable.
+    Must precede the converter class in the base class list.
+
+    Public methods:
+        run(sourcePath, **kwargs) -- note the start time, and run the conversion.
+    """
+    _runStart = None
+
+    def run(self, sourcePath, **kwargs):
+        """Note the start time for the LOCATE_SOURCE phase.
+
+        Extends the superclass method.
+        """
+        self._runStart = (time.time(), time.perf_counter())
+        super().run(sourcePath, **kwargs)
+
+    def _emit_locate_source(self, context):
+        """Report the time since run() was called as LOCATE_SOURCE phase."""
+        if self._runStart is not None and self.phaseTimer.enabled:
+            startTime, startCounter = self._runStart
+            self.phaseTimer.emit_phase(LOCATE_SOURCE, startTime, time.perf_counter() - startCounter, **context)
+        self._runStart = None
+
+    def _get_timing_context(self, source):
+        """Return a dictionary with information for the timing events."""
+        return dict(converter=type(self).__name__, source=source.filePath)
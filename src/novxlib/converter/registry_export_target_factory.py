@@ -0,0 +1,55 @@
+"""Provide a factory class for a document object to write.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import _
+
+
+class RegistryExportTargetFactory:
+    """A factory class that instantiates a document object to write.
+    
+    The target class is looked up by suffix in a FileClassRegistry.
+
+    Public methods:
+        make_file_objects(self, sourcePath, **kwargs) -- return conversion objects.
+    """
+
+    def __init__(self, registry):
+        """Set the registry of the target classes.
+        
+        Positional arguments:
+            registry: FileClassRegistry -- the target classes.
+        """
+        self._registry = registry
+
+    def make_file_objects(self, sourcePath, **kwargs):
+        """Instantiate a target object for conversion from a novelibre project.
+
+        Positional arguments:
+            sourcePath: str -- path to the source file to convert.
+
+        Required keyword arguments: 
+            suffix: str -- target file name suffix.
+
+        Return a tuple with two elements:
+        - None
+        - targetFile: a FileExport subclass instance
+        
+        Raise the "Error" exception in case of error. 
+        """
+        fileName, __ = os.path.splitext(sourcePath)
+        suffix = kwargs['suffix']
+        fileClass = self._registry.get_class(suffix)
+        if fileClass is None:
+            raise Error(f'{_("Export type is not supported")}: "{suffix}".')
+
+        suffix = fileClass.SUFFIX
+        if suffix is None:
+            suffix = ''
+        targetFile = fileClass(f'{fileName}{suffix}{fileClass.EXTENSION}', **kwargs)
+        return None, targetFile
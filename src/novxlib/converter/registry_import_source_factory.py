@@ -0,0 +1,45 @@
+"""Provide a factory class for a document object to read.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import _
+
+
+class RegistryImportSourceFactory:
+    """A factory class that instantiates a document object to read.
+
+    The source class is looked up by file name ending in a FileClassRegistry.
+
+    Public methods:
+        make_file_objects(self, sourcePath, **kwargs) -- return conversion objects.
+    """
+
+    def __init__(self, registry):
+        """Set the registry of the source classes.
+        
+        Positional arguments:
+            registry: FileClassRegistry -- the source classes.
+        """
+        self._registry = registry
+
+    def make_file_objects(self, sourcePath, **kwargs):
+        """Instantiate a source object for conversion to a novelibre project.       
+
+        Positional arguments:
+            sourcePath: str -- path to the source file to convert.
+
+        Return a tuple with two elements:
+        - sourceFile: a File subclass instance
+        - None
+
+        Raise the "Error" exception in case of error. 
+        """
+        fileClass = self._registry.find_class(sourcePath)
+        if fileClass is None or not fileClass.IS_READER:
+            raise Error(f'{_("This document is not meant to be written back")}.')
+
+        sourceFile = fileClass(sourcePath, **kwargs)
+        return sourceFile, None
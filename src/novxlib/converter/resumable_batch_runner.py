@@ -0,0 +1,281 @@
+"""Provide a class for batch conversions that can be resumed after an interruption.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+import heapq
+import os
+import time
+
+from novxlib.converter.batch_converter import STATUS_ERROR
+from novxlib.converter.batch_converter import STATUS_OK
+from novxlib.converter.batch_converter import STATUS_SKIPPED
+from novxlib.converter.batch_converter import convert_file
+from novxlib.converter.batch_journal import BatchJournal
+from novxlib.novx.novx_cache import get_file_hash
+
+
+class ResumableBatchRunner:
+    """Batch converter on a process pool that skips the work finished in earlier runs.
+
+    Every conversion is recorded in a BatchJournal, keyed by the source file,
+    the target suffix, and the source's content hash.
+    When a batch is run again, the conversions recorded as successful are skipped,
+    unless the source has changed.
+    Failed conversions are retried with an exponentially growing delay,
+    up to a maximum number of attempts per run.
+    At most maxWorkers conversions are submitted to the pool at a time.
+    If a worker process crashes, the pool is replaced, and the conversions
+    that were in progress are run again one by one; an attempt is only
+    charged to the conversion that crashes its worker when running alone.
+
+    Public methods:
+        get_summary() -- return a summary of the last run.
+        run(sourcePaths, suffixes, task=convert_file, taskArgs=()) -- generate the results of a batch.
+
+    Public instance variables:
+        journalPath: str -- path to the journal file.
+        maxWorkers: int -- maximum number of worker processes; if None, the number of CPUs.
+        maxAttempts: int -- maximum number of attempts per conversion and run.
+        baseDelay: float -- delay before the first retry in seconds.
+        maxDelay: float -- maximum delay before a retry in seconds.
+    """
+
+    def __init__(self, journalPath, maxWorkers=None, maxAttempts=3, baseDelay=1.0, maxDelay=60.0):
+        """Set the batch parameters.
+
+        Positional arguments:
+            journalPath: str -- path to the journal file; it is created if missing.
+
+        Optional arguments:
+            maxWorkers: int -- maximum number of worker processes.
+            maxAttempts: int -- maximum number of attempts per conversion and run.
+            baseDelay: float -- delay before the first retry in seconds; it doubles with each retry.
+            maxDelay: float -- maximum delay before a retry in seconds.
+        """
+        self.journalPath = journalPath
+        self.maxWorkers = maxWorkers
+        self.maxAttempts = max(1, maxAttempts)
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self._summary = self._new_summary()
+
+    def get_summary(self):
+        """Return a summary of the last run.
+
+        The summary dictionary has the keys:
+            total -- number of conversions of the batch.
+            succeeded -- number of conversions done in this run.
+            skipped -- number of conversions done in earlier runs,
+                       or skipped by the task, e.g. because the target file exists.
+            failed -- number of conversions that failed after all attempts.
+            failures -- list of dictionaries with the keys "source", "suffix", "message", and "attempts".
+        """
+        return self._summary
+
+    def run(self, sourcePaths, suffixes, task=convert_file, taskArgs=()):
+        """Generate result dictionaries as the conversions are completed or skipped.
+
+        Positional arguments:
+            sourcePaths: list of str -- paths to the source files.
+            suffixes: list of str -- target file name suffixes for exporting novx files.
+                      If None, export to all registered targets.
+
+        Optional arguments:
+            task -- function called in the worker process with the source path,
+                    a list of the pending suffixes, and taskArgs.
+                    It returns a list of result dictionaries, as convert_file() does.
+            taskArgs: tuple -- additional arguments for the task, e.g. the overwrite flag.
+
+        Skipped conversions have the status "skipped"; results the task reports
+        as skipped are not retried. Failures are reported only after the last attempt;
+        all attempts are recorded in the journal.
+        """
+        self._summary = self._new_summary()
+        journal = BatchJournal(self.journalPath)
+        queue = deque()
+        retries = []
+        suspects = deque()
+        futures = {}
+        executor = None
+        try:
+            for sourcePath in sourcePaths:
+                sourcePath = os.path.abspath(sourcePath)
+                targets = self._get_targets(sourcePath, suffixes)
+                self._summary['total'] += len(targets)
+                try:
+                    sourceHash = get_file_hash(sourcePath)
+                except OSError as ex:
+                    for suffix in targets:
+                        result = self._get_result(sourcePath, suffix, STATUS_ERROR, str(ex))
+                        self._add_failure(result, 1)
+                        yield result
+
+                    continue
+
+                pending = []
+                for suffix in targets:
+                    if journal.is_done(sourcePath, suffix, sourceHash):
+                        self._summary['skipped'] += 1
+                        yield self._get_result(sourcePath, suffix, STATUS_SKIPPED, 'Already converted.')
+                    else:
+                        pending.append(suffix)
+                if pending:
+                    queue.append((sourcePath, pending, sourceHash, 1))
+            maxJobs = self.maxWorkers or os.cpu_count() or 1
+            executor = ProcessPoolExecutor(max_workers=maxJobs)
+            sequence = 0
+            while queue or retries or suspects or futures:
+                now = time.monotonic()
+                while retries and retries[0][0] <= now:
+                    queue.append(heapq.heappop(retries)[2])
+                submitted = True
+                if suspects:
+                    # Run the jobs of a broken pool one by one to find the one that crashed the worker.
+                    if not futures:
+                        submitted = self._submit(executor, futures, suspects[0], task, taskArgs)
+                        if submitted:
+                            suspects.popleft()
+                else:
+                    while queue and len(futures) < maxJobs:
+                        submitted = self._submit(executor, futures, queue[0], task, taskArgs)
+                        if not submitted:
+                            break
+
+                        queue.popleft()
+                if not submitted and not futures:
+                    # The pool broke without a pending future that would report it; replace it now.
+                    executor.shutdown(wait=False)
+                    executor = ProcessPoolExecutor(max_workers=maxJobs)
+                    continue
+
+                timeout = None
+                if retries:
+                    timeout = max(0, retries[0][0] - now)
+                if not futures:
+                    if timeout is not None:
+                        time.sleep(timeout)
+                    continue
+
+                jobsInFlight = len(futures)
+                done, __ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                poolBroken = False
+                for future in done:
+                    job = futures.pop(future)
+                    sourcePath, pending, sourceHash, attempt = job
+                    try:
+                        results = future.result()
+                    except BrokenProcessPool as ex:
+                        poolBroken = True
+                        if jobsInFlight > 1:
+                            # Any job of the pool may have crashed the worker; no attempt is charged.
+                            suspects.append(job)
+                            continue
+
+                        results = [
+                            self._get_result(sourcePath, suffix, STATUS_ERROR, f'Worker process failed: {str(ex)}')
+                            for suffix in pending
+                            ]
+                    except Exception as ex:
+                        results = [self._get_result(sourcePath, suffix, STATUS_ERROR, str(ex)) for suffix in pending]
+                    failures = []
+                    for result in results:
+                        journal.record(
+                            sourcePath,
+                            result['suffix'],
+                            sourceHash,
+                            result['status'],
+                            result['message'],
+                            attempt,
+                            )
+                        if result['status'] == STATUS_OK:
+                            self._summary['succeeded'] += 1
+                            yield result
+                        elif result['status'] == STATUS_SKIPPED:
+                            # E.g. the target exists and is not overwritten; retrying would not help.
+                            self._summary['skipped'] += 1
+                            yield result
+                        else:
+                            failures.append(result)
+                    if failures and attempt < self.maxAttempts:
+                        delay = min(self.maxDelay, self.baseDelay * 2 ** (attempt - 1))
+                        retry = (sourcePath, [result['suffix'] for result in failures], sourceHash, attempt + 1)
+                        heapq.heappush(retries, (time.monotonic() + delay, sequence, retry))
+                        sequence += 1
+                        continue
+
+                    for result in failures:
+                        self._add_failure(result, attempt)
+                        yield result
+
+                if poolBroken:
+                    # The remaining jobs of the broken pool fail as well; they are run again on the new pool.
+                    for future, job in futures.items():
+                        future.cancel()
+                        suspects.append(job)
+                    futures.clear()
+                    executor.shutdown(wait=False)
+                    executor = ProcessPoolExecutor(max_workers=maxJobs)
+        finally:
+            if executor is not None:
+                # When the generator is closed early, the pending conversions are dropped.
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=not futures)
+            journal.close()
+
+    def _add_failure(self, result, attempts):
+        """Count a final failure, and add it to the summary."""
+        self._summary['failed'] += 1
+        self._summary['failures'].append(dict(
+            source=result['source'],
+            suffix=result['suffix'],
+            message=result['message'],
+            attempts=attempts,
+            ))
+
+    def _get_result(self, sourcePath, suffix, status, message):
+        """Return a result dictionary without output."""
+        return dict(source=sourcePath, suffix=suffix, status=status, message=message, output=None)
+
+    def _get_targets(self, sourcePath, suffixes):
+        """Return the list of the target suffixes of a source; None stands for an import."""
+        if not sourcePath.endswith('.novx'):
+            return [None]
+
+        if suffixes is None:
+            from novxlib.converter.novx_exporter import NovxExporter
+            return NovxExporter.EXPORT_TARGETS.get_suffixes()
+
+        return list(suffixes)
+
+    def _get_task_suffixes(self, pending):
+        """Return the suffixes argument for the task; None for an import."""
+        if pending == [None]:
+            return None
+
+        return pending
+
+    def _new_summary(self):
+        """Return an empty summary dictionary."""
+        return dict(total=0, succeeded=0, skipped=0, failed=0, failures=[])
+
+    def _submit(self, executor, futures, job, task, taskArgs):
+        """Submit a job to the pool, and register its future; return False if the pool is broken.
+
+        The futures of the broken pool fail, and the pool is replaced then.
+        """
+        sourcePath, pending, __, __ = job
+        try:
+            future = executor.submit(task, sourcePath, self._get_task_suffixes(pending), *taskArgs)
+        except BrokenProcessPool:
+            return False
+
+        futures[future] = job
+        return True
@@ -0,0 +1,95 @@
+"""Provide a factory class for creating new projects from HTML documents read as a stream.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+
+from novxlib.html.html_import_stream import HtmlImportStream
+from novxlib.html.html_outline_stream import HtmlOutlineStream
+from novxlib.novx.cached_novx_file import CachedNovxFile
+from nvlib.model.converter.new_project_factory import NewProjectFactory
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+_NOVELIBRE_MARKER = b'novelibre'
+_OUTLINE_MARKER = b'<h3'
+
+
+def find_markers(filePath, markers, chunkSize=65536):
+    """Return the set of markers found in a file, ignoring the case.
+    
+    Positional arguments:
+        filePath: str -- path to the file.
+        markers: tuple of bytes -- lower case ASCII byte strings to look for.
+        
+    Optional arguments:
+        chunkSize: int -- number of bytes read at a time.
+    
+    The file is scanned chunk by chunk, and only until all markers are found.
+    Raise the "Error" exception in case of error.
+    """
+    found = set()
+    overlap = max(len(marker) for marker in markers) - 1
+    tail = b''
+    try:
+        with open(filePath, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunkSize), b''):
+                data = tail + chunk.lower()
+                for marker in markers:
+                    if marker in data:
+                        found.add(marker)
+                if len(found) == len(markers):
+                    break
+
+                tail = data[-overlap:] if overlap else b''
+    except OSError:
+        raise Error(f'{_("File not found")}: "{norm_path(filePath)}".')
+
+    return found
+
+
+class StreamingNewProjectFactory(NewProjectFactory):
+    """A factory class that creates a new project from an HTML document read as a stream.
+
+    HTML documents are classified by scanning the file for markers,
+    and read by HtmlOutlineStream or HtmlImportStream, 
+    so the document is never held in memory as a whole.
+    Other documents are passed to the superclass.
+
+    Public methods:
+        make_file_objects(self, sourcePath, **kwargs) -- return conversion objects.
+    """
+
+    def make_file_objects(self, sourcePath, **kwargs):
+        """Instantiate a source and a target object for creating a new novelibre project.
+
+        Positional arguments:
+            sourcePath: str -- path to the source file to convert.
+
+        Return a tuple with two elements:
+        - sourceFile: an HtmlStreamReader subclass instance, or a File subclass instance
+        - targetFile: a CachedNovxFile instance, or a NovxFile instance
+
+        An HTML document with third level headings is read as an outline, 
+        any other as a work in progress.
+        Raise the "Error" exception in case of error. 
+        Extends the superclass method.
+        """
+        if not sourcePath.lower().endswith(HtmlImportStream.EXTENSION):
+            return super().make_file_objects(sourcePath, **kwargs)
+
+        markers = find_markers(sourcePath, (_NOVELIBRE_MARKER, _OUTLINE_MARKER))
+        if _NOVELIBRE_MARKER in markers:
+            # The source file is a novelibre html export.
+            raise Error(f'{_("This document is not meant to be written back")}.')
+
+        if _OUTLINE_MARKER in markers:
+            sourceFile = HtmlOutlineStream(sourcePath, **kwargs)
+        else:
+            sourceFile = HtmlImportStream(sourcePath, **kwargs)
+        fileName, __ = os.path.splitext(sourcePath)
+        targetFile = CachedNovxFile(f'{fileName}{CachedNovxFile.EXTENSION}', **kwargs)
+        return sourceFile, targetFile
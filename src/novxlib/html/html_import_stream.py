@@ -0,0 +1,97 @@
+"""Provide a class for streaming the import of a "work in progress" HTML document.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import re
+
+from novxlib.html.html_stream_reader import HtmlStreamReader
+from nvlib.novx_globals import _
+
+_TAGS = re.compile(r'<[^>]*>')
+
+
+class HtmlImportStream(HtmlStreamReader):
+    """HTML "work in progress" reader that adds chapters and sections as they are parsed.
+
+    Headings of level 1 and 2 start parts and chapters.
+    The paragraphs of a chapter are the content of its sections; 
+    a paragraph with the section divider starts a new section.
+    A comment at the beginning of a section becomes the section title.
+    Only the paragraphs of the current section are held while parsing;
+    the section content is set once, when the section ends.
+    Sections with fewer words than _LOW_WORDCOUNT get the status "Outline", the others "Draft".
+
+    Public methods:
+        handle_comment(data) -- take the section title from a comment.
+
+    Class constants:
+        DESCRIPTION: str -- file type description.
+    """
+    DESCRIPTION = _('Work in progress')
+    _MARKUP = True
+    _SECTION_DIVIDER = '* * *'
+    _LOW_WORDCOUNT = 10
+
+    def handle_comment(self, data):
+        """Keep a comment at the beginning of a section as the section title.
+
+        Positional arguments:
+            data: str -- comment text.
+
+        Overrides the superclass method.
+        """
+        if self._blockTag is None and self._scId is None:
+            self._sectionTitle = data.strip()
+
+    def _clear(self):
+        """Reset the parsing state.
+        
+        Extends the superclass method.
+        """
+        super()._clear()
+        self._paragraphs = []
+        self._wordCount = 0
+        self._sectionTitle = None
+
+    def _flush(self):
+        """Set the content and status of the current section.
+        
+        Overrides the superclass method.
+        """
+        if self._scId is None:
+            return
+
+        section = self.novel.sections[self._scId]
+        section.sectionContent = ''.join(self._paragraphs)
+        if self._wordCount < self._LOW_WORDCOUNT:
+            section.status = 1
+        else:
+            section.status = 2
+        self._paragraphs = []
+        self._wordCount = 0
+        self._scId = None
+
+    def _read_block(self, tag, text):
+        """Add a paragraph to the current section, or start a new chapter or section.
+        
+        Extends the superclass method.
+        """
+        if tag != 'p':
+            self._sectionTitle = None
+            super()._read_block(tag, text)
+            return
+
+        if self._chId is None or not text:
+            return
+
+        if self._SECTION_DIVIDER in text:
+            self._flush()
+            return
+
+        if self._scId is None:
+            self._add_section(self._sectionTitle)
+            self._sectionTitle = None
+        self._paragraphs.append(f'<p>{text}</p>')
+        self._wordCount += len(_TAGS.sub(' ', text).split())
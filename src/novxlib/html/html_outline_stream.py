@@ -0,0 +1,55 @@
+"""Provide a class for streaming the import of an HTML outline.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.html.html_stream_reader import HtmlStreamReader
+from nvlib.novx_globals import _
+
+
+class HtmlOutlineStream(HtmlStreamReader):
+    """HTML outline reader that adds chapters and sections as they are parsed.
+
+    Headings of level 1 and 2 start parts and chapters, 
+    headings of level 3 start sections.
+    The paragraphs following a heading are the description of its chapter or section.
+    Only the paragraphs of the current description are held while parsing.
+
+    Class constants:
+        DESCRIPTION: str -- file type description.
+    """
+    DESCRIPTION = _('Novel outline')
+
+    def _clear(self):
+        """Reset the parsing state.
+        
+        Extends the superclass method.
+        """
+        super()._clear()
+        self._paragraphs = []
+
+    def _flush(self):
+        """Set the description of the current chapter or section.
+        
+        Overrides the superclass method.
+        """
+        if self._paragraphs:
+            if self._scId is not None:
+                self.novel.sections[self._scId].desc = '\n'.join(self._paragraphs)
+            elif self._chId is not None:
+                self.novel.chapters[self._chId].desc = '\n'.join(self._paragraphs)
+        self._paragraphs = []
+
+    def _read_block(self, tag, text):
+        """Add a paragraph to the current description, or start a new chapter or section.
+        
+        Extends the superclass method.
+        """
+        if tag == 'h3':
+            self._add_section(text)
+        elif tag == 'p':
+            if text and self._chId is not None:
+                self._paragraphs.append(text)
+        else:
+            super()._read_block(tag, text)
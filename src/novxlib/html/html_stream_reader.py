@@ -0,0 +1,290 @@
+"""Provide a base class for HTML readers that build the novel while parsing.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import codecs
+from html.parser import HTMLParser
+import locale
+import re
+from xml.sax.saxutils import escape
+
+from nvlib.model.data.chapter import Chapter
+from nvlib.model.data.section import Section
+from nvlib.novx_globals import CHAPTER_PREFIX
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import SECTION_PREFIX
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class HtmlStreamReader(HTMLParser):
+    """Abstract HTML document reader that adds chapters and sections to the novel as they are parsed.
+
+    The file is fed to the parser chunk by chunk, so it is never held in memory as a whole.
+    Only the text of the current block element is collected; 
+    subclasses keep the text of the current chapter or section at most.
+    Headings of level 1 and 2 start parts and chapters.
+    The document title, the "author" and "description" meta tags, 
+    and the language are read into the novel's attributes.
+
+    Subclasses implement _read_block(), which receives the text of each heading and paragraph,
+    and may extend _flush(), which is called before a new chapter or section starts.
+
+    Public methods:
+        read() -- parse the file, and add its chapters and sections to the novel.
+        handle_comment(data) -- ignore comments.
+        handle_data(data) -- collect the text of block elements.
+        handle_endtag(tag) -- finish block elements and formatting.
+        handle_starttag(tag, attrs) -- start block elements and formatting, and read metadata.
+
+    Public instance variables:
+        filePath: str -- path to the HTML file.
+        novel: Novel -- the novel to build.
+        chunkSize: int -- number of characters fed to the parser at a time.
+
+    Class constants:
+        DESCRIPTION: str -- file type description.
+        EXTENSION: str -- file extension.
+        SUFFIX: str -- file name suffix.
+        IS_READER: bool -- the file can be read.
+        IS_WRITER: bool -- the file cannot be written.
+    """
+    DESCRIPTION = _('HTML document')
+    EXTENSION = '.html'
+    SUFFIX = ''
+    IS_READER = True
+    IS_WRITER = False
+
+    _BLOCK_TAGS = ('title', 'h1', 'h2', 'h3', 'p')
+    _CHAPTER_LEVELS = {'h1': 1, 'h2': 2}
+    _FORMATS = {'em': 'em', 'i': 'em', 'strong': 'strong', 'b': 'strong'}
+    # If True, paragraphs keep italic and bold formatting as novx markup.
+    _MARKUP = False
+
+    def __init__(self, filePath, chunkSize=65536, **kwargs):
+        """Initialize instance variables.
+
+        Positional arguments:
+            filePath: str -- path to the HTML file.
+
+        Optional arguments:
+            chunkSize: int -- number of characters fed to the parser at a time.
+        """
+        super().__init__(convert_charrefs=True)
+        self.filePath = filePath
+        self.novel = None
+        self.chunkSize = chunkSize
+        self._clear()
+
+    def read(self):
+        """Parse the HTML file chunk by chunk, adding the chapters and sections to the novel.
+
+        Raise the "Error" exception in case of error. 
+        """
+        encoding = self._get_encoding()
+        self.reset()
+        self._clear()
+        try:
+            with open(self.filePath, 'r', encoding=encoding) as f:
+                for chunk in iter(lambda: f.read(self.chunkSize), ''):
+                    self.feed(chunk)
+            self.close()
+        except (OSError, UnicodeDecodeError):
+            raise Error(f'{_("Cannot read file")}: "{norm_path(self.filePath)}".')
+
+        self._end_block()
+        self._flush()
+
+    def handle_comment(self, data):
+        """Ignore comments.
+
+        Positional arguments:
+            data: str -- comment text.
+
+        Overrides the HTMLParser method.
+        """
+        pass
+
+    def handle_data(self, data):
+        """Collect the text of the current block element.
+
+        Positional arguments:
+            data: str -- text with the character references converted.
+
+        Overrides the HTMLParser method.
+        """
+        if self._blockTag is None:
+            return
+
+        if self._is_formatted():
+            data = escape(data)
+        self._lines.append(data)
+
+    def handle_endtag(self, tag):
+        """Finish the current block element or a formatting.
+
+        Positional arguments:
+            tag: str -- tag name in lower case.
+
+        Overrides the HTMLParser method.
+        """
+        if tag == self._blockTag:
+            self._end_block()
+        elif tag in self._FORMATS and self._is_formatted():
+            novxTag = self._FORMATS[tag]
+            if self._formats and self._formats[-1] == novxTag:
+                self._formats.pop()
+                self._lines.append(f'</{novxTag}>')
+
+    def handle_starttag(self, tag, attrs):
+        """Start a block element or a formatting, or read metadata.
+
+        Positional arguments:
+            tag: str -- tag name in lower case.
+            attrs: list of (name, value) tuples.
+
+        A block element ends the current one, so unclosed paragraphs are accepted.
+        Overrides the HTMLParser method.
+        """
+        if tag in self._BLOCK_TAGS:
+            self._end_block()
+            self._blockTag = tag
+        elif tag in self._FORMATS:
+            if self._is_formatted():
+                novxTag = self._FORMATS[tag]
+                self._formats.append(novxTag)
+                self._lines.append(f'<{novxTag}>')
+        elif tag == 'br':
+            if self._blockTag is not None:
+                self._lines.append(' ')
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            name = (attrs.get('name', None) or '').lower()
+            content = attrs.get('content', None)
+            if content is None:
+                return
+
+            if name == 'author':
+                self.novel.authorName = content
+            elif name == 'description':
+                self.novel.desc = content
+        elif tag in ('html', 'body'):
+            self._set_language(dict(attrs).get('lang', None))
+
+    def _add_chapter(self, title, chLevel):
+        """Append a new chapter to the novel, and make it the current one."""
+        self._flush()
+        self._chapterCount += 1
+        chId = f'{CHAPTER_PREFIX}{self._chapterCount}'
+        chapter = Chapter()
+        chapter.title = title
+        chapter.chLevel = chLevel
+        chapter.chType = 0
+        self.novel.chapters[chId] = chapter
+        self.novel.tree.append(CH_ROOT, chId)
+        self._chId = chId
+        self._scId = None
+
+    def _add_section(self, title):
+        """Append a new section to the current chapter, and make it the current one.
+        
+        Sections before the first chapter are ignored.
+        """
+        self._flush()
+        if self._chId is None:
+            return
+
+        self._sectionCount += 1
+        scId = f'{SECTION_PREFIX}{self._sectionCount}'
+        section = Section()
+        section.title = title
+        section.scType = 0
+        section.status = 1
+        self.novel.sections[scId] = section
+        self.novel.tree.append(self._chId, scId)
+        self._scId = scId
+
+    def _clear(self):
+        """Reset the parsing state."""
+        self._blockTag = None
+        self._lines = []
+        self._formats = []
+        self._chId = None
+        self._scId = None
+        self._chapterCount = 0
+        self._sectionCount = 0
+
+    def _end_block(self):
+        """Pass the text of the current block element to _read_block()."""
+        if self._blockTag is None:
+            return
+
+        while self._formats:
+            self._lines.append(f'</{self._formats.pop()}>')
+        tag = self._blockTag
+        text = _WHITESPACE.sub(' ', ''.join(self._lines)).strip()
+        self._blockTag = None
+        self._lines = []
+        if tag == 'title':
+            self.novel.title = text
+        else:
+            self._read_block(tag, text)
+
+    def _flush(self):
+        """Store the text collected for the current chapter or section.
+        
+        This default does nothing.
+        """
+        pass
+
+    def _get_encoding(self):
+        """Return "utf-8" if the file is UTF-8 encoded, otherwise the locale's preferred encoding.
+        
+        HTML files exported by a word processor may be ANSI encoded.
+        The file is checked chunk by chunk, so it is never held in memory as a whole.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            with open(self.filePath, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunkSize), b''):
+                    decoder.decode(chunk)
+            decoder.decode(b'', True)
+        except UnicodeDecodeError:
+            return locale.getpreferredencoding(False)
+
+        except OSError:
+            raise Error(f'{_("File not found")}: "{norm_path(self.filePath)}".')
+
+        return 'utf-8'
+
+    def _is_formatted(self):
+        """Return True if the current block element keeps its formatting."""
+        return self._MARKUP and self._blockTag == 'p'
+
+    def _read_block(self, tag, text):
+        """Process the text of a heading or paragraph.
+        
+        Positional arguments:
+            tag: str -- tag name in lower case.
+            text: str -- text with normalized whitespace.
+        
+        This default creates parts and chapters from headings of level 1 and 2.
+        """
+        chLevel = self._CHAPTER_LEVELS.get(tag, None)
+        if chLevel is not None:
+            self._add_chapter(text, chLevel)
+
+    def _set_language(self, languageTag):
+        """Set the novel's language and country code from a language tag such as "en-US"."""
+        if not languageTag:
+            return
+
+        codes = languageTag.replace('_', '-').split('-')
+        self.novel.languageCode = codes[0]
+        if len(codes) > 1:
+            self.novel.countryCode = codes[1]
@@ -0,0 +1,194 @@
+"""Provide functions for fingerprinting the parts of a novel.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from datetime import date
+from datetime import time
+import hashlib
+import json
+
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import PL_ROOT
+from nvlib.novx_globals import PN_ROOT
+
+PROJECT = 'project'
+CHAPTERS = 'chapters'
+SECTIONS = 'sections'
+CHARACTERS = 'characters'
+LOCATIONS = 'locations'
+ITEMS = 'items'
+PLOT_LINES = 'plotLines'
+PLOT_POINTS = 'plotPoints'
+PROJECT_NOTES = 'projectNotes'
+
+ELEMENT_PARTS = (
+    CHAPTERS,
+    SECTIONS,
+    CHARACTERS,
+    LOCATIONS,
+    ITEMS,
+    PLOT_LINES,
+    PLOT_POINTS,
+    PROJECT_NOTES,
+)
+ALL_PARTS = (PROJECT,) + ELEMENT_PARTS
+
+_IGNORED_ATTRIBUTES = ('on_element_change', 'tree')
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+_NO_DATA = object()
+
+
+def get_changed_elements(oldHashes, newHashes):
+    """Return the IDs of the elements that differ, grouped by parts.
+    
+    Positional arguments:
+        oldHashes: dict -- element hashes as returned by get_novel_hashes().
+        newHashes: dict -- element hashes as returned by get_novel_hashes().
+        
+    Return a dictionary with the part names as keys and lists of 
+    the added, changed, or removed element IDs as values. 
+    Parts without changes are omitted.
+    If only the order of a part's elements differs, the part has an empty list.
+    """
+    changes = {}
+    for part in ALL_PARTS:
+        old = oldHashes.get(part, {})
+        new = newHashes.get(part, {})
+        changed = [elemId for elemId, elemHash in new.items() if old.get(elemId, None) != elemHash]
+        changed.extend(elemId for elemId in old if elemId not in new)
+        if changed or list(old) != list(new):
+            changes[part] = changed
+    return changes
+
+
+def get_element_hash(element):
+    """Return a hex digest of an element's data attributes.
+    
+    Positional arguments:
+        element -- a novel element, or the novel itself.
+        
+    The hash is taken over a JSON serialization of the strings, numbers, dates, 
+    and the lists, sets, and dictionaries of them, with sets and dictionaries sorted;
+    so it is the same in every run.
+    Element collections, the tree, and all other objects are ignored.
+    """
+    items = []
+    for name, value in sorted(vars(element).items()):
+        if name in _IGNORED_ATTRIBUTES:
+            continue
+
+        if isinstance(value, dict) and name.lstrip('_') in ELEMENT_PARTS:
+            continue
+
+        value = _get_data(value)
+        if value is not _NO_DATA:
+            items.append((name, value))
+    data = json.dumps(items, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def get_element_ids(novel, part):
+    """Return a list of the element IDs of a part in tree order.
+    
+    Positional arguments:
+        novel: Novel -- the novel to examine.
+        part: str -- one of ELEMENT_PARTS.
+    """
+    tree = novel.tree
+    if part == CHAPTERS:
+        return tree.get_children(CH_ROOT)
+
+    if part == SECTIONS:
+        return [scId for chId in tree.get_children(CH_ROOT) for scId in tree.get_children(chId)]
+
+    if part == CHARACTERS:
+        return tree.get_children(CR_ROOT)
+
+    if part == LOCATIONS:
+        return tree.get_children(LC_ROOT)
+
+    if part == ITEMS:
+        return tree.get_children(IT_ROOT)
+
+    if part == PLOT_LINES:
+        return tree.get_children(PL_ROOT)
+
+    if part == PLOT_POINTS:
+        return [ppId for plId in tree.get_children(PL_ROOT) for ppId in tree.get_children(plId)]
+
+    if part == PROJECT_NOTES:
+        return tree.get_children(PN_ROOT)
+
+    raise ValueError(f'Unknown part: "{part}".')
+
+
+def get_novel_hashes(novel):
+    """Return the element hashes of a novel, grouped by parts.
+    
+    Positional arguments:
+        novel: Novel -- the novel to examine.
+    
+    Return a dictionary with the part names as keys and dictionaries
+    with the element IDs as keys and hex digests as values.
+    The PROJECT part contains the novel's own attributes under the "novel" key.
+    The dictionaries are ordered like the tree.
+    """
+    hashes = {PROJECT: {'novel': get_element_hash(novel)}}
+    for part in ELEMENT_PARTS:
+        elements = getattr(novel, part)
+        hashes[part] = {elemId: get_element_hash(elements[elemId]) for elemId in get_element_ids(novel, part)}
+    return hashes
+
+
+def get_part_digest(elementHashes):
+    """Return a hex digest for a part, including the order of its elements.
+    
+    Positional arguments:
+        elementHashes: dict -- element hashes of a part, as returned by get_novel_hashes().
+    """
+    partHash = hashlib.sha1()
+    for elemId, elemHash in elementHashes.items():
+        partHash.update(f'{elemId}:{elemHash};'.encode('utf-8'))
+    return partHash.hexdigest()
+
+
+def _get_data(value):
+    """Return a JSON serializable form of a data value, or _NO_DATA for any other object."""
+    if isinstance(value, _SCALAR_TYPES):
+        return value
+
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+
+    if isinstance(value, (list, tuple)):
+        values = [_get_data(item) for item in value]
+        if _NO_DATA in values:
+            return _NO_DATA
+
+        return values
+
+    if isinstance(value, (set, frozenset)):
+        values = _get_data(list(value))
+        if values is _NO_DATA:
+            return _NO_DATA
+
+        return sorted(values, key=_get_sort_key)
+
+    if isinstance(value, dict):
+        items = [(str(key), _get_data(item)) for key, item in value.items()]
+        if any(item is _NO_DATA for __, item in items):
+            return _NO_DATA
+
+        return sorted(items, key=_get_sort_key)
+
+    return _NO_DATA
+
+
+def _get_sort_key(value):
+    """Return a key for sorting JSON serializable values of different types."""
+    return json.dumps(value, ensure_ascii=False)
@@ -0,0 +1,77 @@
+"""Provide a class for export filters based on precomputed element sets.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+
+
+class ElementSetFilter:
+    """Export filter that accepts the elements of a precomputed ID set.
+    
+    Compatible with the Filter interface of the FileExport filter 
+    instance variables; accept() is a set lookup.
+    Filters combine with the set operators:
+        a & b -- elements accepted by both filters.
+        a | b -- elements accepted by either filter.
+        a - b -- elements accepted by a, but not by b.
+        ~a -- elements of the same kind not accepted by a.
+    Filters are immutable, so one filter can be used by 
+    several targets, also in other processes.
+
+    Public methods:
+        accept(source, eId) -- return True if the element is in the set.
+
+    Public instance variables:
+        elementIds: frozenset -- IDs of the accepted elements.
+        universe: frozenset -- IDs of all elements of this kind.
+    """
+
+    def __init__(self, elementIds, universe):
+        """Set the accepted elements.
+        
+        Positional arguments:
+            elementIds: iterable of element IDs to accept.
+            universe: iterable of all element IDs of this kind; used for negation.
+        """
+        self.universe = frozenset(universe)
+        self.elementIds = frozenset(elementIds) & self.universe
+
+    def __and__(self, other):
+        return ElementSetFilter(self.elementIds & other.elementIds, self.universe | other.universe)
+
+    def __contains__(self, eId):
+        return eId in self.elementIds
+
+    def __eq__(self, other):
+        if not isinstance(other, ElementSetFilter):
+            return NotImplemented
+
+        return self.elementIds == other.elementIds and self.universe == other.universe
+
+    def __hash__(self):
+        return hash((self.elementIds, self.universe))
+
+    def __invert__(self):
+        return ElementSetFilter(self.universe - self.elementIds, self.universe)
+
+    def __len__(self):
+        return len(self.elementIds)
+
+    def __or__(self, other):
+        return ElementSetFilter(self.elementIds | other.elementIds, self.universe | other.universe)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self.elementIds)} of {len(self.universe)})'
+
+    def __sub__(self, other):
+        return ElementSetFilter(self.elementIds - other.elementIds, self.universe | other.universe)
+
+    def accept(self, source, eId):
+        """Return True if the element is in the set.
+        
+        Positional arguments:
+            source -- the FileExport instance using the filter; not used.
+            eId: str -- element ID.
+        """
+        return eId in self.elementIds
@@ -0,0 +1,131 @@
+"""Provide a class for a compact, read-only snapshot of a novel.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from types import MethodType
+
+from novxlib.model.snapshot_table import SnapshotTable
+from novxlib.model.snapshot_table import get_frozen_value
+from novxlib.model.snapshot_table import get_public_attributes
+from novxlib.model.snapshot_tree import SnapshotTree
+
+
+class NovelSnapshot:
+    """Immutable, column-based compact model of a novel.
+
+    The element dictionaries of the novel, e.g. "sections", become 
+    SnapshotTable mappings that store each attribute as a column, 
+    with interned IDs, integer row indexes for the relations between 
+    elements, and compressed section content that is decoded on access.
+    The tree becomes a SnapshotTree with tuples of IDs.
+    The snapshot has the attributes of the novel, and the methods of 
+    the Novel class are bound to it, so code that only reads the novel, 
+    e.g. for analysis or for keeping many projects in memory, can use it 
+    in place of the novel. Any attempt to change it raises AttributeError.
+    
+    The document writers set some attributes of the novel while writing,
+    e.g. the languages used. So each writer gets a view of the snapshot,
+    which shares the tables and the tree, and keeps the novel attributes
+    set by the writer to itself. The tables and the tree remain read-only.
+    
+    Public methods:
+        get_view() -- return a view whose novel attributes can be set.
+    
+    Public instance variables:
+        tree: SnapshotTree -- the element tree.
+        
+    Class constants:
+        RELATIONS: dict -- for each table, the columns holding IDs of other elements,
+                   with the names of the related tables.
+    """
+    __slots__ = ('_attributes', '_changes', '_novelClass', 'tree')
+    RELATIONS = {
+        'sections': {
+            'characters': 'characters',
+            'locations': 'locations',
+            'items': 'items',
+            'scPlotLines': 'plotLines',
+            },
+    }
+
+    def __init__(self, novel):
+        """Copy a novel into the compact representation.
+        
+        Positional arguments:
+            novel: Novel -- the novel to copy.
+        """
+        attributes = {}
+        tables = {}
+        for name, value in get_public_attributes(novel).items():
+            if name == 'tree':
+                continue
+
+            if isinstance(value, dict) and value and all(hasattr(element, '__dict__') for element in value.values()):
+                tables[name] = SnapshotTable(value)
+                attributes[name] = tables[name]
+            else:
+                attributes[name] = get_frozen_value(value)
+        for tableName, relations in self.RELATIONS.items():
+            if tableName in tables:
+                tables[tableName].link_relations(tables, relations)
+        object.__setattr__(self, '_attributes', attributes)
+        object.__setattr__(self, '_changes', None)
+        object.__setattr__(self, '_novelClass', type(novel))
+        object.__setattr__(self, 'tree', SnapshotTree(novel.tree))
+
+    def __getattr__(self, name):
+        changes = self._changes
+        if changes:
+            if name in changes:
+                return changes[name]
+
+            if name.startswith('_') and name[1:] in changes:
+                return changes[name[1:]]
+
+        attributes = self._attributes
+        if name in attributes:
+            return attributes[name]
+
+        if name.startswith('_') and name[1:] in attributes:
+            return attributes[name[1:]]
+
+        method = getattr(self._novelClass, name, None)
+        if callable(method) and not name.startswith('__'):
+            return MethodType(method, self)
+
+        raise AttributeError(f'Novel snapshot has no attribute "{name}".')
+
+    def __reduce__(self):
+        return (_restore_snapshot, (self._attributes, self._novelClass, self.tree, self._changes))
+
+    def __setattr__(self, name, value):
+        if self._changes is None:
+            raise AttributeError(f'Novel snapshot is read-only: "{name}".')
+
+        if name.startswith('_') and name[1:] in self._attributes:
+            name = name[1:]
+        if name == 'tree' or isinstance(self._attributes.get(name, None), SnapshotTable):
+            raise AttributeError(f'Novel snapshot is read-only: "{name}".')
+
+        self._changes[name] = value
+
+    def get_view(self):
+        """Return a view of the snapshot whose novel attributes can be set, e.g. for a document writer.
+        
+        The view shares the tables and the tree with the snapshot.
+        Attributes set on the view, except the tables and the tree, 
+        are kept by the view; the snapshot remains unchanged.
+        """
+        return _restore_snapshot(self._attributes, self._novelClass, self.tree, {})
+
+
+def _restore_snapshot(attributes, novelClass, tree, changes=None):
+    """Return a NovelSnapshot with the given state; used for unpickling and for views."""
+    snapshot = NovelSnapshot.__new__(NovelSnapshot)
+    object.__setattr__(snapshot, '_attributes', attributes)
+    object.__setattr__(snapshot, '_changes', changes)
+    object.__setattr__(snapshot, '_novelClass', novelClass)
+    object.__setattr__(snapshot, 'tree', tree)
+    return snapshot
@@ -0,0 +1,27 @@
+"""Provide a dictionary class that cannot be changed.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+
+
+class ReadOnlyDict(dict):
+    """Dictionary that raises TypeError on any change.
+    
+    Unlike types.MappingProxyType, it can be pickled.
+    """
+
+    def __reduce__(self):
+        return (ReadOnlyDict, (dict(self),))
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Snapshot dictionary is read-only.')
+
+    __delitem__ = _read_only
+    __setitem__ = _read_only
+    clear = _read_only
+    pop = _read_only
+    popitem = _read_only
+    setdefault = _read_only
+    update = _read_only
@@ -0,0 +1,143 @@
+"""Provide a class for building indexed section filters.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.model.element_set_filter import ElementSetFilter
+from novxlib.model.xref_index import XrefIndex
+from nvlib.novx_globals import CH_ROOT
+
+
+class SectionIndex:
+    """Index of a novel's sections by tag, viewpoint, plot line, status, and type.
+
+    The index is built once per novel. 
+    Then each filter is created from precomputed section sets, 
+    and can be combined with other filters by set operations,
+    see ElementSetFilter.
+
+    Public methods:
+        all_sections() -- return a filter accepting all sections.
+        apply_filter(target, sectionFilter, hideEmptyChapters=True) -- set a section filter on an export target.
+        character(crId) -- return a filter for the sections featuring a character.
+        get_chapter_filter(sectionFilter) -- return a filter for the chapters with accepted sections.
+        plot_line(plId) -- return a filter for the sections assigned to a plot line.
+        section_type(*scTypes) -- return a filter for the sections of the given types.
+        status(*statuses) -- return a filter for the sections with the given completion status.
+        tag(tag) -- return a filter for the sections with a tag.
+        viewpoint(crId) -- return a filter for the sections with a viewpoint character.
+
+    Public instance variables:
+        xrefIndex: XrefIndex -- the cross reference index the relations are taken from.
+    """
+
+    def __init__(self, novel, xrefIndex=None):
+        """Build the index.
+        
+        Positional arguments:
+            novel: Novel -- the novel to index.
+            
+        Optional arguments:
+            xrefIndex: XrefIndex -- an index of the same novel to reuse.
+        """
+        if xrefIndex is None:
+            xrefIndex = XrefIndex()
+        xrefIndex.generate_xref(novel)
+        self.xrefIndex = xrefIndex
+        chapterIds = []
+        sectionIds = []
+        self._chapterPerSection = {}
+        self._scnPerStatus = {}
+        self._scnPerType = {}
+        for chId in novel.tree.get_children(CH_ROOT):
+            chapterIds.append(chId)
+            for scId in novel.tree.get_children(chId):
+                section = novel.sections[scId]
+                sectionIds.append(scId)
+                self._chapterPerSection[scId] = chId
+                self._scnPerStatus.setdefault(section.status, []).append(scId)
+                self._scnPerType.setdefault(section.scType, []).append(scId)
+        self._allChapters = frozenset(chapterIds)
+        self._allSections = frozenset(sectionIds)
+
+    def all_sections(self):
+        """Return a filter accepting all sections."""
+        return self._get_filter(self._allSections)
+
+    def apply_filter(self, target, sectionFilter, hideEmptyChapters=True):
+        """Set a section filter on an export target.
+        
+        Positional arguments:
+            target: FileExport -- the target document object.
+            sectionFilter: ElementSetFilter -- the filter to apply.
+        
+        Optional arguments:
+            hideEmptyChapters: bool -- if True, also set a chapter filter 
+                               that skips the chapters without accepted sections.
+        """
+        target.sectionFilter = sectionFilter
+        if hideEmptyChapters:
+            target.chapterFilter = self.get_chapter_filter(sectionFilter)
+
+    def character(self, crId):
+        """Return a filter for the sections featuring a character.
+        
+        Positional arguments:
+            crId: str -- character ID.
+        """
+        return self._get_filter(self.xrefIndex.scnPerChr.get(crId, ()))
+
+    def get_chapter_filter(self, sectionFilter):
+        """Return a filter for the chapters that contain at least one accepted section.
+        
+        Positional arguments:
+            sectionFilter: ElementSetFilter -- filter for sections.
+        """
+        chapterIds = {self._chapterPerSection[scId] for scId in sectionFilter.elementIds}
+        return ElementSetFilter(chapterIds, self._allChapters)
+
+    def plot_line(self, plId):
+        """Return a filter for the sections assigned to a plot line.
+        
+        Positional arguments:
+            plId: str -- plot line ID.
+        """
+        return self._get_filter(self.xrefIndex.scnPerPlt.get(plId, ()))
+
+    def section_type(self, *scTypes):
+        """Return a filter for the sections of the given types.
+        
+        Positional arguments:
+            scTypes: int -- section types, e.g. 0 for normal, 1 for unused.
+        """
+        return self._get_filter(scId for scType in scTypes for scId in self._scnPerType.get(scType, ()))
+
+    def status(self, *statuses):
+        """Return a filter for the sections with the given completion status.
+        
+        Positional arguments:
+            statuses: int -- completion status values, 1 (Outline) to 5 (Done).
+        """
+        return self._get_filter(scId for status in statuses for scId in self._scnPerStatus.get(status, ()))
+
+    def tag(self, tag):
+        """Return a filter for the sections with a tag.
+        
+        Positional arguments:
+            tag: str -- section tag.
+        """
+        return self._get_filter(self.xrefIndex.scnPerTag.get(tag, ()))
+
+    def viewpoint(self, crId):
+        """Return a filter for the sections with a viewpoint character.
+        
+        Positional arguments:
+            crId: str -- character ID.
+        """
+        return self._get_filter(self.xrefIndex.scnPerVpt.get(crId, ()))
+
+    def _get_filter(self, sectionIds):
+        """Return a filter for a collection of section IDs."""
+        return ElementSetFilter(sectionIds, self._allSections)
+
@@ -0,0 +1,38 @@
+"""Provide a class for a read-only view of an element in a NovelSnapshot.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+
+
+class SnapshotElement:
+    """Read-only view of one row of a SnapshotTable.
+    
+    The attributes are looked up in the table's columns,
+    so a view holds no data of its own.
+    Views are created on access, and are not meant to be kept.
+    """
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        """Set the table row.
+        
+        Positional arguments:
+            table: SnapshotTable -- the table the element belongs to.
+            index: int -- the element's row.
+        """
+        object.__setattr__(self, '_table', table)
+        object.__setattr__(self, '_index', index)
+
+    def __getattr__(self, name):
+        return self._table.get_attribute(self, self._index, name)
+
+    def __reduce__(self):
+        return (SnapshotElement, (self._table, self._index))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self._table.get_id(self._index)!r})'
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'Snapshot element is read-only: "{name}".')
@@ -0,0 +1,195 @@
+"""Provide a class for column storage of a NovelSnapshot's elements.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from array import array
+from collections.abc import Mapping
+import sys
+from types import MethodType
+import zlib
+
+from novxlib.model.read_only_dict import ReadOnlyDict
+from novxlib.model.snapshot_element import SnapshotElement
+
+_COMPRESSED_ATTRIBUTES = ('sectionContent',)
+_INTERN_MAX_LENGTH = 64
+
+
+def get_public_attributes(obj):
+    """Return a dictionary of an object's data attributes by public name.
+    
+    Positional arguments:
+        obj -- a model object.
+    
+    Private attributes that back a property of the same name 
+    without underscore are listed under the property name.
+    Other private attributes, and callables, are omitted.
+    """
+    attributes = {}
+    objClass = type(obj)
+    for name, value in vars(obj).items():
+        if name.startswith('_'):
+            publicName = name[1:]
+            if not isinstance(getattr(objClass, publicName, None), property):
+                continue
+
+            value = getattr(obj, publicName)
+            name = publicName
+        if callable(value):
+            continue
+
+        attributes[name] = value
+    return attributes
+
+
+def get_frozen_value(value):
+    """Return an immutable, interned copy of a model value."""
+    if isinstance(value, str):
+        if len(value) <= _INTERN_MAX_LENGTH:
+            return sys.intern(value)
+
+        return value
+
+    if isinstance(value, (list, tuple)):
+        return tuple(get_frozen_value(item) for item in value)
+
+    if isinstance(value, dict):
+        return ReadOnlyDict((get_frozen_value(key), get_frozen_value(item)) for key, item in value.items())
+
+    if isinstance(value, set):
+        return frozenset(get_frozen_value(item) for item in value)
+
+    return value
+
+
+class SnapshotTable(Mapping):
+    """Immutable column store of all elements of one kind, e.g. all sections.
+
+    Each attribute is a column with one value per element. 
+    Integer columns are arrays; lists of element IDs of another table 
+    are stored as arrays of row indexes; the section content is 
+    compressed, and decoded on access.
+    The table is a mapping from element IDs to SnapshotElement views,
+    so it can replace a dictionary of Novel elements.
+
+    Public methods:
+        get_attribute(element, index, name) -- return an attribute of a row.
+        get_id(index) -- return the ID of a row.
+        get_index(eId) -- return the row of an element ID.
+        link_relations(tables, relations) -- replace ID lists by row indexes.
+    """
+
+    def __init__(self, elements):
+        """Build the columns.
+        
+        Positional arguments:
+            elements: dict -- model elements with IDs as keys.
+        """
+        self._ids = tuple(sys.intern(eId) for eId in elements)
+        self._indexes = {eId: i for i, eId in enumerate(self._ids)}
+        self._elementClass = None
+        self._relations = {}
+        # key: column name; value: SnapshotTable of the related elements
+
+        rows = []
+        for element in elements.values():
+            if self._elementClass is None:
+                self._elementClass = type(element)
+            rows.append(get_public_attributes(element))
+        names = []
+        for row in rows:
+            for name in row:
+                if name not in names:
+                    names.append(name)
+        self._columns = {}
+        for name in names:
+            values = [row.get(name, None) for row in rows]
+            if name in _COMPRESSED_ATTRIBUTES:
+                self._columns[name] = [
+                    None if value is None else zlib.compress(value.encode('utf-8'), 1)
+                    for value in values
+                    ]
+            elif values and all(type(value) is int for value in values):
+                self._columns[name] = array('q', values)
+            else:
+                self._columns[name] = [get_frozen_value(value) for value in values]
+
+    def __getitem__(self, eId):
+        return SnapshotElement(self, self._indexes[eId])
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get_attribute(self, element, index, name):
+        """Return an attribute of a row.
+        
+        Positional arguments:
+            element: SnapshotElement -- the view asking.
+            index: int -- the row.
+            name: str -- attribute name; the name of the private attribute 
+                  behind a property is accepted, too.
+        
+        Methods of the original element class are bound to the view.
+        Raise AttributeError if the attribute does not exist.
+        """
+        column = self._columns.get(name, None)
+        if column is None and name.startswith('_'):
+            name = name[1:]
+            column = self._columns.get(name, None)
+        if column is not None:
+            value = column[index]
+            if name in _COMPRESSED_ATTRIBUTES:
+                if value is None:
+                    return None
+
+                return zlib.decompress(value).decode('utf-8')
+
+            relatedTable = self._relations.get(name, None)
+            if relatedTable is not None and value is not None:
+                return [relatedTable.get_id(i) for i in value]
+
+            return value
+
+        method = getattr(self._elementClass, name, None)
+        if callable(method) and not name.startswith('__'):
+            return MethodType(method, element)
+
+        raise AttributeError(f'Snapshot element has no attribute "{name}".')
+
+    def get_id(self, index):
+        """Return the element ID of a row."""
+        return self._ids[index]
+
+    def get_index(self, eId):
+        """Return the row of an element ID. Raise KeyError if the ID is unknown."""
+        return self._indexes[eId]
+
+    def link_relations(self, tables, relations):
+        """Replace the columns of element ID lists by arrays of row indexes.
+        
+        Positional arguments:
+            tables: dict -- SnapshotTable instances with the Novel attribute names as keys.
+            relations: dict -- related table names with the column names as keys.
+        
+        A column is converted only if all its IDs exist in the related table.
+        """
+        for name, tableName in relations.items():
+            column = self._columns.get(name, None)
+            relatedTable = tables.get(tableName, None)
+            if column is None or relatedTable is None or isinstance(column, array):
+                continue
+
+            try:
+                self._columns[name] = [
+                    None if value is None else array('l', (relatedTable.get_index(eId) for eId in value))
+                    for value in column
+                    ]
+            except (KeyError, TypeError):
+                continue
+
+            self._relations[name] = relatedTable
@@ -0,0 +1,54 @@
+"""Provide a class for the immutable element tree of a NovelSnapshot.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import sys
+
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import PL_ROOT
+from nvlib.novx_globals import PN_ROOT
+
+
+class SnapshotTree:
+    """Read-only copy of a novel tree with the children as tuples of interned IDs.
+
+    Public methods:
+        get_children(parentId) -- return the IDs of a node's children.
+    """
+    ROOTS = (CH_ROOT, CR_ROOT, LC_ROOT, IT_ROOT, PL_ROOT, PN_ROOT)
+    # The chapter and plot line nodes have children, too.
+
+    def __init__(self, tree):
+        """Copy the tree structure.
+        
+        Positional arguments:
+            tree: NvTree -- the novel's tree.
+        """
+        self._children = {}
+        for rootId in self.ROOTS:
+            children = self._copy_children(tree, rootId)
+            if rootId in (CH_ROOT, PL_ROOT):
+                for parentId in children:
+                    self._copy_children(tree, parentId)
+
+    def get_children(self, parentId):
+        """Return a tuple with the IDs of a node's children, in tree order.
+        
+        Positional arguments:
+            parentId: str -- ID of a root, chapter, or plot line.
+        """
+        return self._children.get(parentId, ())
+
+    def _copy_children(self, tree, parentId):
+        """Copy and return the children of a node."""
+        try:
+            children = tuple(sys.intern(childId) for childId in tree.get_children(parentId))
+        except (KeyError, AttributeError):
+            children = ()
+        self._children[parentId] = children
+        return children
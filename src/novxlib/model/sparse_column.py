@@ -0,0 +1,63 @@
+"""Provide a mapping class for a table column that stores only non-empty cells.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from collections.abc import Mapping
+
+
+class SparseColumn(Mapping):
+    """Column of a SparseGrid, keyed by row ID.
+    
+    Only the non-empty cells are stored. 
+    The keys are the IDs of all rows of the grid, so looking up, 
+    testing, and iterating are consistent: an empty cell of a known row 
+    reads as an empty string, and the column can replace 
+    a dense column dictionary of OdsReader.
+    Use iter_cells() to visit only the non-empty cells.
+
+    Public methods:
+        iter_cells() -- generate (row ID, text) tuples of the non-empty cells.
+        set_cell(rowId, text) -- store the text of a non-empty cell.
+    """
+
+    def __init__(self, rowIds, rowIdSet):
+        """Set the row IDs of the grid.
+        
+        Positional arguments:
+            rowIds: list of str -- the IDs of all rows in table order, shared with the grid.
+            rowIdSet: set -- the same IDs for lookup, shared with the grid.
+        """
+        self._rowIds = rowIds
+        self._rowIdSet = rowIdSet
+        self._cells = {}
+
+    def __contains__(self, rowId):
+        return rowId in self._rowIdSet
+
+    def __getitem__(self, rowId):
+        if rowId not in self._rowIdSet:
+            raise KeyError(rowId)
+
+        return self._cells.get(rowId, '')
+
+    def __iter__(self):
+        return iter(self._rowIds)
+
+    def __len__(self):
+        return len(self._rowIds)
+
+    def iter_cells(self):
+        """Generate (row ID, text) tuples of the non-empty cells in the order they were set."""
+        for rowId, text in self._cells.items():
+            yield rowId, text
+
+    def set_cell(self, rowId, text):
+        """Store the text of a non-empty cell.
+        
+        Positional arguments:
+            rowId: str -- ID of a row of the grid.
+            text: str -- cell text.
+        """
+        self._cells[rowId] = text
@@ -0,0 +1,85 @@
+"""Provide a class for a sparse table of cell texts.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.model.sparse_column import SparseColumn
+
+
+class SparseGrid:
+    """Table of cell texts that stores only the non-empty cells.
+    
+    The rows are identified by the text of the first column, 
+    the columns by the text of the first row.
+    Memory and time depend on the number of non-empty cells,
+    not on the number of rows times columns.
+
+    Public methods:
+        add_row(cells) -- add a row given as (column index, text) tuples.
+        get(rowId, title) -- return the text of a cell.
+        get_column_dict() -- return a column dictionary for OdsReader.
+        set_titles(titles) -- set the column titles.
+
+    Public instance variables:
+        titles: list of str -- the column titles.
+        rowIds: list of str -- the row IDs in table order.
+        cellCount: int -- number of non-empty cells added.
+    """
+
+    def __init__(self):
+        """Initialize instance variables."""
+        self.titles = []
+        self.rowIds = []
+        self.cellCount = 0
+        self._rowIdSet = set()
+        self._columns = {}
+        # key: column title; value: SparseColumn
+
+    def add_row(self, cells):
+        """Add a row, and return its ID.
+        
+        Positional arguments:
+            cells: list of (column index, text) tuples of the non-empty cells, 
+                   the first of them in column 0 with the row ID.
+        
+        Cells beyond the titled columns are ignored.
+        A row with the ID of a previous row overwrites its non-empty cells.
+        Return None, if the row has no ID.
+        """
+        if not cells or cells[0][0] != 0:
+            return None
+
+        rowId = cells[0][1].strip()
+        if rowId not in self._rowIdSet:
+            self.rowIds.append(rowId)
+            self._rowIdSet.add(rowId)
+        for column, text in cells:
+            if column < len(self.titles):
+                self._columns[self.titles[column]].set_cell(rowId, text)
+                self.cellCount += 1
+        return rowId
+
+    def get(self, rowId, title):
+        """Return the text of a cell; an empty string, if the cell is empty.
+        
+        Positional arguments:
+            rowId: str -- text of the first column.
+            title: str -- column title.
+        
+        Raise KeyError if the row or the column does not exist.
+        """
+        return self._columns[title][rowId]
+
+    def get_column_dict(self):
+        """Return a dictionary of SparseColumn instances with the column titles as keys."""
+        return self._columns
+
+    def set_titles(self, titles):
+        """Set the column titles, and create the columns.
+        
+        Positional arguments:
+            titles: list of str -- texts of the first row.
+        """
+        self.titles = [title.strip() for title in titles]
+        self._columns = {title: SparseColumn(self.rowIds, self._rowIdSet) for title in self.titles}
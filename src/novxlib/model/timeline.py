@@ -0,0 +1,253 @@
+"""Provide a class for batch computation of section times and character ages.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from array import array
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+UNKNOWN = -1
+# Array value for a missing date.
+
+
+class Timeline:
+    """Section dates and character ages of a novel, held in compact arrays.
+
+    All section dates, times, day offsets, and durations, 
+    and all character birth and death dates are parsed once.
+    Start and end times, and the characters' ages at the sections 
+    are then computed for whole blocks of sections × characters,
+    with NumPy if it is installed.
+    
+    Sections without a date, but with a day offset, are dated 
+    relative to the novel's reference date, if any.
+    Ages are full years at the section's start date.
+    A negative age indicates the full years since the character's death.
+
+    Public methods:
+        get_age(scId, crId) -- return a character's age at a section, or None.
+        get_ages(scIds=None, crIds=None) -- return a sections × characters list of ages.
+        get_duration(scId) -- return the duration of a section as timedelta.
+        get_end(scId) -- return the end of a section as datetime, or None.
+        get_start(scId) -- return the start of a section as datetime, or None.
+
+    Public instance variables:
+        sectionIds: list of str -- section IDs in tree order.
+        characterIds: list of str -- character IDs in tree order.
+        useNumpy: bool -- if True, compute the blocks with NumPy.
+    """
+
+    def __init__(self, novel, useNumpy=None):
+        """Parse the dates of all sections and characters.
+        
+        Positional arguments:
+            novel: Novel -- the novel to process.
+            
+        Optional arguments:
+            useNumpy: bool -- if False, compute without NumPy. Default: use NumPy, if installed.
+        """
+        if useNumpy is None:
+            useNumpy = numpy is not None
+        self.useNumpy = useNumpy and numpy is not None
+        referenceOrdinal = self._parse_date(getattr(novel, 'referenceDate', None))
+        self.sectionIds = []
+        self._sectionIndex = {}
+        self._startDays = array('l')
+        # Proleptic Gregorian ordinal of the start date, or UNKNOWN.
+
+        self._startSeconds = array('l')
+        # Seconds since midnight.
+
+        self._durations = array('l')
+        # Duration in seconds.
+
+        self._startDates = array('l')
+        # Start date as YYYYMMDD number, or UNKNOWN.
+
+        for chId in novel.tree.get_children(CH_ROOT):
+            for scId in novel.tree.get_children(chId):
+                section = novel.sections[scId]
+                self._sectionIndex[scId] = len(self.sectionIds)
+                self.sectionIds.append(scId)
+                startDay = self._parse_date(section.date)
+                if startDay == UNKNOWN and referenceOrdinal != UNKNOWN:
+                    dayOffset = self._parse_int(section.day, None)
+                    if dayOffset is not None:
+                        startDay = referenceOrdinal + dayOffset
+                self._startDays.append(startDay)
+                self._startDates.append(self._get_date_number(startDay))
+                self._startSeconds.append(self._parse_time(section.time))
+                self._durations.append(
+                    self._parse_int(section.lastsDays, 0) * 86400
+                    +self._parse_int(section.lastsHours, 0) * 3600
+                    +self._parse_int(section.lastsMinutes, 0) * 60
+                    )
+        self.characterIds = list(novel.tree.get_children(CR_ROOT))
+        self._characterIndex = {crId: i for i, crId in enumerate(self.characterIds)}
+        self._birthDates = array('l')
+        self._deathDates = array('l')
+        for crId in self.characterIds:
+            character = novel.characters[crId]
+            self._birthDates.append(self._get_date_number(self._parse_date(character.birthDate)))
+            self._deathDates.append(self._get_date_number(self._parse_date(character.deathDate)))
+        self._ageCache = None
+
+    def get_age(self, scId, crId):
+        """Return a character's age at a section, or None if unknown.
+        
+        Positional arguments:
+            scId: str -- section ID.
+            crId: str -- character ID.
+        
+        The first call computes the ages for all sections and characters.
+        """
+        if self._ageCache is None:
+            self._ageCache = self.get_ages()
+        return self._ageCache[self._sectionIndex[scId]][self._characterIndex[crId]]
+
+    def get_ages(self, scIds=None, crIds=None):
+        """Return the characters' ages at the sections as a list of rows.
+        
+        Optional arguments:
+            scIds: list of str -- section IDs of the rows. Default: all sections.
+            crIds: list of str -- character IDs of the columns. Default: all characters.
+        
+        Each row holds the ages of the characters at one section: 
+        full years since birth, negative full years since death, 
+        or None if a date is missing or the character is not born yet.
+        """
+        if scIds is None:
+            rows = range(len(self.sectionIds))
+        else:
+            rows = [self._sectionIndex[scId] for scId in scIds]
+        if crIds is None:
+            columns = range(len(self.characterIds))
+        else:
+            columns = [self._characterIndex[crId] for crId in crIds]
+        if self.useNumpy:
+            return self._get_ages_numpy(rows, columns)
+
+        births = [self._birthDates[i] for i in columns]
+        deaths = [self._deathDates[i] for i in columns]
+        ages = []
+        for i in rows:
+            now = self._startDates[i]
+            if now == UNKNOWN:
+                ages.append([None] * len(births))
+                continue
+
+            ages.append([
+                self._get_age(now, birth, death)
+                for birth, death in zip(births, deaths)
+                ])
+        return ages
+
+    def get_duration(self, scId):
+        """Return the duration of a section as timedelta.
+        
+        Positional arguments:
+            scId: str -- section ID.
+        """
+        return timedelta(seconds=self._durations[self._sectionIndex[scId]])
+
+    def get_end(self, scId):
+        """Return the end of a section as datetime, or None if the start is unknown.
+        
+        Positional arguments:
+            scId: str -- section ID.
+        """
+        start = self.get_start(scId)
+        if start is None:
+            return None
+
+        return start + self.get_duration(scId)
+
+    def get_start(self, scId):
+        """Return the start of a section as datetime, or None if the date is unknown.
+        
+        Positional arguments:
+            scId: str -- section ID.
+        """
+        i = self._sectionIndex[scId]
+        startDay = self._startDays[i]
+        if startDay == UNKNOWN:
+            return None
+
+        return datetime.fromordinal(startDay) + timedelta(seconds=self._startSeconds[i])
+
+    def _get_age(self, now, birth, death):
+        """Return the age for YYYYMMDD numbers; see get_ages()."""
+        if death != UNKNOWN and now > death:
+            return -((now - death) // 10000)
+
+        if birth == UNKNOWN or now < birth:
+            return None
+
+        return (now - birth) // 10000
+
+    def _get_ages_numpy(self, rows, columns):
+        """Return the ages of a block, computed with NumPy; see get_ages()."""
+        rows = numpy.asarray(rows, dtype=numpy.intp)
+        columns = numpy.asarray(columns, dtype=numpy.intp)
+        # The size of a C long differs between platforms.
+        dtype = numpy.dtype(f'i{self._startDates.itemsize}')
+        now = numpy.frombuffer(self._startDates, dtype=dtype).astype(numpy.int64)[rows][:, None]
+        births = numpy.frombuffer(self._birthDates, dtype=dtype).astype(numpy.int64)[columns][None,:]
+        deaths = numpy.frombuffer(self._deathDates, dtype=dtype).astype(numpy.int64)[columns][None,:]
+        ages = (now - births) // 10000
+        dead = (deaths != UNKNOWN) & (now > deaths)
+        ages = numpy.where(dead, -((now - deaths) // 10000), ages)
+        unknown = (now == UNKNOWN) | (~dead & ((births == UNKNOWN) | (now < births)))
+        ages = ages.astype(object)
+        ages[unknown] = None
+        return ages.tolist()
+
+    def _get_date_number(self, ordinal):
+        """Return a YYYYMMDD number for a date ordinal, so that date differences give full years."""
+        if ordinal == UNKNOWN:
+            return UNKNOWN
+
+        day = date.fromordinal(ordinal)
+        return day.year * 10000 + day.month * 100 + day.day
+
+    def _parse_date(self, isoDate):
+        """Return the ordinal of an ISO date string, or UNKNOWN."""
+        if not isoDate:
+            return UNKNOWN
+
+        try:
+            year, month, day = isoDate.split('-')
+            return date(int(year), int(month), int(day)).toordinal()
+        except ValueError:
+            return UNKNOWN
+
+    def _parse_int(self, text, default):
+        """Return an integer, or the default if the text is not a number."""
+        try:
+            return int(text)
+        except (ValueError, TypeError):
+            return default
+
+    def _parse_time(self, isoTime):
+        """Return the seconds since midnight of an ISO time string; 0 if missing."""
+        if not isoTime:
+            return 0
+
+        try:
+            parts = [int(part) for part in isoTime.split(':')]
+        except ValueError:
+            return 0
+
+        parts.extend([0] * (3 - len(parts)))
+        return parts[0] * 3600 + parts[1] * 60 + parts[2]
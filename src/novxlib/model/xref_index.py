@@ -0,0 +1,173 @@
+"""Provide a class for a novel's cross reference index.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import json
+import os
+
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+
+
+class XrefIndex:
+    """Inverted index of a novel's relations, built in a single pass.
+
+    The public instance variables are compatible with the 
+    CrossReferences class used by OdtWXref, so an XrefIndex 
+    can be shared by several writers of the same novel.
+    A batch export builds the index once and freezes it, so the 
+    writers that generate their cross references use it as it is.
+    An index that is not frozen is rebuilt on each generate_xref() call,
+    because the novel may have changed since. 
+
+    Public methods:
+        build(novel) -- build the index.
+        freeze() -- keep the index as it is until the next build.
+        generate_xref(novel) -- build the index, unless it is frozen.
+        read(filePath) -- load the index from a sidecar file.
+        write(filePath) -- save the index to a sidecar file.
+
+    Public instance variables:
+        frozen: bool -- if True, generate_xref() calls are ignored.
+        scnPerChr: dict -- list of section IDs per character ID.
+        scnPerLoc: dict -- list of section IDs per location ID.
+        scnPerItm: dict -- list of section IDs per item ID.
+        scnPerTag: dict -- list of section IDs per tag.
+        scnPerPlt: dict -- list of section IDs per plot line ID.
+        scnPerVpt: dict -- list of section IDs per viewpoint character ID.
+        chrPerTag: dict -- list of character IDs per tag.
+        locPerTag: dict -- list of location IDs per tag.
+        itmPerTag: dict -- list of item IDs per tag.
+        srtCharacters: list -- character IDs in tree order.
+        srtLocations: list -- location IDs in tree order.
+        srtItems: list -- item IDs in tree order.
+        srtTags: list -- all tags, sorted.
+        
+    The section lists are in tree order.
+    """
+    _ATTRIBUTES = (
+        'scnPerChr',
+        'scnPerLoc',
+        'scnPerItm',
+        'scnPerTag',
+        'scnPerPlt',
+        'scnPerVpt',
+        'chrPerTag',
+        'locPerTag',
+        'itmPerTag',
+        'srtCharacters',
+        'srtLocations',
+        'srtItems',
+        'srtTags',
+    )
+
+    def __init__(self):
+        """Initialize instance variables."""
+        self._clear()
+
+    def build(self, novel):
+        """Build the index, even if it is frozen.
+        
+        Positional arguments:
+            novel: Novel -- the novel to index.
+        """
+        self._clear()
+        tree = novel.tree
+        self.srtCharacters = list(tree.get_children(CR_ROOT))
+        self.srtLocations = list(tree.get_children(LC_ROOT))
+        self.srtItems = list(tree.get_children(IT_ROOT))
+        self.scnPerChr = {crId: [] for crId in self.srtCharacters}
+        self.scnPerLoc = {lcId: [] for lcId in self.srtLocations}
+        self.scnPerItm = {itId: [] for itId in self.srtItems}
+        self.scnPerVpt = {crId: [] for crId in self.srtCharacters}
+        self.scnPerPlt = {plId: [] for plId in novel.plotLines}
+        tags = set()
+        self._add_tags(novel.characters, self.srtCharacters, self.chrPerTag, tags)
+        self._add_tags(novel.locations, self.srtLocations, self.locPerTag, tags)
+        self._add_tags(novel.items, self.srtItems, self.itmPerTag, tags)
+        for chId in tree.get_children(CH_ROOT):
+            for scId in tree.get_children(chId):
+                section = novel.sections[scId]
+                characters = section.characters or []
+                for crId in characters:
+                    self.scnPerChr.setdefault(crId, []).append(scId)
+                if characters:
+                    self.scnPerVpt.setdefault(characters[0], []).append(scId)
+                for lcId in section.locations or []:
+                    self.scnPerLoc.setdefault(lcId, []).append(scId)
+                for itId in section.items or []:
+                    self.scnPerItm.setdefault(itId, []).append(scId)
+                for plId in getattr(section, 'scPlotLines', None) or []:
+                    self.scnPerPlt.setdefault(plId, []).append(scId)
+                for tag in section.tags or []:
+                    self.scnPerTag.setdefault(tag, []).append(scId)
+                    tags.add(tag)
+        self.srtTags = sorted(tags)
+
+    def freeze(self):
+        """Keep the index as it is, ignoring generate_xref() calls until build() is called."""
+        self.frozen = True
+
+    def generate_xref(self, novel):
+        """Build the index, unless it is frozen.
+        
+        Positional arguments:
+            novel: Novel -- the novel to index.
+        """
+        if not self.frozen:
+            self.build(novel)
+
+    def read(self, filePath):
+        """Load the index from a sidecar file.
+        
+        Positional arguments:
+            filePath: str -- path to the JSON sidecar file.
+            
+        The loaded index is not frozen, 
+        so the next generate_xref() call rebuilds it.
+        """
+        with open(filePath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self._clear()
+        for attribute in self._ATTRIBUTES:
+            setattr(self, attribute, data[attribute])
+
+    def write(self, filePath):
+        """Save the index to a sidecar file.
+        
+        Positional arguments:
+            filePath: str -- path to the JSON sidecar file.
+        """
+        data = {attribute: getattr(self, attribute) for attribute in self._ATTRIBUTES}
+        tempPath = f'{filePath}.tmp'
+        with open(tempPath, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tempPath, filePath)
+
+    def _add_tags(self, elements, elemIds, elemPerTag, tags):
+        """Add the tags of characters, locations, or items."""
+        for elemId in elemIds:
+            for tag in elements[elemId].tags or []:
+                elemPerTag.setdefault(tag, []).append(elemId)
+                tags.add(tag)
+
+    def _clear(self):
+        """Reset the index."""
+        self.frozen = False
+        self.scnPerChr = {}
+        self.scnPerLoc = {}
+        self.scnPerItm = {}
+        self.scnPerTag = {}
+        self.scnPerPlt = {}
+        self.scnPerVpt = {}
+        self.chrPerTag = {}
+        self.locPerTag = {}
+        self.itmPerTag = {}
+        self.srtCharacters = []
+        self.srtLocations = []
+        self.srtItems = []
+        self.srtTags = []
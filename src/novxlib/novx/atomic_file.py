@@ -0,0 +1,105 @@
+"""Provide functions for replacing files atomically.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+import shutil
+import uuid
+
+
+def backup_file(filePath):
+    """Keep the current content of a file as a ".bak" file, as the upstream writers do.
+    
+    Positional arguments:
+        filePath: str -- path to the file to be replaced.
+
+    The file is copied rather than moved, so it is never missing 
+    while the new content is written.
+    Return True if a backup was made, or False if the file does not exist.
+    Raise OSError in case of error.
+    """
+    if not os.path.isfile(filePath):
+        return False
+
+    backupPath = f'{filePath}.bak'
+    tempPath = get_temp_path(backupPath)
+    try:
+        shutil.copy2(filePath, tempPath)
+        os.replace(tempPath, backupPath)
+    except OSError:
+        remove_temp_file(tempPath)
+        raise
+
+    return True
+
+
+def get_temp_path(filePath):
+    """Return the path of a new temporary file next to a file, keeping its extension.
+    
+    Positional arguments:
+        filePath: str -- path to the file to be replaced.
+
+    The temporary file is not created, so writers that check for an existing file
+    behave as for a new one, and the file gets the default permissions when created.
+    """
+    fileName, extension = os.path.splitext(filePath)
+    return f'{fileName}.{uuid.uuid4().hex[:12]}.tmp{extension}'
+
+
+def fsync_file(filePath):
+    """Flush a file's data to the storage device.
+    
+    Positional arguments:
+        filePath: str -- path to the file.
+    """
+    fd = os.open(filePath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def remove_temp_file(tempPath):
+    """Remove a temporary file, ignoring errors."""
+    try:
+        os.remove(tempPath)
+    except OSError:
+        pass
+
+
+def replace_file(tempPath, filePath):
+    """Replace a file with a completely written temporary file.
+    
+    Positional arguments:
+        tempPath: str -- path to the temporary file in the same directory.
+        filePath: str -- path to the file to be replaced.
+    
+    The temporary file gets the permission bits of the file it replaces;
+    a new file keeps the default permissions it was created with.
+    The temporary file is flushed to the disk before the rename, 
+    so after a crash the file has either the old or the new content.
+    Where possible, the directory entry is flushed as well.
+    """
+    if os.path.isfile(filePath):
+        try:
+            shutil.copymode(filePath, tempPath)
+        except OSError:
+            pass
+    fsync_file(tempPath)
+    os.replace(tempPath, filePath)
+    if os.name == 'nt':
+        return
+
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(filePath)), os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
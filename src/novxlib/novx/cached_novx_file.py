@@ -0,0 +1,135 @@
+"""Provide a novx file class that uses the persistent project cache.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.converter.phase_timer import WRITE_BACK
+from novxlib.model.element_hashes import get_changed_elements
+from novxlib.model.element_hashes import get_novel_hashes
+from novxlib.novx.atomic_file import backup_file
+from novxlib.novx.atomic_file import get_temp_path
+from novxlib.novx.atomic_file import remove_temp_file
+from novxlib.novx.atomic_file import replace_file
+from novxlib.novx.file_lock import get_file_lock
+from novxlib.novx.novx_cache import get_default_cache
+from nvlib.model.novx.novx_file import NovxFile
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+
+class CachedNovxFile(NovxFile):
+    """novx file representation with a persistent cache for the parsed novel.
+
+    The file is read under a shared lock, and written under an exclusive lock,
+    so concurrent converters never read a half-written project.
+    The file is written to a temporary file that replaces the project after success;
+    the previous project is kept as a ".bak" file, as the upstream NovxFile does.
+    With diffWrite, the element hashes are taken after reading, and compared before writing;
+    the file is only written if the novel has changed since.
+
+    Public instance variables:
+        projectCache: ProjectCache -- cache for the parsed novel.
+        cacheHit: bool -- True if the last read() got the novel from the cache.
+        lockTimeout: float -- maximum time in seconds to wait for a lock, or None to wait indefinitely.
+        diffWrite: bool -- if True, write() writes the file only if the novel has changed since read().
+        changedElements: dict -- with diffWrite, IDs of the elements changed since read(), grouped by parts.
+        phaseTimer: PhaseTimer -- if set, receives the time of the actual file writing as WRITE_BACK.
+        phaseContext: dict -- information added to the timing events.
+    """
+    phaseTimer = None
+    phaseContext = {}
+
+    def __init__(self, filePath, **kwargs):
+        """Initialize instance variables.
+        
+        Positional arguments:
+            filePath: str -- path to the novx file.
+            
+        Optional keyword arguments:
+            projectCache: ProjectCache -- if not set, use the default cache.
+            lockTimeout: float -- maximum time in seconds to wait for a lock.
+
+        Extends the superclass constructor.
+        """
+        super().__init__(filePath, **kwargs)
+        self.projectCache = kwargs.get('projectCache', None) or get_default_cache()
+        self.lockTimeout = kwargs.get('lockTimeout', None)
+        self.cacheHit = False
+        self.diffWrite = False
+        self.changedElements = None
+        self._readHashes = None
+
+    def read(self):
+        """Get the novel from the cache; parse the novx file only if the cache is outdated.
+        
+        Extends the superclass method.
+        """
+        with get_file_lock(self.filePath).shared(self.lockTimeout):
+            snapshot = self.projectCache.load(self.filePath)
+            self.cacheHit = snapshot is not None
+            if self.cacheHit:
+                self.novel, self.wcLog = snapshot
+            else:
+                # Take the fingerprint before parsing, in case a writer that ignores the lock saves meanwhile.
+                fingerprint = None
+                if self.projectCache.enabled:
+                    try:
+                        fingerprint = self.projectCache.get_fingerprint(self.filePath)
+                    except OSError:
+                        pass
+                super().read()
+                if fingerprint is not None:
+                    self.projectCache.store(self.filePath, self.novel, self.wcLog, fingerprint)
+        if self.diffWrite:
+            self._readHashes = get_novel_hashes(self.novel)
+        else:
+            self._readHashes = None
+
+    def write(self):
+        """Write the novx file atomically and drop the outdated snapshot.
+        
+        With diffWrite, skip writing if the novel has not changed since read().
+        Extends the superclass method.
+        """
+        if self._readHashes is not None:
+            novelHashes = get_novel_hashes(self.novel)
+            self.changedElements = get_changed_elements(self._readHashes, novelHashes)
+            if not self.changedElements:
+                return
+
+        if self.phaseTimer is None:
+            self._write_file()
+        else:
+            with self.phaseTimer.phase(WRITE_BACK, file=self.filePath, **self.phaseContext):
+                self._write_file()
+        if self._readHashes is not None:
+            self._readHashes = novelHashes
+
+    def _write_file(self):
+        """Write the novx file via a temporary file under the exclusive lock, keeping a backup."""
+        filePath = self.filePath
+        with get_file_lock(filePath).exclusive(self.lockTimeout):
+            self.projectCache.invalidate(filePath)
+            tempPath = get_temp_path(filePath)
+            self.filePath = tempPath
+            try:
+                # The superclass method does not back up the temporary file, because it does not exist yet.
+                super().write()
+                try:
+                    backup_file(filePath)
+                except OSError:
+                    raise Error(f'{_("Cannot overwrite file")}: "{norm_path(filePath)}".')
+
+                replace_file(tempPath, filePath)
+            except Error:
+                remove_temp_file(tempPath)
+                raise
+
+            except OSError:
+                remove_temp_file(tempPath)
+                raise Error(f'{_("Cannot write file")}: "{norm_path(filePath)}".')
+
+            finally:
+                self.filePath = filePath
@@ -0,0 +1,341 @@
+"""Provide a class for shared and exclusive locks on project files.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from contextlib import contextmanager
+import glob
+import json
+import os
+import socket
+import threading
+import time
+
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SHARED = 'shared'
+EXCLUSIVE = 'exclusive'
+LOCK_EXTENSION = '.lock'
+
+# Age in seconds after which an unreadable marker file is considered stale.
+_INCOMPLETE_MARKER_AGE = 10
+
+_fileLocks = {}
+_fileLocksLock = threading.Lock()
+
+
+def get_file_lock(filePath):
+    """Return the process wide FileLock instance for a file.
+
+    Positional arguments:
+        filePath: str -- path to the file to lock.
+    """
+    filePath = os.path.abspath(filePath)
+    with _fileLocksLock:
+        fileLock = _fileLocks.get(filePath, None)
+        if fileLock is None:
+            fileLock = FileLock(filePath)
+            _fileLocks[filePath] = fileLock
+    return fileLock
+
+
+def is_process_alive(pid):
+    """Return True if a process with the ID pid is running on this host."""
+    if pid <= 0:
+        return False
+
+    if os.name == 'nt':
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # Access denied means that the process exists.
+            return ctypes.GetLastError() == 5
+
+        try:
+            exitCode = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exitCode)):
+                return True
+
+            return exitCode.value == STILL_ACTIVE
+
+        finally:
+            kernel32.CloseHandle(handle)
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+
+    except PermissionError:
+        return True
+
+    return True
+
+
+class FileLock:
+    """Readers-writer lock on a file, across processes and threads.
+
+    Many readers can hold the shared lock at the same time,
+    while the exclusive lock excludes all other readers and writers.
+    The locks are held on a separate ".lock" file next to the file,
+    so the file itself can be replaced atomically while locked.
+
+    Where fcntl is available, flock() is used; the operating system
+    releases the locks of crashed processes. The last thread or process
+    releasing a lock removes the ".lock" file; a lock is only valid if the
+    locked file is still the one at the lock path, so waiters re-open
+    a lock file removed meanwhile. Only a crashed process can leave a lock file,
+    which does no harm and can be deleted.
+    Otherwise, lock marker files are created. A marker file records
+    the host name and the process ID, so markers left by crashed
+    processes on this host are detected and removed.
+
+    Locks are reentrant per thread: a thread holding the exclusive lock
+    may acquire it again, or acquire the shared lock.
+    Upgrading a shared lock to an exclusive one is not supported.
+
+    Public methods:
+        exclusive(timeout=None) -- context manager holding the exclusive lock.
+        shared(timeout=None) -- context manager holding a shared lock.
+
+    Public instance variables:
+        filePath: str -- absolute path to the locked file.
+        lockPath: str -- path to the lock file.
+        pollInterval: float -- seconds between two attempts to get a lock.
+        staleAge: float -- age in seconds after which marker files of other hosts are considered stale,
+                           or None to keep them.
+    """
+
+    def __init__(self, filePath, pollInterval=0.05, staleAge=None):
+        """Set the file to lock.
+
+        Positional arguments:
+            filePath: str -- path to the file to lock.
+
+        Optional arguments:
+            pollInterval: float -- seconds between two attempts to get a lock.
+            staleAge: float -- age in seconds after which marker files of other hosts are considered stale.
+        """
+        self.filePath = os.path.abspath(filePath)
+        self.lockPath = f'{self.filePath}{LOCK_EXTENSION}'
+        self.pollInterval = pollInterval
+        self.staleAge = staleAge
+        self._local = threading.local()
+
+    @contextmanager
+    def exclusive(self, timeout=None):
+        """Hold the exclusive lock on the file while the enclosed code runs.
+
+        Optional arguments:
+            timeout: float -- maximum waiting time in seconds. If None, wait indefinitely.
+
+        Raise the "Error" exception if the lock cannot be acquired.
+        """
+        self._acquire(EXCLUSIVE, timeout)
+        try:
+            yield self
+
+        finally:
+            self._release()
+
+    @contextmanager
+    def shared(self, timeout=None):
+        """Hold a shared lock on the file while the enclosed code runs.
+
+        Optional arguments:
+            timeout: float -- maximum waiting time in seconds. If None, wait indefinitely.
+
+        Raise the "Error" exception if the lock cannot be acquired.
+        """
+        self._acquire(SHARED, timeout)
+        try:
+            yield self
+
+        finally:
+            self._release()
+
+    def _acquire(self, mode, timeout):
+        """Acquire the lock in the given mode for the current thread."""
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            if mode == SHARED or self._local.mode == EXCLUSIVE:
+                self._local.depth = depth + 1
+                return
+
+            raise Error(f'{_("Cannot lock file")}: "{norm_path(self.filePath)}" (shared lock held).')
+
+        if timeout is None:
+            deadline = None
+        else:
+            deadline = time.monotonic() + timeout
+        try:
+            if fcntl is not None:
+                handle = self._acquire_flock(mode, deadline)
+            else:
+                handle = self._acquire_markers(mode, deadline)
+        except OSError as ex:
+            raise Error(f'{_("Cannot lock file")}: "{norm_path(self.filePath)}" ({str(ex)}).')
+
+        if handle is None:
+            raise Error(f'{_("Cannot lock file")}: "{norm_path(self.filePath)}" ({_("timeout")}).')
+
+        self._local.mode = mode
+        self._local.depth = 1
+        self._local.handle = handle
+
+    def _acquire_flock(self, mode, deadline):
+        """Lock the lock file with flock(); return the file descriptor, or None on timeout."""
+        if mode == EXCLUSIVE:
+            operation = fcntl.LOCK_EX
+        else:
+            operation = fcntl.LOCK_SH
+        while True:
+            fd = os.open(self.lockPath, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                while True:
+                    try:
+                        fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                        break
+
+                    except BlockingIOError:
+                        if self._is_timed_out(deadline):
+                            os.close(fd)
+                            return None
+
+                        time.sleep(self.pollInterval)
+                if self._is_lock_file(fd):
+                    return fd
+
+            except Exception:
+                os.close(fd)
+                raise
+
+            # The lock file was removed by the previous holder; lock the new one.
+            os.close(fd)
+
+    def _acquire_markers(self, mode, deadline):
+        """Create a lock marker file; return its path, or None on timeout.
+
+        A reader first announces itself, then backs off if there is a writer.
+        A writer first claims the exclusive marker, then waits for the readers to leave.
+        """
+        exclusivePath = f'{self.lockPath}.x'
+        while True:
+            if mode == SHARED:
+                markerPath = f'{self.lockPath}.s.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}'
+                self._write_marker(markerPath, os.O_CREAT | os.O_TRUNC)
+                if not self._is_locked(exclusivePath):
+                    return markerPath
+
+                os.remove(markerPath)
+            else:
+                try:
+                    self._write_marker(exclusivePath, os.O_CREAT | os.O_EXCL)
+                except FileExistsError:
+                    self._is_locked(exclusivePath)
+                else:
+                    while any(self._is_locked(path) for path in glob.glob(f'{glob.escape(self.lockPath)}.s.*')):
+                        if self._is_timed_out(deadline):
+                            os.remove(exclusivePath)
+                            return None
+
+                        time.sleep(self.pollInterval)
+                    return exclusivePath
+
+            if self._is_timed_out(deadline):
+                return None
+
+            time.sleep(self.pollInterval)
+
+    def _is_lock_file(self, fd):
+        """Return True if the open file is the current lock file."""
+        try:
+            return os.path.samestat(os.fstat(fd), os.stat(self.lockPath))
+        except FileNotFoundError:
+            return False
+
+    def _is_locked(self, markerPath):
+        """Return True if a marker file exists and is not stale; remove stale markers."""
+        try:
+            with open(markerPath, 'r', encoding='utf-8') as f:
+                marker = json.load(f)
+            if marker['host'] == socket.gethostname():
+                isStale = not is_process_alive(marker['pid'])
+            else:
+                isStale = self.staleAge is not None and time.time() - marker['time'] > self.staleAge
+        except FileNotFoundError:
+            return False
+
+        except (OSError, ValueError, KeyError, TypeError):
+            # The marker is being written, unless it was left incomplete long ago.
+            try:
+                isStale = time.time() - os.path.getmtime(markerPath) > _INCOMPLETE_MARKER_AGE
+            except OSError:
+                return False
+
+            if not isStale:
+                return True
+
+        if isStale:
+            try:
+                os.remove(markerPath)
+            except OSError:
+                pass
+            return False
+
+        return True
+
+    def _is_timed_out(self, deadline):
+        """Return True if the deadline has passed."""
+        return deadline is not None and time.monotonic() >= deadline
+
+    def _release(self):
+        """Release the lock of the current thread, unless it is held recursively."""
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+
+        handle = self._local.handle
+        self._local.handle = None
+        if fcntl is not None:
+            self._remove_lock_file(handle)
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            os.close(handle)
+        else:
+            try:
+                os.remove(handle)
+            except OSError:
+                pass
+
+    def _remove_lock_file(self, fd):
+        """Remove the lock file, if no other thread or process holds a lock on it.
+        
+        A shared lock is converted to an exclusive one for this;
+        if that fails, another reader holds the lock, and the file is kept.
+        """
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return
+
+        try:
+            os.remove(self.lockPath)
+        except OSError:
+            pass
+
+    def _write_marker(self, markerPath, flags):
+        """Write a lock marker file with the host, process, and time of the lock."""
+        fd = os.open(markerPath, os.O_WRONLY | flags, 0o666)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(dict(host=socket.gethostname(), pid=os.getpid(), time=time.time()), f)
@@ -0,0 +1,268 @@
+"""Provide a persistent cache for novels read from novx files.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import zlib
+
+_defaultCache = None
+
+
+def get_default_cache():
+    """Return the process wide ProjectCache instance."""
+    global _defaultCache
+    if _defaultCache is None:
+        _defaultCache = ProjectCache()
+    return _defaultCache
+
+
+def get_file_hash(filePath):
+    """Return the SHA-256 hex digest of the file's content.
+    
+    Positional arguments:
+        filePath: str -- path to the file.
+    """
+    fileHash = hashlib.sha256()
+    with open(filePath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            fileHash.update(chunk)
+    return fileHash.hexdigest()
+
+
+class ProjectCache:
+    """Persistent cache for the novels read from novx files.
+    
+    Each snapshot is a compressed pickle in the cache directory.
+    It is keyed by the absolute path of the novx file and 
+    validated against the file's size, modification time and content hash.
+    The least recently used snapshots are removed when the cache 
+    exceeds its maximum size.
+
+    The snapshots are unpickled, so anyone who can write to the cache directory
+    can run code in the converters. The cache directory is created accessible 
+    for the user only. On POSIX systems, snapshots are only loaded if the 
+    directory and the snapshot belong to the user and are not writable by others.
+    Disable the cache if the cache directory is shared, or cannot be protected.
+
+    Public methods:
+        get_fingerprint(filePath) -- return the size, modification time, and content hash of a file.
+        load(filePath) -- return a cached (novel, wcLog) tuple, or None.
+        store(filePath, novel, wcLog, fingerprint=None) -- save a snapshot of the novel.
+        invalidate(filePath) -- remove the snapshot of a file.
+        clear() -- remove all snapshots.
+
+    Public instance variables:
+        cacheDir: str -- path to the cache directory.
+        maxSize: int -- maximum total size of the snapshots in bytes.
+        enabled: bool -- if False, load() and store() do nothing.
+        
+    Class constants:
+        CACHE_VERSION: int -- snapshots with another version are discarded.
+        
+    The NOVXLIB_CACHE_DIR environment variable overrides the default cache directory.
+    Setting the NOVXLIB_NO_CACHE environment variable disables the cache by default.
+    """
+    CACHE_VERSION = 1
+    _EXTENSION = '.nvcache'
+
+    def __init__(self, cacheDir=None, maxSize=256 * 1024 * 1024, enabled=None):
+        """Set the cache location and limits.
+        
+        Optional arguments:
+            cacheDir: str -- path to the cache directory.
+            maxSize: int -- maximum total size of the snapshots in bytes.
+            enabled: bool -- if False, disable the cache. 
+        """
+        if cacheDir is None:
+            cacheDir = os.environ.get(
+                'NOVXLIB_CACHE_DIR',
+                os.path.join(os.path.expanduser('~'), '.novx', 'cache')
+                )
+        if enabled is None:
+            enabled = not os.environ.get('NOVXLIB_NO_CACHE')
+        self.cacheDir = cacheDir
+        self.maxSize = maxSize
+        self.enabled = enabled
+
+    def clear(self):
+        """Remove all snapshots."""
+        for entry in self._get_entries():
+            self._remove(entry.path)
+
+    def get_fingerprint(self, filePath):
+        """Return a dictionary with the size, modification time, and content hash of a file.
+        
+        Positional arguments:
+            filePath: str -- path to the novx file.
+        
+        Raise OSError if the file cannot be read.
+        """
+        fileStat = os.stat(filePath)
+        return dict(
+            size=fileStat.st_size,
+            mtime=fileStat.st_mtime_ns,
+            hash=get_file_hash(filePath),
+        )
+
+    def invalidate(self, filePath):
+        """Remove the snapshot of a file.
+        
+        Positional arguments:
+            filePath: str -- path to the novx file.
+        """
+        self._remove(self._get_snapshot_path(filePath))
+
+    def load(self, filePath):
+        """Return a cached (novel, wcLog) tuple, or None if there is no valid snapshot.
+        
+        Positional arguments:
+            filePath: str -- path to the novx file.
+
+        Invalid snapshots are removed.
+        """
+        if not self.enabled:
+            return None
+
+        snapshotPath = self._get_snapshot_path(filePath)
+        if not self._is_trusted(snapshotPath):
+            return None
+
+        try:
+            with open(snapshotPath, 'rb') as f:
+                header = pickle.load(f)
+                if not self._is_valid(header, filePath):
+                    raise ValueError
+
+                novel, wcLog = pickle.loads(zlib.decompress(pickle.load(f)))
+        except FileNotFoundError:
+            return None
+
+        except Exception:
+            # Snapshot is outdated, corrupted, or made by another library version.
+            self._remove(snapshotPath)
+            return None
+
+        # Mark the snapshot as recently used.
+        try:
+            os.utime(snapshotPath)
+        except OSError:
+            pass
+        return novel, wcLog
+
+    def store(self, filePath, novel, wcLog, fingerprint=None):
+        """Save a snapshot of a novel read from a novx file.
+        
+        Positional arguments:
+            filePath: str -- path to the novx file.
+            novel: Novel -- the novel read from the file.
+            wcLog: dict -- the word count log read from the file.
+        
+        Optional arguments:
+            fingerprint: dict -- the file's fingerprint taken before parsing, as returned by get_fingerprint().
+                         If the file is saved while it is parsed, the snapshot is thus outdated 
+                         from the start, and never loaded. If None, take the fingerprint now.
+        
+        Return True on success, otherwise False.
+        The cache is a performance aid, so errors are not raised. 
+        """
+        if not self.enabled:
+            return False
+
+        try:
+            if fingerprint is None:
+                fingerprint = self.get_fingerprint(filePath)
+            header = dict(
+                version=self.CACHE_VERSION,
+                path=os.path.abspath(filePath),
+                size=fingerprint['size'],
+                mtime=fingerprint['mtime'],
+                hash=fingerprint['hash'],
+            )
+            payload = zlib.compress(pickle.dumps((novel, wcLog), pickle.HIGHEST_PROTOCOL))
+            os.makedirs(self.cacheDir, mode=0o700, exist_ok=True)
+            fd, tempPath = tempfile.mkstemp(suffix='.tmp', dir=self.cacheDir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+                    pickle.dump(payload, f, pickle.HIGHEST_PROTOCOL)
+                os.replace(tempPath, self._get_snapshot_path(filePath))
+            except:
+                self._remove(tempPath)
+                raise
+
+        except Exception:
+            return False
+
+        self._evict()
+        return True
+
+    def _evict(self):
+        """Remove the least recently used snapshots until the cache fits maxSize."""
+        entries = sorted(self._get_entries(), key=lambda entry: entry.stat().st_mtime)
+        totalSize = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if totalSize <= self.maxSize:
+                break
+
+            totalSize -= entry.stat().st_size
+            self._remove(entry.path)
+
+    def _get_entries(self):
+        """Return a list of os.DirEntry objects for the snapshot files."""
+        try:
+            return [entry for entry in os.scandir(self.cacheDir) if entry.name.endswith(self._EXTENSION)]
+        except OSError:
+            return []
+
+    def _get_snapshot_path(self, filePath):
+        """Return the path of the snapshot file for a novx file."""
+        key = os.path.normcase(os.path.abspath(filePath))
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cacheDir, f'{name}{self._EXTENSION}')
+
+    def _is_trusted(self, snapshotPath):
+        """Return True if the snapshot and the cache directory can only be changed by the user.
+        
+        Ownership and permissions are only checked on POSIX systems.
+        """
+        if not hasattr(os, 'getuid'):
+            return True
+
+        for path in (self.cacheDir, snapshotPath):
+            try:
+                pathStat = os.stat(path)
+            except OSError:
+                return False
+
+            if pathStat.st_uid != os.getuid() or pathStat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+                return False
+
+        return True
+
+    def _is_valid(self, header, filePath):
+        """Return True if the snapshot header matches the current state of the novx file."""
+        if header.get('version') != self.CACHE_VERSION:
+            return False
+
+        if header.get('path') != os.path.abspath(filePath):
+            return False
+
+        fileStat = os.stat(filePath)
+        if header.get('size') != fileStat.st_size or header.get('mtime') != fileStat.st_mtime_ns:
+            return False
+
+        # Modification times may be too coarse to detect fast consecutive writes.
+        return header.get('hash') == get_file_hash(filePath)
+
+    def _remove(self, path):
+        """Remove a file, ignoring errors."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
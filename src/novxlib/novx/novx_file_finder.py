@@ -0,0 +1,25 @@
+"""Provide a function for finding novx files by paths, directories, and glob patterns.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import glob
+import os
+
+
+def find_novx_files(patterns):
+    """Return a sorted list of the novx files matching files, directories, or glob patterns.
+    
+    Positional arguments:
+        patterns: list of str -- novx file paths, directories to search recursively, 
+                  or glob patterns.
+    """
+    sourcePaths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '**', '*.novx')
+        for sourcePath in glob.iglob(pattern, recursive=True):
+            if sourcePath.endswith('.novx') and os.path.isfile(sourcePath):
+                sourcePaths.add(os.path.abspath(sourcePath))
+    return sorted(sourcePaths)
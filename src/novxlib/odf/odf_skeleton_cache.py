@@ -0,0 +1,176 @@
+"""Provide a cache for the static components of ODF packages.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from collections import OrderedDict
+import hashlib
+import io
+import os
+import sys
+import threading
+import zipfile
+
+_defaultCache = None
+
+
+def get_default_skeleton_cache():
+    """Return the process wide OdfSkeletonCache instance."""
+    global _defaultCache
+    if _defaultCache is None:
+        _defaultCache = OdfSkeletonCache()
+    return _defaultCache
+
+
+def get_zip_options(compression, compressLevel):
+    """Return a dictionary with the keyword arguments for zipfile.ZipFile().
+    
+    Positional arguments:
+        compression: int -- zipfile.ZIP_STORED or zipfile.ZIP_DEFLATED.
+        compressLevel: int -- deflate level from 0 to 9, or None for the default.
+    
+    The compression level is ignored on Python 3.6.
+    """
+    options = dict(compression=compression)
+    if compressLevel is not None and compression == zipfile.ZIP_DEFLATED and sys.version_info >= (3, 7):
+        options['compresslevel'] = compressLevel
+    return options
+
+
+class OdfSkeletonCache:
+    """In-memory cache of pre-compressed ODF package skeletons.
+
+    A skeleton is a zip archive with all package components 
+    except content.xml and meta.xml, with the mimetype first. 
+    It is looked up by the inputs of the document's _set_up() method:
+    the document class, the digest of its templates, and the novel's locale.
+    So a writer looks up its skeleton before setting up the package,
+    and only on a miss, _set_up() creates the static components, 
+    from which the skeleton is built.
+    Writers copy the skeleton, and append only the generated components, 
+    so the static components are neither created nor compressed again.
+    
+    Document classes whose _set_up() writes static components that depend 
+    on other data of the novel must not use the cache.
+
+    Public methods:
+        add_skeleton(key, odfFile) -- build a skeleton from a document that has been set up.
+        clear() -- remove all skeletons.
+        get_key(odfFile, compression, compressLevel) -- return the key of a document's skeleton.
+        get_skeleton(key) -- return the skeleton bytes, or None.
+
+    Public instance variables:
+        maxEntries: int -- maximum number of skeletons kept.
+
+    Class constants:
+        GENERATED_COMPONENTS: tuple -- package components that are written per document.
+    """
+    GENERATED_COMPONENTS = ('content.xml', 'meta.xml')
+
+    def __init__(self, maxEntries=64):
+        """Set the cache limit.
+        
+        Optional arguments:
+            maxEntries: int -- maximum number of skeletons kept.
+        """
+        self.maxEntries = maxEntries
+        self._skeletons = OrderedDict()
+        # key: (class, digest of the templates, language, country, compression, level); value: zip archive bytes
+
+        self._templateNames = {}
+        # key: document class; value: tuple of the template attribute names
+
+        self._lock = threading.Lock()
+
+    def add_skeleton(self, key, odfFile):
+        """Build a skeleton from the static components of a document, store it, and return its bytes.
+        
+        Positional arguments:
+            key -- key returned by get_key().
+            odfFile: OdfFile -- document object whose _set_up() method has
+                     created the package components in its temporary directory.
+        
+        Raise the "OSError" exception if a component cannot be read. 
+        """
+        __, __, __, __, compression, compressLevel = key
+        skeleton = self._build(odfFile, compression, compressLevel)
+        with self._lock:
+            self._skeletons[key] = skeleton
+            while len(self._skeletons) > self.maxEntries:
+                self._skeletons.popitem(last=False)
+        return skeleton
+
+    def clear(self):
+        """Remove all skeletons."""
+        with self._lock:
+            self._skeletons.clear()
+
+    def get_key(self, odfFile, compression=zipfile.ZIP_DEFLATED, compressLevel=None):
+        """Return the key of a document's skeleton.
+        
+        Positional arguments:
+            odfFile: OdfFile -- document object with the novel's locale checked.
+            
+        Optional arguments:
+            compression: int -- zipfile.ZIP_STORED or zipfile.ZIP_DEFLATED.
+            compressLevel: int -- deflate level from 0 to 9, or None for the default.
+        
+        The templates are the document's string attributes with upper case names, 
+        e.g. "_STYLES_XML", and the list of package components, 
+        so templates changed at runtime result in a new skeleton.
+        """
+        digest = hashlib.sha256()
+        for name in self._get_template_names(type(odfFile)):
+            value = getattr(odfFile, name)
+            if not isinstance(value, str):
+                value = repr(value)
+            digest.update(f'{name}\0{len(value)}\0{value}'.encode('utf-8'))
+        return (
+            type(odfFile),
+            digest.digest(),
+            odfFile.novel.languageCode,
+            odfFile.novel.countryCode,
+            compression,
+            compressLevel,
+            )
+
+    def get_skeleton(self, key):
+        """Return the skeleton bytes for a key returned by get_key(), or None if there is none."""
+        with self._lock:
+            skeleton = self._skeletons.get(key, None)
+            if skeleton is not None:
+                self._skeletons.move_to_end(key)
+            return skeleton
+
+    def _build(self, odfFile, compression, compressLevel):
+        """Return a new skeleton from the static components in the document's temporary directory."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', **get_zip_options(compression, compressLevel)) as skeleton:
+            for component in self._get_static_components(odfFile):
+                componentPath = os.path.join(odfFile._tempDir, component)
+                if component == 'mimetype':
+                    skeleton.write(componentPath, component, compress_type=zipfile.ZIP_STORED)
+                else:
+                    skeleton.write(componentPath, component)
+        return buffer.getvalue()
+
+    def _get_static_components(self, odfFile):
+        """Return a list of the document's static components, with the mimetype first."""
+        components = sorted(odfFile._ODF_COMPONENTS, key=lambda component: component != 'mimetype')
+        return [component for component in components if component not in self.GENERATED_COMPONENTS]
+
+    def _get_template_names(self, odfClass):
+        """Return a tuple with the names of a document class's template attributes, e.g. "_STYLES_XML"."""
+        names = self._templateNames.get(odfClass, None)
+        if names is None:
+            names = []
+            for name in dir(odfClass):
+                if not name.startswith('_') or name.startswith('__') or not name.isupper():
+                    continue
+
+                if isinstance(getattr(odfClass, name), (str, list, tuple)):
+                    names.append(name)
+            names = tuple(names)
+            self._templateNames[odfClass] = names
+        return names
@@ -0,0 +1,442 @@
+"""Provide a base class for ODF writers that stream the document content.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from datetime import datetime
+from string import Template
+import os
+import time
+import zipfile
+
+from novxlib.converter.phase_timer import COMPRESS
+from novxlib.converter.phase_timer import RENDER_TARGET
+from novxlib.converter.phase_timer import WRITE_TO_DISK
+from novxlib.novx.atomic_file import backup_file
+from novxlib.novx.atomic_file import get_temp_path
+from novxlib.novx.atomic_file import remove_temp_file
+from novxlib.novx.atomic_file import replace_file
+from novxlib.odf.odf_skeleton_cache import get_default_skeleton_cache
+from novxlib.odf.odf_skeleton_cache import get_zip_options
+from nvlib.model.file.file_export import FileExport
+from nvlib.model.odf.odf_file import OdfFile
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import Notification
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+# Number of characters encoded at a time, if the memory budget is close to its limit.
+_CHUNK_SIZE = 1 << 20
+
+# Number of character, location, or item rows generated at a time.
+_ROWS_PER_PIECE = 100
+
+# FileExport method, tree root, XrefIndex list, heading, template, mapping method, and filter
+# of the characters, locations, and items.
+_ELEMENT_LISTS = (
+    (
+        '_get_characters', CR_ROOT, 'srtCharacters', '_characterSectionHeading',
+        '_characterTemplate', '_get_characterMapping', 'characterFilter',
+    ),
+    (
+        '_get_locations', LC_ROOT, 'srtLocations', '_locationSectionHeading',
+        '_locationTemplate', '_get_locationMapping', 'locationFilter',
+    ),
+    (
+        '_get_items', IT_ROOT, 'srtItems', '_itemSectionHeading',
+        '_itemTemplate', '_get_itemMapping', 'itemFilter',
+    ),
+)
+
+
+class OdfStreamWriter(OdfFile):
+    """OdfFile subclass that writes content.xml directly into the package.
+
+    The document content is generated piecewise by _iter_text()
+    and compressed into the zip entry as it is generated,
+    so the complete content.xml is never held in memory.
+    The package is written to a temporary file that is flushed to the disk,
+    and replaces the target file only after success.
+    The static package components are copied pre-compressed from an OdfSkeletonCache,
+    which looks them up by the inputs of the OdfFile._set_up() method.
+    Only if the skeleton is not cached, _set_up() creates the package components,
+    so usually only meta.xml and content.xml are generated and compressed.
+    While content.xml is written, the progress can be reported after each chapter,
+    and the conversion can be canceled; then the target file remains unchanged.
+    If a memory budget is close to its limit, large texts are encoded and compressed
+    in chunks, and the section content can be released after each chapter.
+
+    Public methods:
+        write() -- write the ODF package.
+    
+    Public instance variables:
+        phaseTimer: PhaseTimer -- if set, receives the phase times of write().
+        phaseContext: dict -- information added to the timing events.
+        compression: int -- zipfile.ZIP_DEFLATED, or zipfile.ZIP_STORED for fast, uncompressed packages.
+        compressLevel: int -- deflate level from 0 to 9, or None for the default.
+        useSkeletonCache: bool -- if False, create the static components for each package.
+        progress -- if set, function called after each chapter with a progress dictionary.
+                    It is called from the writing thread.
+        cancelEvent: threading.Event -- if set, the writing is canceled by raising
+                     a "Notification" exception.
+        memoryBudget: MemoryBudget -- if set, switch to lower-memory strategies close to its limit.
+        releaseContent: bool -- if True, release the content of the sections of each chapter
+                        after rendering it, close to the memory budget's limit. 
+                        Only for a novel that is discarded after writing.
+        xrefIndex: XrefIndex -- if set, the characters, locations, and items are taken 
+                   in tree order from this index of the novel, e.g. the one shared by a batch.
+    
+    The progress dictionary has the keys:
+        file -- path of the target file.
+        sections -- number of sections rendered.
+        totalSections -- number of sections of the novel.
+        bytes -- number of uncompressed content bytes written.
+
+    Stream classes list OdfStreamWriter after the document class, 
+    e.g. "class OdtWManuscriptStream(OdtWManuscript, OdfStreamWriter)".
+    Then OdfStreamWriter takes the place of OdfFile in the method resolution order,
+    so the write() methods of the document classes, e.g. OdtWriter collecting the languages, 
+    still run, and only the packaging is replaced.
+    Like OdfFile, it keeps the previous target file as a backup.
+    The chapters are generated one by one only if the document class 
+    does not override _get_text() or _get_chapters().
+    """
+    phaseTimer = None
+    phaseContext = {}
+    compression = zipfile.ZIP_DEFLATED
+    compressLevel = None
+    useSkeletonCache = True
+    progress = None
+    cancelEvent = None
+    memoryBudget = None
+    releaseContent = False
+    xrefIndex = None
+    _isSetUp = False
+
+    def write(self):
+        """Write the ODF package, streaming content.xml.
+
+        Return a message.
+        Raise the "Error" exception in case of error. 
+        Overrides the superclass method.
+        """
+        self._check_canceled()
+        self._phaseTimes = {RENDER_TARGET: 0.0, COMPRESS: 0.0, WRITE_TO_DISK: 0.0}
+        startTime = time.time()
+        startCounter = time.perf_counter()
+        skeletonCache = None
+        skeletonKey = None
+        skeleton = None
+        if self.useSkeletonCache:
+            # The skeleton is looked up by the inputs of _set_up(), which checks the locale first.
+            self.novel.check_locale()
+            skeletonCache = get_default_skeleton_cache()
+            skeletonKey = skeletonCache.get_key(self, self.compression, self.compressLevel)
+            skeleton = skeletonCache.get_skeleton(skeletonKey)
+        self._isSetUp = skeleton is None
+        if self._isSetUp:
+            # Create the package components except content.xml in the temporary directory.
+            self._set_up()
+            setUpCounter = time.perf_counter()
+            self._phaseTimes[WRITE_TO_DISK] += setUpCounter - startCounter
+            if skeletonCache is not None:
+                try:
+                    skeleton = skeletonCache.add_skeleton(skeletonKey, self)
+                except OSError:
+                    self._tear_down()
+                    raise Error(f'{_("Cannot create file")}: "{norm_path(self.filePath)}".')
+
+                self._phaseTimes[COMPRESS] += time.perf_counter() - setUpCounter
+        else:
+            self._phaseTimes[COMPRESS] += time.perf_counter() - startCounter
+        tempPath = get_temp_path(self.filePath)
+
+        try:
+            zipOptions = get_zip_options(self.compression, self.compressLevel)
+            if skeleton is None:
+                with zipfile.ZipFile(tempPath, 'w', **zipOptions) as odfTarget:
+                    self._write_components(odfTarget)
+            else:
+                with open(tempPath, 'wb') as f:
+                    f.write(skeleton)
+                with zipfile.ZipFile(tempPath, 'a', **zipOptions) as odfTarget:
+                    self._write_meta(odfTarget)
+                    self._write_content(odfTarget)
+            replaceCounter = time.perf_counter()
+            try:
+                backup_file(self.filePath)
+            except OSError:
+                raise Error(f'{_("Cannot overwrite file")}: "{norm_path(self.filePath)}".')
+
+            replace_file(tempPath, self.filePath)
+            self._phaseTimes[WRITE_TO_DISK] += time.perf_counter() - replaceCounter
+        except (Error, Notification):
+            remove_temp_file(tempPath)
+            raise
+
+        except Exception:
+            remove_temp_file(tempPath)
+            raise Error(f'{_("Cannot create file")}: "{norm_path(self.filePath)}".')
+
+        finally:
+            if self._isSetUp:
+                self._tear_down()
+            self._emit_phase_times(startTime)
+        return f'{_("File written")}: "{norm_path(self.filePath)}".'
+
+    def _check_canceled(self):
+        """Raise the "Notification" exception if the cancel event is set."""
+        if self.cancelEvent is not None and self.cancelEvent.is_set():
+            raise Notification(f'{_("Conversion canceled by the user")}: "{norm_path(self.filePath)}".')
+
+    def _emit_phase_times(self, startTime):
+        """Pass the accumulated phase times to the phase timer, if any."""
+        if self.phaseTimer is None:
+            return
+
+        for phase, duration in self._phaseTimes.items():
+            self.phaseTimer.emit_phase(phase, startTime, duration, **self.phaseContext)
+
+    def _inherits(self, methodName):
+        """Return True if the document class uses the FileExport method of that name."""
+        return getattr(type(self), methodName) is getattr(FileExport, methodName)
+
+    def _is_near_memory_limit(self):
+        """Return True if the memory budget is close to its limit."""
+        return self.memoryBudget is not None and self.memoryBudget.is_near_limit()
+
+    def _iter_chapters(self):
+        """Generate the XML of the chapters one by one.
+        
+        Follows the FileExport._get_chapters() logic, 
+        but does not collect the lines of all chapters.
+        Only used if the document class does not override _get_chapters().
+        """
+        chapterNumber = 0
+        sectionNumber = 0
+        wordsTotal = 0
+        charactersTotal = 0
+        for chId in self.novel.tree.get_children(CH_ROOT):
+            # The sections of filtered chapters count as processed.
+            self._sectionsRendered += len(self.novel.tree.get_children(chId))
+            if not self.chapterFilter.accept(self, chId):
+                continue
+
+            dispNumber = 0
+            chapter = self.novel.chapters[chId]
+            lines = []
+
+            # Generate the chapter heading.
+            # The order counts; be aware that "Todo" and "Notes" chapters are always unused.
+            template = None
+            if chapter.chType != 0:
+                if self._unusedChapterTemplate:
+                    template = Template(self._unusedChapterTemplate)
+            elif chapter.chLevel == 1 and self._partTemplate:
+                template = Template(self._partTemplate)
+            else:
+                template = Template(self._chapterTemplate)
+                chapterNumber += 1
+                dispNumber = chapterNumber
+            if template is not None:
+                lines.append(template.safe_substitute(self._get_chapterMapping(chId, dispNumber)))
+
+            # Generate the section entries.
+            sectionLines, sectionNumber, wordsTotal, charactersTotal = self._get_sections(
+                chId,
+                sectionNumber,
+                wordsTotal,
+                charactersTotal
+                )
+            lines.extend(sectionLines)
+
+            # Generate the chapter ending.
+            template = None
+            if chapter.chType != 0:
+                if self._unusedChapterEndTemplate:
+                    template = Template(self._unusedChapterEndTemplate)
+            elif self._chapterEndTemplate:
+                template = Template(self._chapterEndTemplate)
+            if template is not None:
+                lines.append(template.safe_substitute(self._get_chapterMapping(chId, dispNumber)))
+            yield ''.join(lines)
+
+            self._release_sections(chId)
+
+    def _iter_document(self):
+        """Generate the document content piecewise, one chapter or a number of rows at a time.
+        
+        Document classes that change the text generation are rendered in one piece.
+        """
+        if not self._inherits('_get_text'):
+            yield self._get_text()
+            return
+
+        yield ''.join(self._get_fileHeader())
+        if self._inherits('_get_chapters'):
+            for text in self._iter_chapters():
+                yield text
+
+        else:
+            yield ''.join(self._get_chapters())
+
+        for elementList in _ELEMENT_LISTS:
+            for text in self._iter_elements(*elementList):
+                yield text
+
+        yield ''.join(self._get_fileFooter())
+
+    def _iter_elements(self, methodName, rootId, indexList, headingName, templateName, mappingName, filterName):
+        """Generate the XML of the characters, locations, or items, a number of rows at a time.
+        
+        Follows the FileExport._get_characters() logic, taking the element IDs 
+        from the XrefIndex, if any.
+        Document classes that override the FileExport method are rendered in one piece.
+        """
+        if not self._inherits(methodName):
+            yield ''.join(getattr(self, methodName)())
+            return
+
+        lines = []
+        heading = getattr(self, headingName, '')
+        if heading:
+            lines.append(heading)
+        template = Template(getattr(self, templateName))
+        get_mapping = getattr(self, mappingName)
+        elementFilter = getattr(self, filterName)
+        if self.xrefIndex is None:
+            elemIds = self.novel.tree.get_children(rootId)
+        else:
+            elemIds = getattr(self.xrefIndex, indexList)
+        for elemId in elemIds:
+            if not elementFilter.accept(self, elemId):
+                continue
+
+            lines.append(template.safe_substitute(get_mapping(elemId)))
+            if len(lines) >= _ROWS_PER_PIECE:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+    def _iter_text(self):
+        """Generate the content.xml text.
+        
+        This default generates the whole text in one piece. 
+        Subclasses may return self._iter_document() instead.
+        """
+        yield self._get_text()
+
+    def _release_sections(self, chId):
+        """Release the content of a rendered chapter's sections, if permitted and close to the memory limit."""
+        if not self.releaseContent or not self._is_near_memory_limit():
+            return
+
+        for scId in self.novel.tree.get_children(chId):
+            self.novel.sections[scId].sectionContent = None
+
+    def _report_progress(self, totalSections, byteCount):
+        """Pass a progress dictionary to the progress function, if any."""
+        if self.progress is None:
+            return
+
+        self.progress(dict(
+            file=self.filePath,
+            sections=min(self._sectionsRendered, totalSections),
+            totalSections=totalSections,
+            bytes=byteCount,
+            ))
+
+    def _write_components(self, odfTarget):
+        """Add all package components to an open zip file.
+        
+        The mimetype file must be the first component and must not be compressed.
+        """
+        components = sorted(self._ODF_COMPONENTS, key=lambda component: component != 'mimetype')
+        for component in components:
+            if component == 'content.xml':
+                self._write_content(odfTarget)
+                continue
+
+            startCounter = time.perf_counter()
+            if component == 'mimetype':
+                odfTarget.write(os.path.join(self._tempDir, component), component, compress_type=zipfile.ZIP_STORED)
+            else:
+                odfTarget.write(os.path.join(self._tempDir, component), component)
+            self._phaseTimes[COMPRESS] += time.perf_counter() - startCounter
+
+    def _write_content(self, odfTarget):
+        """Compress the generated content.xml text into the zip file.
+        
+        Check for cancellation and report the progress after each piece of text.
+        """
+        self._sectionsRendered = 0
+        totalSections = 0
+        if self.progress is not None:
+            for chId in self.novel.tree.get_children(CH_ROOT):
+                totalSections += len(self.novel.tree.get_children(chId))
+        byteCount = 0
+        with odfTarget.open('content.xml', 'w') as f:
+            texts = self._iter_text()
+            while True:
+                startCounter = time.perf_counter()
+                text = next(texts, None)
+                renderCounter = time.perf_counter()
+                self._phaseTimes[RENDER_TARGET] += renderCounter - startCounter
+                if text is None:
+                    break
+
+                byteCount += self._write_text(f, text)
+                self._phaseTimes[COMPRESS] += time.perf_counter() - renderCounter
+                self._check_canceled()
+                self._report_progress(totalSections, byteCount)
+        if self._sectionsRendered != totalSections:
+            # Texts not generated chapter by chapter contain all sections.
+            self._sectionsRendered = totalSections
+            self._report_progress(totalSections, byteCount)
+
+    def _write_meta(self, odfTarget):
+        """Compress meta.xml into the zip file.
+        
+        If the package has not been set up, because the skeleton was cached,
+        meta.xml is generated here, following the OdfFile._set_up() logic.
+        """
+        startCounter = time.perf_counter()
+        if self._isSetUp:
+            odfTarget.write(os.path.join(self._tempDir, 'meta.xml'), 'meta.xml')
+        else:
+            metaMapping = dict(
+                Author=self.novel.authorName,
+                Title=self.novel.title,
+                Summary=f'<![CDATA[{self.novel.desc}]]>',
+                Datetime=datetime.today().replace(microsecond=0).isoformat(),
+            )
+            text = Template(self._META_XML).safe_substitute(metaMapping)
+            renderCounter = time.perf_counter()
+            self._phaseTimes[RENDER_TARGET] += renderCounter - startCounter
+            odfTarget.writestr('meta.xml', text.encode('utf-8'))
+            startCounter = renderCounter
+        self._phaseTimes[COMPRESS] += time.perf_counter() - startCounter
+
+    def _write_text(self, f, text):
+        """Encode a text into an open zip entry, and return the number of bytes written.
+        
+        Close to the memory limit, large texts are encoded in chunks,
+        so the encoded copy of the whole text is never held in memory.
+        """
+        if len(text) <= _CHUNK_SIZE or not self._is_near_memory_limit():
+            data = text.encode('utf-8')
+            f.write(data)
+            return len(data)
+
+        byteCount = 0
+        for start in range(0, len(text), _CHUNK_SIZE):
+            data = text[start:start + _CHUNK_SIZE].encode('utf-8')
+            f.write(data)
+            byteCount += len(data)
+        return byteCount
@@ -0,0 +1,74 @@
+"""Provide functions for adding columns to the templates of an ODS writer.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import re
+from xml.sax.saxutils import escape
+
+# FileExport section templates.
+SECTION_TEMPLATES = (
+    '_sectionTemplate',
+    '_firstSectionTemplate',
+    '_appendedSectionTemplate',
+    '_unusedSectionTemplate',
+    '_stage1Template',
+    '_stage2Template',
+)
+
+_ROW_END = '</table:table-row>'
+_CELL_START = re.compile(r'<table:table-cell((?:\s+[\w:-]+="[^"]*")*)\s*/?>')
+_REPEATED = re.compile(r'\s+table:number-columns-(?:repeated|spanned)="[^"]*"')
+_COLUMN = re.compile(r'<table:table-column(?:\s+[\w:-]+="[^"]*")*\s*/>')
+
+
+def add_cells(template, names):
+    """Return a row template with a text cell for each placeholder name appended.
+    
+    Positional arguments:
+        template: str -- template of a table row.
+        names: list of str -- placeholder names.
+    
+    A template without a complete table row is returned unchanged.
+    """
+    position = template.rfind(_ROW_END)
+    if position < 0:
+        return template
+
+    cells = ''.join(
+        f'<table:table-cell office:value-type="string"><text:p>${name}</text:p></table:table-cell>'
+        for name in names
+        )
+    return f'{template[:position]}{cells}{template[position:]}'
+
+
+def add_titles(header, titles):
+    """Return a table header with a column for each title appended.
+    
+    Positional arguments:
+        header: str -- XML text from the start of the document to the end of the title row.
+        titles: list of str -- column titles.
+    
+    The title cells get the attributes of the last title cell.
+    A header without a title row is returned unchanged.
+    """
+    position = header.rfind(_ROW_END)
+    rowStart = header.rfind('<table:table-row', 0, position)
+    if position < 0 or rowStart < 0:
+        return header
+
+    attributes = ''
+    for match in _CELL_START.finditer(header, rowStart, position):
+        attributes = _REPEATED.sub('', match.group(1))
+    cells = ''.join(
+        f'<table:table-cell{attributes}><text:p>{escape(title)}</text:p></table:table-cell>'
+        for title in titles
+        )
+    header = f'{header[:position]}{cells}{header[position:]}'
+    columns = list(_COLUMN.finditer(header, 0, rowStart))
+    if columns:
+        position = columns[-1].end()
+        newColumns = '<table:table-column table:default-cell-style-name="Default"/>' * len(titles)
+        header = f'{header[:position]}{newColumns}{header[position:]}'
+    return header
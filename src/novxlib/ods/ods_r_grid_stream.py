@@ -0,0 +1,16 @@
+"""Provide a class for ODS plot grid import with an incremental table parser.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.ods.ods_stream_reader import OdsStreamReader
+from nvlib.model.ods.ods_r_grid import OdsRGrid
+
+
+class OdsRGridStream(OdsRGrid, OdsStreamReader):
+    """ODS plot grid reader that decodes the table row by row.
+    
+    Only the non-empty cells of the grid are stored.
+    """
+    _SPARSE = True
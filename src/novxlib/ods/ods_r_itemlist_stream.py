@@ -0,0 +1,12 @@
+"""Provide a class for ODS item list import with an incremental table parser.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.ods.ods_stream_reader import OdsStreamReader
+from nvlib.model.ods.ods_r_itemlist import OdsRItemList
+
+
+class OdsRItemListStream(OdsRItemList, OdsStreamReader):
+    """ODS item list reader that decodes the table row by row."""
@@ -0,0 +1,112 @@
+"""Provide a base class for ODS readers with an incremental table parser.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import re
+
+from novxlib.model.sparse_grid import SparseGrid
+from novxlib.ods.ods_table_reader import OdsTableReader
+from nvlib.model.ods.ods_reader import OdsReader
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+
+class OdsStreamReader(OdsReader):
+    """Abstract ODS file reader that decodes the table row by row.
+    
+    Use as the second base class of an OdsReader subclass, e.g.
+    class OdsRCharListStream(OdsRCharList, OdsStreamReader), 
+    so that the subclass' read() method gets the column 
+    dictionary from this class instead of parsing the whole document tree.
+    
+    Subclasses for mostly empty tables can set _SPARSE to True.
+    Then the column dictionary holds SparseColumn instances 
+    that store only the non-empty cells.
+    
+    The table structure is checked with the first row, 
+    before the rest of the document is parsed.
+    """
+    _SPARSE = False
+
+    def read(self):
+        """Parse the ODS file incrementally and build the column dictionary.
+        
+        The first row contains the column titles.
+        Only rows whose first cell holds an element ID are considered.
+        Raise the "Error" exception in case of error. 
+        Overrides the superclass method.
+        """
+        self._columnDict = {}
+        idPattern = re.compile(f'^{re.escape(self._idPrefix)}[0-9]+$')
+        reader = OdsTableReader(self.filePath)
+        if self._SPARSE:
+            self._read_sparse(reader, idPattern)
+            return
+
+        titles = None
+        try:
+            for cells in reader.iter_rows():
+                if titles is None:
+                    titles = [title.strip() for title in cells]
+                    self._check_titles(titles)
+                    for title in titles:
+                        self._columnDict[title] = {}
+                    continue
+
+                elemId = cells[0].strip()
+                if not idPattern.match(elemId):
+                    continue
+
+                for i, title in enumerate(titles):
+                    if i < len(cells):
+                        self._columnDict[title][elemId] = cells[i]
+                    else:
+                        self._columnDict[title][elemId] = ''
+        except Error:
+            raise
+
+        except Exception:
+            raise Error(f'{_("Cannot read file")}: "{norm_path(self.filePath)}".')
+
+        if titles is None:
+            raise Error(f'{_("Wrong table content")}: "{norm_path(self.filePath)}".')
+
+    def _check_titles(self, titles):
+        """Check the column titles of the first row.
+        
+        Positional arguments:
+            titles: list of str -- the stripped texts of the first row.
+        
+        The first column must be "ID", and the non-empty titles must be unique,
+        so that each cell is assigned to exactly one column.
+        Raise the "Error" exception if the table has the wrong structure. 
+        """
+        namedTitles = [title for title in titles if title]
+        if not titles or titles[0] != 'ID' or len(set(namedTitles)) != len(namedTitles):
+            raise Error(f'{_("Wrong table content")}: "{norm_path(self.filePath)}".')
+
+    def _read_sparse(self, reader, idPattern):
+        """Build a column dictionary of SparseColumn instances."""
+        grid = SparseGrid()
+        rows = reader.iter_sparse_rows()
+        try:
+            header = next(rows, None)
+            titles = [''] * (header[-1][0] + 1) if header else []
+            for column, title in header or []:
+                titles[column] = title.strip()
+            self._check_titles(titles)
+            grid.set_titles(titles)
+
+            for cells in rows:
+                if cells[0][0] == 0 and idPattern.match(cells[0][1].strip()):
+                    grid.add_row(cells)
+        except Error:
+            raise
+
+        except Exception:
+            raise Error(f'{_("Cannot read file")}: "{norm_path(self.filePath)}".')
+
+        self._columnDict = grid.get_column_dict()
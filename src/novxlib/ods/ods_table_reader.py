@@ -0,0 +1,115 @@
+"""Provide a class for reading ODS table rows incrementally.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from xml.etree import ElementTree as ET
+import zipfile
+
+_TABLE_NS = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+_TEXT_NS = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+_TABLE = f'{{{_TABLE_NS}}}table'
+_ROW = f'{{{_TABLE_NS}}}table-row'
+_CELL = f'{{{_TABLE_NS}}}table-cell'
+_COVERED_CELL = f'{{{_TABLE_NS}}}covered-table-cell'
+_COLUMNS_REPEATED = f'{{{_TABLE_NS}}}number-columns-repeated'
+_ROWS_REPEATED = f'{{{_TABLE_NS}}}number-rows-repeated'
+_PARAGRAPH = f'{{{_TEXT_NS}}}p'
+
+
+class OdsTableReader:
+    """Incremental reader for the rows of the first table of an ODS document.
+    
+    content.xml is parsed with iterparse directly from the zip file,
+    and each row is discarded after it has been decoded.
+    Runs of repeated empty cells and rows, as LibreOffice writes them 
+    to fill a sheet, are not expanded.
+
+    Public methods:
+        iter_rows() -- generate the table rows as lists of cell texts.
+        iter_sparse_rows() -- generate the table rows as lists of non-empty (column index, text) tuples.
+        
+    Public instance variables:
+        filePath: str -- path to the ODS file.
+        maxColumns: int -- maximum number of cells per row, or None.
+    """
+
+    def __init__(self, filePath, maxColumns=None):
+        """Set the file to read.
+        
+        Positional arguments:
+            filePath: str -- path to the ODS file.
+            
+        Optional arguments:
+            maxColumns: int -- maximum number of cells per row.
+        """
+        self.filePath = filePath
+        self.maxColumns = maxColumns
+
+    def iter_rows(self):
+        """Generate the rows of the first table as lists of cell texts.
+        
+        Trailing empty cells are omitted, and empty rows are skipped.
+        Paragraphs within a cell are joined with newlines.
+        """
+        for cells in self.iter_sparse_rows():
+            row = []
+            for column, text in cells:
+                row.extend([''] * (column - len(row)))
+                row.append(text)
+            yield row
+
+    def iter_sparse_rows(self):
+        """Generate the rows of the first table as lists of (column index, cell text) tuples.
+        
+        Only non-empty cells are listed, so empty areas cost nothing.
+        Empty rows are skipped.
+        Paragraphs within a cell are joined with newlines.
+        """
+        with zipfile.ZipFile(self.filePath, 'r') as odfFile:
+            with odfFile.open('content.xml') as content:
+                elements = []
+                inTable = False
+                for event, element in ET.iterparse(content, events=('start', 'end')):
+                    if event == 'start':
+                        elements.append(element)
+                        if element.tag == _TABLE:
+                            inTable = True
+                        continue
+
+                    elements.pop()
+                    if element.tag == _TABLE:
+                        return
+
+                    if not inTable or element.tag != _ROW:
+                        continue
+
+                    cells = self._get_sparse_cells(element)
+                    repeat = int(element.get(_ROWS_REPEATED, 1))
+                    element.clear()
+                    if elements:
+                        elements[-1].remove(element)
+                    if cells:
+                        for __ in range(repeat):
+                            yield list(cells)
+
+    def _get_sparse_cells(self, row):
+        """Return a list of (column index, text) tuples for the non-empty cells of a row."""
+        cells = []
+        column = 0
+        for cell in row:
+            if cell.tag not in (_CELL, _COVERED_CELL):
+                continue
+
+            if self.maxColumns is not None and column >= self.maxColumns:
+                break
+
+            repeat = int(cell.get(_COLUMNS_REPEATED, 1))
+            text = '\n'.join(''.join(paragraph.itertext()) for paragraph in cell.iter(_PARAGRAPH))
+            if text:
+                if self.maxColumns is not None:
+                    repeat = min(repeat, self.maxColumns - column)
+                cells.extend((column + i, text) for i in range(repeat))
+            column += repeat
+        return cells
@@ -0,0 +1,98 @@
+"""Provide a class for ODS character list export that streams the rows.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.model.timeline import Timeline
+from novxlib.odf.odf_stream_writer import OdfStreamWriter
+from novxlib.ods.ods_columns import add_cells
+from novxlib.ods.ods_columns import add_titles
+from nvlib.model.ods.ods_w_charlist import OdsWCharList
+from nvlib.novx_globals import _
+
+
+class OdsWCharListStream(OdsWCharList, OdfStreamWriter):
+    """ODS character list writer that generates the rows a number at a time.
+    
+    The characters are taken in tree order from the batch's XrefIndex, if any.
+    The rows show no section relations, so the index's relation maps are not used.
+    
+    An age column is added with the character's ages at the first
+    and the last dated normal section the character appears in.
+    The ages of all characters at all sections are computed
+    in one block by a Timeline, before the rows are generated.
+    The character list reader ignores the added column.
+    """
+    _ages = None
+
+    def _get_ages(self):
+        """Return a dictionary of age texts by character ID."""
+        timeline = Timeline(self.novel)
+        columns = {crId: i for i, crId in enumerate(timeline.characterIds)}
+        scIds = [
+            scId for scId in timeline.sectionIds
+            if self.novel.sections[scId].scType == 0 and self.novel.sections[scId].characters
+            ]
+        firstAges = {}
+        lastAges = {}
+        for scId, ages in zip(scIds, timeline.get_ages(scIds)):
+            for crId in self.novel.sections[scId].characters:
+                if crId not in columns:
+                    continue
+
+                age = ages[columns[crId]]
+                if age is None or age < 0:
+                    continue
+
+                firstAges.setdefault(crId, age)
+                lastAges[crId] = age
+        ageTexts = {}
+        for crId, firstAge in firstAges.items():
+            if firstAge == lastAges[crId]:
+                ageTexts[crId] = str(firstAge)
+            else:
+                ageTexts[crId] = f'{firstAge}–{lastAges[crId]}'
+        return ageTexts
+
+    def _get_characterMapping(self, crId, *args, **kwargs):
+        """Return a mapping dictionary for a character, with its ages.
+        
+        Extends the superclass method.
+        """
+        characterMapping = super()._get_characterMapping(crId, *args, **kwargs)
+        if self._ages is not None:
+            characterMapping['TimelineAges'] = self._ages.get(crId, '')
+        return characterMapping
+
+    def _get_fileHeader(self):
+        """Return the file header with the title of the age column.
+        
+        Extends the superclass method.
+        """
+        header = ''.join(super()._get_fileHeader())
+        if self._ages is None:
+            return [header]
+
+        return [add_titles(header, (_('Age'),))]
+
+    def _iter_text(self):
+        """Generate the document content piecewise, with the age column.
+        
+        The character template is restored afterwards.
+        Overrides the superclass method.
+        """
+        self._ages = self._get_ages()
+        isInstanceVariable = '_characterTemplate' in self.__dict__
+        template = self._characterTemplate
+        self._characterTemplate = add_cells(template, ('TimelineAges',))
+        try:
+            for text in self._iter_document():
+                yield text
+
+        finally:
+            if isInstanceVariable:
+                self._characterTemplate = template
+            else:
+                del self._characterTemplate
+            self._ages = None
@@ -0,0 +1,150 @@
+"""Provide a class for ODS plot grid export with sparse cell runs.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import re
+
+from novxlib.odf.odf_stream_writer import OdfStreamWriter
+from novxlib.ods.ods_columns import SECTION_TEMPLATES
+from nvlib.model.ods.ods_w_grid import OdsWGrid
+
+# Table cell of a template that holds nothing but a placeholder.
+_PLACEHOLDER_CELL = re.compile(
+    r'<table:table-cell(?P<attributes>(?:\s+[\w:-]+="[^"]*")*)\s*>\s*'
+    r'<text:p>\$(?:(?P<name>\w+)|\{(?P<bracedName>\w+)\})</text:p>\s*'
+    r'</table:table-cell>'
+    )
+_VALUE_TYPE = re.compile(r'\s+office:value-type="[^"]*"')
+
+
+class OdsWGridStream(OdsWGrid, OdfStreamWriter):
+    """ODS plot grid writer that stores the empty areas as repeated cells.
+    
+    The sections × plot lines grid is mostly empty.
+    Before writing, each run of placeholder cells in the section templates
+    is replaced with a single placeholder. The cells of the run are then
+    rendered per section, writing each run of empty cells as a single element,
+    so size and compression time depend on the filled cells.
+    """
+    _cellRuns = {}
+
+    def _get_cell_run(self, cells, mapping):
+        """Return the XML of a run of placeholder cells for a section.
+        
+        Positional arguments:
+            cells: tuple of (attributes, empty cell attributes, placeholder name, template) tuples.
+            mapping: dict -- the section mapping.
+        
+        Consecutive empty cells with the same attributes are merged.
+        Cells with a placeholder missing in the mapping are left unchanged,
+        as Template.safe_substitute() does.
+        """
+        lines = []
+        emptyAttributes = None
+        emptyCount = 0
+        for attributes, cellEmptyAttributes, name, template in cells:
+            if name in mapping:
+                text = str(mapping[name])
+            else:
+                text = None
+            if text == '':
+                if emptyCount and cellEmptyAttributes != emptyAttributes:
+                    lines.append(self._get_empty_cells(emptyAttributes, emptyCount))
+                    emptyCount = 0
+                emptyAttributes = cellEmptyAttributes
+                emptyCount += 1
+                continue
+
+            if emptyCount:
+                lines.append(self._get_empty_cells(emptyAttributes, emptyCount))
+                emptyCount = 0
+            if text is None:
+                lines.append(template)
+            else:
+                lines.append(f'<table:table-cell{attributes}><text:p>{text}</text:p></table:table-cell>')
+        if emptyCount:
+            lines.append(self._get_empty_cells(emptyAttributes, emptyCount))
+        return ''.join(lines)
+
+    def _get_empty_cells(self, attributes, count):
+        """Return a single element for a number of empty cells."""
+        if count == 1:
+            return f'<table:table-cell{attributes}/>'
+
+        return f'<table:table-cell{attributes} table:number-columns-repeated="{count}"/>'
+
+    def _get_run_template(self, template):
+        """Return a section template with each run of placeholder cells replaced by a single placeholder.
+        
+        The cells of each run are stored in _cellRuns.
+        """
+        parts = []
+        run = []
+        position = 0
+        runStart = 0
+        for match in _PLACEHOLDER_CELL.finditer(template):
+            if run and template[position:match.start()].strip():
+                parts.append(self._get_run_placeholder(template, runStart, position, run))
+                run = []
+            if not run:
+                parts.append(template[position:match.start()])
+                runStart = match.start()
+            attributes = match.group('attributes')
+            name = match.group('name') or match.group('bracedName')
+            run.append((attributes, _VALUE_TYPE.sub('', attributes), name, match.group(0)))
+            position = match.end()
+        if run:
+            parts.append(self._get_run_placeholder(template, runStart, position, run))
+        parts.append(template[position:])
+        return ''.join(parts)
+
+    def _get_run_placeholder(self, template, start, end, run):
+        """Return the placeholder for a run of cells, or the template text for a single cell."""
+        if len(run) < 2:
+            return template[start:end]
+
+        run = tuple(run)
+        for key, cells in self._cellRuns.items():
+            if cells == run:
+                return f'${key}'
+
+        key = f'GridCellRun{len(self._cellRuns) + 1}'
+        self._cellRuns[key] = run
+        return f'${key}'
+
+    def _get_sectionMapping(self, scId, *args, **kwargs):
+        """Return a mapping dictionary for a section, with the rendered cell runs.
+        
+        Extends the superclass method.
+        """
+        sectionMapping = super()._get_sectionMapping(scId, *args, **kwargs)
+        for key, cells in self._cellRuns.items():
+            sectionMapping[key] = self._get_cell_run(cells, sectionMapping)
+        return sectionMapping
+
+    def _iter_text(self):
+        """Generate the content.xml text with the section templates' cell runs.
+        
+        The section templates are restored afterwards.
+        Overrides the superclass method.
+        """
+        self._cellRuns = {}
+        savedTemplates = []
+        for name in SECTION_TEMPLATES:
+            template = getattr(self, name, None)
+            if template:
+                savedTemplates.append((name, name in self.__dict__, template))
+                setattr(self, name, self._get_run_template(template))
+        try:
+            for text in self._iter_document():
+                yield text
+
+        finally:
+            for name, isInstanceVariable, template in savedTemplates:
+                if isInstanceVariable:
+                    setattr(self, name, template)
+                else:
+                    delattr(self, name)
+            self._cellRuns = {}
@@ -0,0 +1,23 @@
+"""Provide a class for ODS item list export that streams the rows.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.odf.odf_stream_writer import OdfStreamWriter
+from nvlib.model.ods.ods_w_itemlist import OdsWItemList
+
+
+class OdsWItemListStream(OdsWItemList, OdfStreamWriter):
+    """ODS item list writer that generates the rows a number at a time.
+
+    The items are taken in tree order from the batch's XrefIndex, if any.
+    The rows show no section relations, so the index's relation maps are not used.
+    """
+
+    def _iter_text(self):
+        """Generate the document content piecewise.
+        
+        Overrides the superclass method.
+        """
+        return self._iter_document()
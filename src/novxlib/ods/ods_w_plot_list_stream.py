@@ -0,0 +1,23 @@
+"""Provide a class for ODS plot list export that streams the content into the package.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.odf.odf_stream_writer import OdfStreamWriter
+from nvlib.model.ods.ods_w_plot_list import OdsWPlotList
+
+
+class OdsWPlotListStream(OdsWPlotList, OdfStreamWriter):
+    """ODS plot list writer that streams the content into the package.
+
+    Only the packaging is replaced; the table is generated
+    by the document class, which does not use the XrefIndex.
+    """
+
+    def _iter_text(self):
+        """Generate the document content piecewise.
+        
+        Overrides the superclass method.
+        """
+        return self._iter_document()
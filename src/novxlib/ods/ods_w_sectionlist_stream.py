@@ -0,0 +1,78 @@
+"""Provide a class for ODS section list export that streams the rows.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.model.timeline import Timeline
+from novxlib.odf.odf_stream_writer import OdfStreamWriter
+from novxlib.ods.ods_columns import SECTION_TEMPLATES
+from novxlib.ods.ods_columns import add_cells
+from novxlib.ods.ods_columns import add_titles
+from nvlib.model.ods.ods_w_sectionlist import OdsWSectionList
+from nvlib.novx_globals import _
+
+
+class OdsWSectionListStream(OdsWSectionList, OdfStreamWriter):
+    """ODS section list writer that generates the rows chapter by chapter.
+    
+    Start and end columns are added, taken from a Timeline that parses
+    the dates, times, and durations of all sections once per document.
+    Sections that only have a day are dated from the novel's reference date.
+    The section list reader ignores the added columns.
+    """
+    _timeline = None
+
+    def _get_date_time(self, dateTime):
+        """Return a datetime as text for a table cell; an empty string for None."""
+        if dateTime is None:
+            return ''
+
+        return dateTime.isoformat(sep=' ', timespec='minutes')
+
+    def _get_fileHeader(self):
+        """Return the file header with the titles of the timeline columns.
+        
+        Extends the superclass method.
+        """
+        header = ''.join(super()._get_fileHeader())
+        if self._timeline is None:
+            return [header]
+
+        return [add_titles(header, (_('Start'), _('End')))]
+
+    def _get_sectionMapping(self, scId, *args, **kwargs):
+        """Return a mapping dictionary for a section, with its start and end.
+        
+        Extends the superclass method.
+        """
+        sectionMapping = super()._get_sectionMapping(scId, *args, **kwargs)
+        if self._timeline is not None:
+            sectionMapping['TimelineStart'] = self._get_date_time(self._timeline.get_start(scId))
+            sectionMapping['TimelineEnd'] = self._get_date_time(self._timeline.get_end(scId))
+        return sectionMapping
+
+    def _iter_text(self):
+        """Generate the content.xml text with the timeline columns.
+        
+        The section templates are restored afterwards.
+        Overrides the superclass method.
+        """
+        self._timeline = Timeline(self.novel)
+        savedTemplates = []
+        for name in SECTION_TEMPLATES:
+            template = getattr(self, name, None)
+            if template:
+                savedTemplates.append((name, name in self.__dict__, template))
+                setattr(self, name, add_cells(template, ('TimelineStart', 'TimelineEnd')))
+        try:
+            for text in self._iter_document():
+                yield text
+
+        finally:
+            for name, isInstanceVariable, template in savedTemplates:
+                if isInstanceVariable:
+                    setattr(self, name, template)
+                else:
+                    delattr(self, name)
+            self._timeline = None
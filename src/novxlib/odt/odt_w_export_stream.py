@@ -0,0 +1,22 @@
+"""Provide a class for ODT export with constant memory usage.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.odf.odf_stream_writer import OdfStreamWriter
+from nvlib.model.odt.odt_w_export import OdtWExport
+
+
+class OdtWExportStream(OdtWExport, OdfStreamWriter):
+    """ODT novel file writer that streams the chapters into the package.
+
+    Export a non-reimportable manuscript with chapters and sections.
+    """
+
+    def _iter_text(self):
+        """Generate the document content one chapter at a time.
+        
+        Overrides the superclass method.
+        """
+        return self._iter_document()
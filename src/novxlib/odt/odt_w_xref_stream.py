@@ -0,0 +1,28 @@
+"""Provide a class for ODT cross reference export with the shared cross reference index.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from novxlib.odf.odf_stream_writer import OdfStreamWriter
+from nvlib.model.odt.odt_w_xref import OdtWXref
+
+
+class OdtWXrefStream(OdtWXref, OdfStreamWriter):
+    """ODT cross reference writer that can use the XrefIndex of a batch.
+
+    A frozen XrefIndex is used as it is, so the cross references 
+    are computed once per batch instead of once per writer.
+
+    Public instance variables:
+        xrefIndex: the cross references the document is generated from.
+    """
+
+    @property
+    def xrefIndex(self):
+        return self._xr
+
+    @xrefIndex.setter
+    def xrefIndex(self, xrefIndex):
+        if xrefIndex is not None:
+            self._xr = xrefIndex
@@ -0,0 +1,55 @@
+"""Maintain and query a full-text search index of novx files.
+
+usage: python -m novxlib.search [-h] --index DIR [--update PATH [PATH ...]] [--force] [--compact] [--limit N] [query]
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import argparse
+import sys
+
+from novxlib.novx.novx_file_finder import find_novx_files
+from novxlib.search.search_index import SearchIndex
+from nvlib.novx_globals import Error
+
+
+def main(args=None):
+    """Parse the command line, update the index, and print the matches. Return the exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m novxlib.search',
+        description='Search the chapters and sections of novx files via an on-disk index.'
+        )
+    parser.add_argument('query', nargs='?', help='words, "quoted phrases", and prefixes ending with *.')
+    parser.add_argument('--index', required=True, metavar='DIR', help='index directory.')
+    parser.add_argument('--update', nargs='+', metavar='PATH',
+                        help='novx files, directories to search recursively, or glob patterns to index.')
+    parser.add_argument('--force', action='store_true', help='re-read all projects given with --update.')
+    parser.add_argument('--compact', action='store_true', help='merge the index segments.')
+    parser.add_argument('--limit', type=int, default=None, metavar='N', help='maximum number of matches.')
+    options = parser.parse_args(args)
+    status = 0
+    try:
+        index = SearchIndex(options.index)
+    except Error as ex:
+        print(f'!{str(ex)}', file=sys.stderr)
+        return 1
+
+    try:
+        if options.update:
+            for message in index.update(find_novx_files(options.update), force=options.force).values():
+                if message.startswith('!'):
+                    print(message, file=sys.stderr)
+                    status = 1
+        if options.compact:
+            index.compact()
+        if options.query:
+            for filePath, chId, scId in index.search(options.query, options.limit):
+                print(f'{filePath}\t{chId}\t{scId or ""}')
+    finally:
+        index.close()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Provide a class for reading the searchable text of a novx file incrementally.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import hashlib
+from xml.etree import ElementTree as ET
+
+_FIELDS = ('Title', 'Desc', 'Notes', 'Content')
+
+
+class NovxTextReader:
+    """Incremental reader for the texts of the chapters and sections of a novx file.
+    
+    The file is parsed with iterparse, without building the novel,
+    and each chapter and section is discarded after its texts have been read.
+
+    Public methods:
+        iter_documents() -- generate a dictionary per chapter and section.
+        
+    Public instance variables:
+        filePath: str -- path to the novx file.
+        
+    Each document dictionary has the keys:
+        key -- section ID, or chapter ID for the chapter's own texts.
+        chapter -- chapter ID.
+        section -- section ID, or None for a chapter.
+        order -- position of the document in the book.
+        fields -- list of the title, description, notes, and content texts.
+        hash -- fingerprint of the texts and the document's chapter.
+    """
+
+    def __init__(self, filePath):
+        """Set the file to read.
+        
+        Positional arguments:
+            filePath: str -- path to the novx file.
+        """
+        self.filePath = filePath
+
+    def iter_documents(self):
+        """Generate a document dictionary per chapter and section, in book order.
+        
+        A chapter's document is generated after the documents of its sections.
+        Raise ET.ParseError or OSError in case of error.
+        """
+        elements = []
+        chapter = None
+        section = None
+        order = 0
+        for event, element in ET.iterparse(self.filePath, events=('start', 'end')):
+            if event == 'start':
+                elements.append(element)
+                if element.tag == 'CHAPTER':
+                    chapter = self._new_document(element.get('id'), None, order)
+                    order += 1
+                elif element.tag == 'SECTION' and chapter is not None:
+                    section = self._new_document(chapter['chapter'], element.get('id'), order)
+                    order += 1
+                continue
+
+            elements.pop()
+            if element.tag in _FIELDS and elements:
+                document = None
+                if elements[-1].tag == 'SECTION':
+                    document = section
+                elif elements[-1].tag == 'CHAPTER':
+                    document = chapter
+                if document is not None:
+                    document['fields'].append(' '.join(element.itertext()))
+                continue
+
+            if element.tag == 'SECTION' and section is not None:
+                yield self._finish_document(section)
+
+                section = None
+            elif element.tag == 'CHAPTER' and chapter is not None:
+                yield self._finish_document(chapter)
+
+                chapter = None
+            elif len(elements) != 1:
+                continue
+
+            # Discard the elements that have been read.
+            element.clear()
+            if elements:
+                elements[-1].remove(element)
+
+    def _finish_document(self, document):
+        """Add the fingerprint to a document, and return it."""
+        fingerprint = hashlib.sha1(f'{document["chapter"]}\0{document["section"]}'.encode('utf-8'))
+        for text in document['fields']:
+            fingerprint.update(b'\0')
+            fingerprint.update(text.encode('utf-8'))
+        document['hash'] = fingerprint.hexdigest()
+        return document
+
+    def _new_document(self, chId, scId, order):
+        """Return a new document dictionary."""
+        return dict(
+            key=scId or chId,
+            chapter=chId,
+            section=scId,
+            order=order,
+            fields=[],
+            hash=None,
+            )
@@ -0,0 +1,393 @@
+"""Provide a class for a full-text search index over novx files.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import heapq
+from itertools import groupby
+import json
+from operator import itemgetter
+import os
+import re
+from xml.etree import ElementTree as ET
+
+from novxlib.search.novx_text_reader import NovxTextReader
+from novxlib.search.search_segment import LEXICON_EXTENSION
+from novxlib.search.search_segment import POSTINGS_EXTENSION
+from novxlib.search.search_segment import SearchSegment
+from novxlib.search.search_segment import get_postings
+from novxlib.search.search_segment import get_tokens
+from novxlib.search.search_segment import write_segment
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+_QUERY_TERM = re.compile(r'"([^"]*)"|(\S+)')
+_PHRASE = 'phrase'
+_PREFIX = 'prefix'
+
+
+class SearchIndex:
+    """On-disk inverted index of the chapter and section texts of novx files.
+
+    Titles, descriptions, notes, and section contents are indexed.
+    The index directory holds a manifest and immutable segments.
+    Each update writes the changed documents to a new segment.
+    The documents they replace are dropped from the manifest, 
+    but remain in their segments as deleted documents until compact().
+    Documents are identified by their chapter or section ID, and
+    a document is re-indexed only if its fingerprint has changed.
+    Projects whose file date and size are unchanged are not parsed at all.
+
+    Queries consist of words, "quoted phrases", and prefixes ending with *.
+    All terms of a query must match the same chapter or section.
+
+    Public methods:
+        close() -- release the segments.
+        compact() -- merge all segments, dropping the deleted documents.
+        remove_project(filePath) -- remove a project from the index.
+        search(query, limit=None) -- return the chapters and sections matching a query.
+        update(filePaths, force=False) -- index new and changed projects.
+
+    Public instance variables:
+        indexDir: str -- path to the index directory.
+        maxSegments: int -- number of segments above which update() merges them.
+        segmentSize: int -- number of word positions per new segment.
+
+    Class constants:
+        MANIFEST: str -- file name of the manifest.
+    """
+    MANIFEST = 'index.json'
+
+    def __init__(self, indexDir, maxSegments=16, segmentSize=2000000):
+        """Open or create an index.
+
+        Positional arguments:
+            indexDir: str -- path to the index directory.
+
+        Optional arguments:
+            maxSegments: int -- number of segments above which update() merges them.
+            segmentSize: int -- number of word positions per new segment.
+
+        Raise the "Error" exception if the index cannot be read.
+        """
+        self.indexDir = indexDir
+        self.maxSegments = maxSegments
+        self.segmentSize = segmentSize
+        self._liveDocuments = None
+        self._segments = {}
+        try:
+            os.makedirs(indexDir, exist_ok=True)
+            manifestPath = os.path.join(indexDir, self.MANIFEST)
+            if os.path.isfile(manifestPath):
+                with open(manifestPath, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            else:
+                self._manifest = dict(nextSegment=0, segments=[], projects={})
+            for name in self._manifest['segments']:
+                self._segments[name] = SearchSegment(indexDir, name)
+        except (OSError, ValueError, KeyError):
+            self.close()
+            raise Error(f'{_("Cannot read file")}: "{norm_path(indexDir)}".')
+
+        self._clear_pending()
+
+    def close(self):
+        """Release the segments."""
+        for segment in self._segments.values():
+            segment.close()
+        self._segments = {}
+
+    def compact(self):
+        """Merge all segments into one, dropping the deleted documents."""
+        liveDocuments = self._get_live_documents()
+        if len(self._segments) == 1:
+            segment, = self._segments.values()
+            if len(segment.documents) == len(liveDocuments):
+                return
+
+        numbers = {}
+        documents = []
+        for location in sorted(liveDocuments, key=liveDocuments.get):
+            segmentName, documentNumber = location
+            numbers[location] = len(documents)
+            documents.append(self._segments[segmentName].documents[documentNumber])
+        oldSegments = list(self._segments.values())
+        name = self._get_segment_name()
+        write_segment(self.indexDir, name, documents, self._merge_postings(oldSegments, numbers))
+        for project in self._manifest['projects'].values():
+            for entry in project['documents'].values():
+                entry[0], entry[1] = name, numbers[(entry[0], entry[1])]
+        for segment in oldSegments:
+            segment.close()
+        self._segments = {name: SearchSegment(self.indexDir, name)}
+        self._manifest['segments'] = [name]
+        self._write_manifest()
+        self._remove_unused_files()
+
+    def remove_project(self, filePath):
+        """Remove a project from the index.
+
+        Positional arguments:
+            filePath: str -- path to the novx file.
+
+        Its documents remain in the segments until the next compact().
+        """
+        if self._manifest['projects'].pop(os.path.abspath(filePath), None) is not None:
+            self._write_manifest()
+
+    def search(self, query, limit=None):
+        """Return a list of the chapters and sections matching a query.
+
+        Positional arguments:
+            query: str -- words, "quoted phrases", and prefixes ending with *.
+
+        Optional arguments:
+            limit: int -- maximum number of results.
+
+        Return (project path, chapter ID, section ID) tuples in project and book order.
+        The section ID is None if the chapter's own texts match.
+        """
+        terms = self._parse_query(query)
+        if not terms:
+            return []
+
+        liveDocuments = self._get_live_documents()
+        matches = []
+        for name in self._manifest['segments']:
+            segment = self._segments[name]
+            documentNumbers = None
+            for term in terms:
+                termMatches = self._match(segment, term, documentNumbers)
+                if documentNumbers is None:
+                    documentNumbers = termMatches
+                else:
+                    documentNumbers &= termMatches
+                if not documentNumbers:
+                    break
+
+            for documentNumber in documentNumbers:
+                key = liveDocuments.get((name, documentNumber), None)
+                if key is not None:
+                    matches.append((key, tuple(segment.documents[documentNumber])))
+        matches.sort()
+        results = [document for __, document in matches]
+        if limit is not None:
+            del results[limit:]
+        return results
+
+    def update(self, filePaths, force=False):
+        """Index new and changed projects, and remove the projects whose files are missing.
+
+        Positional arguments:
+            filePaths: list of str -- paths to novx files.
+
+        Optional arguments:
+            force: bool -- if True, parse the projects even if their file date and size are unchanged.
+
+        Return a dictionary of status messages with the absolute paths as keys.
+        Error messages start with "!"; the projects concerned keep their previous state.
+        """
+        results = {}
+        projects = self._manifest['projects']
+        for filePath in list(projects):
+            if not os.path.isfile(filePath):
+                del projects[filePath]
+                results[filePath] = _('Removed from the index.')
+        for filePath in filePaths:
+            filePath = os.path.abspath(filePath)
+            try:
+                status = os.stat(filePath)
+                project = projects.get(filePath, None)
+                if (
+                    project is not None
+                    and not force
+                    and project['mtime'] == status.st_mtime
+                    and project['size'] == status.st_size
+                ):
+                    continue
+
+                entries = self._update_project(filePath, project)
+                projects[filePath] = dict(mtime=status.st_mtime, size=status.st_size, documents=entries)
+                results[filePath] = f'{_("Indexed")}: "{norm_path(filePath)}".'
+            except (OSError, ET.ParseError) as ex:
+                results[filePath] = f'!{_("Cannot read file")}: "{norm_path(filePath)}" ({str(ex)}).'
+        self._flush()
+        if results:
+            self._write_manifest()
+        if len(self._segments) > self.maxSegments:
+            self.compact()
+        return results
+
+    def _clear_pending(self):
+        """Reset the buffer of new documents."""
+        self._pendingDocuments = []
+        self._pendingEntries = []
+        self._pendingPostings = {}
+        self._pendingPositions = 0
+
+    def _flush(self):
+        """Write the buffered documents to a new segment."""
+        if not self._pendingDocuments:
+            return
+
+        name = self._get_segment_name()
+        write_segment(self.indexDir, name, self._pendingDocuments, self._pendingPostings)
+        for entry in self._pendingEntries:
+            entry[0] = name
+        self._segments[name] = SearchSegment(self.indexDir, name)
+        self._manifest['segments'].append(name)
+        self._liveDocuments = None
+        self._clear_pending()
+
+    def _get_live_documents(self):
+        """Return the (project path, position) sort keys of the indexed documents
+        with the (segment name, document number) tuples as keys.
+        """
+        if self._liveDocuments is None:
+            self._liveDocuments = {}
+            for filePath, project in self._manifest['projects'].items():
+                for name, documentNumber, __, order in project['documents'].values():
+                    self._liveDocuments[(name, documentNumber)] = (filePath, order)
+        return self._liveDocuments
+
+    def _get_segment_name(self):
+        """Return the name of a new segment."""
+        name = f'segment{self._manifest["nextSegment"]:06d}'
+        self._manifest['nextSegment'] += 1
+        return name
+
+    def _match(self, segment, term, candidates):
+        """Return a set of the numbers of the segment's documents matching a query term.
+
+        If candidates is a set of document numbers, the result is a subset of it.
+        """
+        kind, value = term
+        if kind == _PREFIX:
+            documentNumbers = set()
+            for word in segment.get_words(value):
+                documentNumbers.update(segment.get_postings(word))
+            return documentNumbers
+
+        postings = []
+        for word in value:
+            wordPostings = segment.get_postings(word)
+            if not wordPostings:
+                return set()
+
+            postings.append(wordPostings)
+        documentNumbers = set(postings[0])
+        if candidates is not None:
+            documentNumbers &= candidates
+        for wordPostings in postings[1:]:
+            documentNumbers.intersection_update(wordPostings)
+        if len(postings) == 1:
+            return documentNumbers
+
+        phraseMatches = set()
+        for documentNumber in documentNumbers:
+            starts = set(postings[0][documentNumber])
+            for offset, wordPostings in enumerate(postings[1:], start=1):
+                starts.intersection_update(position - offset for position in wordPostings[documentNumber])
+                if not starts:
+                    break
+
+            if starts:
+                phraseMatches.add(documentNumber)
+        return phraseMatches
+
+    def _merge_postings(self, segments, numbers):
+        """Generate (word, postings) tuples of several segments, sorted by word.
+
+        The document numbers are translated with the numbers dictionary;
+        documents not listed there are dropped.
+        """
+
+        def get_stream(segment):
+            for word, postings in segment.iter_postings():
+                yield word, segment.name, postings
+
+        streams = [get_stream(segment) for segment in segments]
+        for word, entries in groupby(heapq.merge(*streams, key=itemgetter(0, 1)), key=itemgetter(0)):
+            wordPostings = []
+            for __, name, postings in entries:
+                for documentNumber, positions in postings.items():
+                    newNumber = numbers.get((name, documentNumber), None)
+                    if newNumber is not None:
+                        wordPostings.append((newNumber, positions))
+            if wordPostings:
+                wordPostings.sort()
+                yield word, wordPostings
+
+    def _parse_query(self, query):
+        """Return a list of (kind, value) query terms.
+
+        Phrases have a list of words as value, prefixes a word start.
+        """
+        terms = []
+        for phrase, word in _QUERY_TERM.findall(query):
+            if phrase:
+                words = get_tokens(phrase)
+            elif word.endswith('*'):
+                words = get_tokens(word[:-1])
+            else:
+                words = get_tokens(word)
+            if len(words) == 1 and word.endswith('*'):
+                terms.append((_PREFIX, words[0]))
+            elif words:
+                terms.append((_PHRASE, words))
+        return terms
+
+    def _remove_unused_files(self):
+        """Delete the segment files that are not listed in the manifest."""
+        for fileName in os.listdir(self.indexDir):
+            name, extension = os.path.splitext(fileName)
+            if extension == '.tmp':
+                name, extension = os.path.splitext(name)
+            if (
+                name.startswith('segment')
+                and extension in (LEXICON_EXTENSION, POSTINGS_EXTENSION)
+                and name not in self._segments
+            ):
+                try:
+                    os.remove(os.path.join(self.indexDir, fileName))
+                except OSError:
+                    pass
+
+    def _update_project(self, filePath, project):
+        """Buffer the new and changed documents of a project.
+
+        Return the project's document entries with the chapter and section IDs as keys.
+        Each entry is a [segment name, document number, fingerprint, position] list.
+        """
+        if project is None:
+            oldEntries = {}
+        else:
+            oldEntries = project['documents']
+        entries = {}
+        for document in NovxTextReader(filePath).iter_documents():
+            entry = oldEntries.get(document['key'], None)
+            if entry is not None and entry[2] == document['hash']:
+                entries[document['key']] = [entry[0], entry[1], entry[2], document['order']]
+                continue
+
+            if self._pendingPositions >= self.segmentSize:
+                self._flush()
+            documentNumber = len(self._pendingDocuments)
+            self._pendingDocuments.append([filePath, document['chapter'], document['section']])
+            self._pendingPositions += get_postings(document['fields'], documentNumber, self._pendingPostings)
+            entry = [None, documentNumber, document['hash'], document['order']]
+            self._pendingEntries.append(entry)
+            entries[document['key']] = entry
+        self._liveDocuments = None
+        return entries
+
+    def _write_manifest(self):
+        """Save the manifest via a temporary file."""
+        manifestPath = os.path.join(self.indexDir, self.MANIFEST)
+        tempPath = f'{manifestPath}.tmp'
+        with open(tempPath, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f)
+        os.replace(tempPath, manifestPath)
+        self._liveDocuments = None
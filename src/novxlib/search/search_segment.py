@@ -0,0 +1,175 @@
+"""Provide a class for an immutable segment of the full-text search index.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from array import array
+from bisect import bisect_left
+import json
+import mmap
+import os
+import re
+
+LEXICON_EXTENSION = '.json'
+POSTINGS_EXTENSION = '.post'
+
+_WORD = re.compile(r'\w+')
+# Position gap between the fields of a document, so that phrases do not span fields.
+_FIELD_GAP = 1
+
+
+def get_tokens(text):
+    """Return a list of the normalized words of a text."""
+    return [word.casefold() for word in _WORD.findall(text)]
+
+
+def get_postings(fields, documentNumber, postings):
+    """Add the word positions of a document to a postings dictionary.
+
+    Positional arguments:
+        fields: list of str -- texts of the document.
+        documentNumber: int -- number of the document within the segment.
+        postings: dict -- lists of (document number, positions) tuples, with the words as keys;
+                  completed in place.
+
+    Return the number of positions added.
+    """
+    positions = {}
+    position = 0
+    for text in fields:
+        for word in get_tokens(text):
+            positions.setdefault(word, []).append(position)
+            position += 1
+        position += _FIELD_GAP
+    for word, wordPositions in positions.items():
+        postings.setdefault(word, []).append((documentNumber, wordPositions))
+    return position
+
+
+def write_segment(dirPath, name, documents, postings):
+    """Write a segment's lexicon and postings files.
+
+    Positional arguments:
+        dirPath: str -- path to the index directory.
+        name: str -- segment name.
+        documents: list -- [project path, chapter ID, section ID] per document number.
+        postings: dict or iterable -- (document number, positions) lists with the words as keys,
+                  or (word, list) tuples sorted by word. The lists are sorted by document number.
+
+    The postings file is a flat array of unsigned ints with the sequence
+    document number, number of positions, positions, per document and word.
+    The lexicon maps each word to the offset and the length of its postings.
+    Both files are written via temporary files, so a segment is never read incomplete.
+    """
+    if isinstance(postings, dict):
+        postings = sorted(postings.items())
+    basePath = os.path.join(dirPath, name)
+    lexicon = {}
+    offset = 0
+    with open(f'{basePath}{POSTINGS_EXTENSION}.tmp', 'wb') as f:
+        for word, wordPostings in postings:
+            values = array('I')
+            for documentNumber, positions in wordPostings:
+                values.append(documentNumber)
+                values.append(len(positions))
+                values.extend(positions)
+            values.tofile(f)
+            lexicon[word] = (offset, len(values))
+            offset += len(values)
+    with open(f'{basePath}{LEXICON_EXTENSION}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(dict(documents=documents, lexicon=lexicon), f)
+    os.replace(f'{basePath}{POSTINGS_EXTENSION}.tmp', f'{basePath}{POSTINGS_EXTENSION}')
+    os.replace(f'{basePath}{LEXICON_EXTENSION}.tmp', f'{basePath}{LEXICON_EXTENSION}')
+
+
+class SearchSegment:
+    """Read-only segment of the full-text search index.
+
+    The lexicon is loaded, but the postings are memory-mapped,
+    so only the postings of the queried words are read from disk.
+    Deleted documents are not removed from a segment;
+    the index skips them until the segments are merged.
+
+    Public methods:
+        close() -- release the memory-mapped postings.
+        get_postings(word) -- return a dictionary of the word positions per document.
+        get_words(prefix) -- return a list of the words starting with a prefix.
+        iter_postings() -- generate (word, postings) tuples sorted by word.
+
+    Public instance variables:
+        name: str -- segment name.
+        documents: list -- [project path, chapter ID, section ID] per document number.
+    """
+
+    def __init__(self, dirPath, name):
+        """Open a segment that has been written with write_segment().
+
+        Positional arguments:
+            dirPath: str -- path to the index directory.
+            name: str -- segment name.
+        """
+        self.name = name
+        basePath = os.path.join(dirPath, name)
+        with open(f'{basePath}{LEXICON_EXTENSION}', 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.documents = data['documents']
+        self._lexicon = data['lexicon']
+        self._words = None
+        self._mmap = None
+        self._values = None
+        if os.path.getsize(f'{basePath}{POSTINGS_EXTENSION}'):
+            with open(f'{basePath}{POSTINGS_EXTENSION}', 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._values = memoryview(self._mmap).cast('I')
+
+    def close(self):
+        """Release the memory-mapped postings."""
+        if self._values is not None:
+            self._values.release()
+            self._values = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def get_postings(self, word):
+        """Return a dictionary with the word positions as tuples, and the document numbers as keys.
+
+        Positional arguments:
+            word: str -- normalized word.
+        """
+        entry = self._lexicon.get(word, None)
+        if entry is None or self._values is None:
+            return {}
+
+        offset, length = entry
+        values = self._values[offset:offset + length].tolist()
+        postings = {}
+        i = 0
+        while i < length:
+            count = values[i + 1]
+            postings[values[i]] = tuple(values[i + 2:i + 2 + count])
+            i += 2 + count
+        return postings
+
+    def get_words(self, prefix):
+        """Return a sorted list of the words of the segment starting with a prefix.
+
+        Positional arguments:
+            prefix: str -- normalized word start.
+        """
+        if self._words is None:
+            self._words = sorted(self._lexicon)
+        words = []
+        i = bisect_left(self._words, prefix)
+        while i < len(self._words) and self._words[i].startswith(prefix):
+            words.append(self._words[i])
+            i += 1
+        return words
+
+    def iter_postings(self):
+        """Generate (word, postings) tuples sorted by word, with postings as returned by get_postings()."""
+        if self._words is None:
+            self._words = sorted(self._lexicon)
+        for word in self._words:
+            yield word, self.get_postings(word)
@@ -0,0 +1,61 @@
+"""Run the local conversion service.
+
+usage: python -m novxlib.server [-h] [--host HOST] [--port PORT] [-j JOBS] [--queue QUEUE] [--root DIR]
+
+The service runs until it is interrupted or terminated.
+The access token is generated at start and printed to stdout; 
+clients send it in an "Authorization: Bearer <token>" header.
+Only source files below the root directories are converted.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import argparse
+import signal
+import sys
+import threading
+
+from novxlib.server.conversion_server import ConversionServer
+
+
+def main(args=None):
+    """Parse the command line, and serve until interrupted. Return the exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m novxlib.server',
+        description='Run a local conversion service with a warm worker pool.'
+        )
+    parser.add_argument('--host', default='127.0.0.1', help='interface to listen on. Default: 127.0.0.1.')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on. Default: 8765.')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes. Default: number of CPUs.')
+    parser.add_argument('--queue', type=int, default=64, help='maximum number of unfinished jobs. Default: 64.')
+    parser.add_argument(
+        '--root',
+        dest='roots',
+        action='append',
+        metavar='DIR',
+        help='directory the source files must be in; repeat for several directories. Default: the current directory.'
+        )
+    options = parser.parse_args(args)
+    if options.jobs is not None and options.jobs < 1:
+        parser.error('the number of jobs must be positive.')
+    if options.queue < 1:
+        parser.error('the queue size must be positive.')
+
+    server = ConversionServer(options.host, options.port, options.jobs, options.queue, roots=options.roots)
+
+    def stop(signalNumber, frame):
+        # shutdown() blocks until serve_forever() returns, so it must run in another thread.
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    host, port = server.address
+    print(f'Serving on http://{host}:{port}/jobs', flush=True)
+    print(f'Token: {server.token}', flush=True)
+    server.serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
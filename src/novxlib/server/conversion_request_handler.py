@@ -0,0 +1,130 @@
+"""Provide a request handler for the local conversion service.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import hmac
+from http.server import BaseHTTPRequestHandler
+import json
+
+from nvlib.novx_globals import Error
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """HTTP request handler that forwards jobs to the ConversionServer.
+    
+    The ConversionServer instance is expected as the
+    conversionServer attribute of the HTTP server.
+    Requests without the server's token are rejected with 401.
+
+    Public methods:
+        do_GET() -- reply the status of one or all jobs.
+        do_POST() -- queue a new job.
+        log_message(format, *args) -- suppress the access log.
+
+    Class constants:
+        MAX_BODY_SIZE: int -- maximum size of a request body in bytes.
+    """
+    MAX_BODY_SIZE = 64 * 1024
+
+    def do_GET(self):
+        """Reply the status of one or all jobs.
+        
+        Overrides the superclass method.
+        """
+        if not self._is_authorized():
+            return
+
+        conversionServer = self.server.conversionServer
+        path = self.path.rstrip('/')
+        if path == '/jobs':
+            self._send_json(200, conversionServer.get_jobs())
+            return
+
+        if path.startswith('/jobs/'):
+            job = conversionServer.get_job(path[len('/jobs/'):])
+            if job is not None:
+                self._send_json(200, job)
+                return
+
+        self._send_json(404, dict(error='Not found.'))
+
+    def do_POST(self):
+        """Queue a new job.
+        
+        Overrides the superclass method.
+        """
+        if not self._is_authorized():
+            return
+
+        if self.path.rstrip('/') != '/jobs':
+            self._send_json(404, dict(error='Not found.'))
+            return
+
+        contentType = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if contentType != 'application/json':
+            self._send_json(415, dict(error='Content-Type must be application/json.'))
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if not 0 < length <= self.MAX_BODY_SIZE:
+                raise ValueError('Invalid body size.')
+
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            sourcePath = request['source']
+            suffixes = request.get('suffixes', None)
+            overwrite = bool(request.get('overwrite', False))
+            if not isinstance(sourcePath, str):
+                raise ValueError('"source" must be a string.')
+
+            if suffixes is not None and not (
+                isinstance(suffixes, list) and all(isinstance(suffix, str) for suffix in suffixes)
+                ):
+                raise ValueError('"suffixes" must be a list of strings.')
+
+        except (ValueError, KeyError, TypeError, AttributeError) as ex:
+            self._send_json(400, dict(error=f'Bad request: {str(ex)}'))
+            return
+
+        if not self.server.conversionServer.is_allowed(sourcePath):
+            self._send_json(403, dict(error='Source is outside the allowed directories.'))
+            return
+
+        try:
+            job = self.server.conversionServer.submit(sourcePath, suffixes, overwrite)
+        except Error as ex:
+            self._send_json(503, dict(error=str(ex)))
+            return
+
+        self._send_json(202, job)
+
+    def log_message(self, format, *args):
+        """Suppress the access log.
+        
+        Overrides the superclass method.
+        """
+        pass
+
+    def _is_authorized(self):
+        """Return True if the request carries the server's token; otherwise reply 401."""
+        authorization = self.headers.get('Authorization', '')
+        scheme, __, token = authorization.partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(
+                token.strip().encode('utf-8'),
+                self.server.conversionServer.token.encode('utf-8')
+                ):
+            return True
+
+        self._send_json(401, dict(error='Unauthorized.'))
+        return False
+
+    def _send_json(self, status, data):
+        """Send a JSON reply."""
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
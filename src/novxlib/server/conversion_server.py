@@ -0,0 +1,299 @@
+"""Provide a class for a local conversion service with a warm worker pool.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import HTTPServer
+import itertools
+import os
+import secrets
+from socketserver import ThreadingMixIn
+import sys
+import threading
+import time
+
+from novxlib.converter.batch_converter import STATUS_ERROR
+from novxlib.converter.batch_converter import convert_file
+from novxlib.server.conversion_request_handler import ConversionRequestHandler
+from nvlib.novx_globals import Error
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+def _run_job(sourcePath, suffixes, overwrite):
+    """Convert a file in a worker process, and return a (start time, duration, results) tuple."""
+    startTime = time.time()
+    startCounter = time.perf_counter()
+    results = convert_file(sourcePath, suffixes, overwrite)
+    return startTime, time.perf_counter() - startCounter, results
+
+
+def _warm_up():
+    """Import the converters and all registered file classes in a worker process.
+    
+    Failures are ignored here; the jobs report them instead.
+    """
+    try:
+        from novxlib.converter.novx_exporter import NovxExporter
+        from novxlib.converter.novx_importer import NovxImporter
+        from novxlib.novx.novx_cache import get_default_cache
+
+        NovxExporter.EXPORT_TARGETS.get_classes()
+        NovxImporter.IMPORT_SOURCES.get_classes()
+        get_default_cache()
+    except Exception:
+        pass
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """HTTP server that handles each request in a daemon thread.
+    
+    http.server.ThreadingHTTPServer requires Python 3.7.
+    """
+    daemon_threads = True
+
+
+class ConversionServer:
+    """Local HTTP service that runs conversion jobs on a pool of warm worker processes.
+    
+    The workers import the converters and all file classes when the pool starts,
+    and they share the persistent parsed project cache, 
+    so a job only costs the conversion itself.
+    
+    Each request must carry the token generated at start in an 
+    "Authorization: Bearer <token>" header. Only source files 
+    below the configured root directories are accepted.
+    
+    HTTP interface (JSON):
+        POST /jobs {"source": path, "suffixes": [suffix, ...], "overwrite": bool}
+            -- queue a job; a novx source is exported, any other source is imported. 
+               Reply 202 with the job, 403 if the source is outside the roots, 
+               415 if the body is not JSON, or 503 if the queue is full.
+        GET /jobs -- list the known jobs.
+        GET /jobs/<id> -- reply the job's status, timing, and results.
+
+    Public methods:
+        get_job(jobId) -- return a copy of a job's record, or None.
+        get_jobs() -- return a list of copies of all job records.
+        is_allowed(sourcePath) -- return True if the source file is below a root directory.
+        serve_forever() -- handle requests until shutdown() is called.
+        shutdown() -- stop serving, and wait for the running jobs.
+        submit(sourcePath, suffixes=None, overwrite=False) -- queue a job and return its record.
+
+    Public instance variables:
+        address: (host, port) tuple -- the address the server is listening on.
+        token: str -- secret the clients must send with each request.
+        roots: list of str -- absolute paths of the directories the source files must be in.
+        maxQueued: int -- maximum number of unfinished jobs.
+        maxHistory: int -- maximum number of finished jobs kept for status queries.
+        
+    Each job record is a dictionary with the keys:
+        id -- job ID.
+        source -- path to the source file.
+        suffixes -- target file name suffixes, or None for all targets.
+        status -- "queued", "running", "done", or "failed".
+        submitted -- time the job was queued, in seconds since the epoch.
+        started -- time the conversion started, or None.
+        waitSeconds -- time between queueing and start, or None.
+        runSeconds -- duration of the conversion, or None.
+        results -- list of result dictionaries, see batch_converter.convert_file().
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, maxWorkers=None, maxQueued=64, maxHistory=1000, roots=None):
+        """Start the worker pool, and bind the server socket.
+        
+        Optional arguments:
+            host: str -- interface to listen on. Default: local host only.
+            port: int -- port to listen on. Default: a free port.
+            maxWorkers: int -- number of worker processes. Default: number of CPUs.
+            maxQueued: int -- maximum number of unfinished jobs.
+            maxHistory: int -- maximum number of finished jobs kept for status queries.
+            roots: list of str -- directories the source files must be in. 
+                   Default: the current working directory.
+        """
+        if roots is None:
+            roots = [os.getcwd()]
+        self.roots = [os.path.realpath(root) for root in roots]
+        self.token = secrets.token_urlsafe(32)
+        self.maxQueued = maxQueued
+        self.maxHistory = maxHistory
+        self._jobs = OrderedDict()
+        # key: job ID; value: job record
+
+        self._futures = {}
+        # key: job ID; value: Future of an unfinished job
+
+        self._jobIds = itertools.count(1)
+        self._lock = threading.Lock()
+        if maxWorkers is None:
+            maxWorkers = os.cpu_count() or 1
+        self._maxWorkers = maxWorkers
+        self._executor = self._new_executor()
+        self._httpServer = _ThreadingHTTPServer((host, port), ConversionRequestHandler)
+        self._httpServer.conversionServer = self
+        self.address = self._httpServer.server_address[:2]
+
+    def get_job(self, jobId):
+        """Return a copy of a job's record, or None if the job is unknown.
+        
+        Positional arguments:
+            jobId: str -- ID returned by submit().
+        """
+        with self._lock:
+            job = self._jobs.get(jobId, None)
+            if job is None:
+                return None
+
+            return self._get_copy(job)
+
+    def get_jobs(self):
+        """Return a list of copies of all job records, oldest first."""
+        with self._lock:
+            return [self._get_copy(job) for job in self._jobs.values()]
+
+    def is_allowed(self, sourcePath):
+        """Return True if the source file is below one of the root directories.
+        
+        Positional arguments:
+            sourcePath: str -- path to the source file.
+            
+        Symbolic links are resolved before checking.
+        """
+        realPath = os.path.realpath(sourcePath)
+        for root in self.roots:
+            try:
+                if os.path.commonpath([root, realPath]) == root:
+                    return True
+
+            except ValueError:
+                # Different drives on Windows.
+                pass
+
+        return False
+
+    def serve_forever(self):
+        """Handle requests until shutdown() is called."""
+        self._httpServer.serve_forever()
+
+    def shutdown(self):
+        """Stop serving, and wait for the running jobs.
+        
+        Must be called from another thread than serve_forever().
+        """
+        self._httpServer.shutdown()
+        self._httpServer.server_close()
+        self._executor.shutdown(wait=True)
+
+    def submit(self, sourcePath, suffixes=None, overwrite=False):
+        """Queue a conversion job, and return a copy of its record.
+        
+        Positional arguments:
+            sourcePath: str -- path to the source file.
+            
+        Optional arguments:
+            suffixes: list of str -- target file name suffixes for exporting a novx file.
+                      If None, export to all registered targets.
+            overwrite: bool -- if True, overwrite existing target files.
+        
+        Raise the "Error" exception if the queue is full.
+        """
+        with self._lock:
+            if len(self._futures) >= self.maxQueued:
+                raise Error(f'Queue full: {len(self._futures)} unfinished jobs.')
+
+            jobId = str(next(self._jobIds))
+            job = dict(
+                id=jobId,
+                source=sourcePath,
+                suffixes=suffixes,
+                status=JOB_QUEUED,
+                submitted=time.time(),
+                started=None,
+                waitSeconds=None,
+                runSeconds=None,
+                results=[],
+                )
+            self._jobs[jobId] = job
+            try:
+                future = self._executor.submit(_run_job, sourcePath, suffixes, overwrite)
+            except BrokenProcessPool:
+                # A worker has died, e.g. by running out of memory; start a new pool.
+                self._executor.shutdown(wait=False)
+                self._executor = self._new_executor()
+                future = self._executor.submit(_run_job, sourcePath, suffixes, overwrite)
+            self._futures[jobId] = future
+            self._discard_old_jobs()
+            jobCopy = self._get_copy(job)
+        future.add_done_callback(lambda future: self._finish_job(jobId, future))
+        return jobCopy
+
+    def _discard_old_jobs(self):
+        """Remove the oldest finished jobs exceeding maxHistory. Lock must be held."""
+        surplus = len(self._jobs) - len(self._futures) - self.maxHistory
+        for jobId in list(self._jobs):
+            if surplus <= 0:
+                break
+
+            if jobId not in self._futures:
+                del self._jobs[jobId]
+                surplus -= 1
+
+    def _new_executor(self):
+        """Return a new process pool whose workers import the converters when they start.
+        
+        Each worker runs _warm_up() as initializer, and one _warm_up() call is submitted
+        per worker, so that all workers are started at once.
+        ProcessPoolExecutor's initializer argument requires Python 3.7. With Python 3.6,
+        the submitted calls warm up most of the workers, but not necessarily all, 
+        because one worker may run several of them.
+        """
+        options = {}
+        if sys.version_info >= (3, 7):
+            options['initializer'] = _warm_up
+        executor = ProcessPoolExecutor(max_workers=self._maxWorkers, **options)
+        for __ in range(self._maxWorkers):
+            executor.submit(_warm_up)
+        return executor
+
+    def _finish_job(self, jobId, future):
+        """Store the outcome of a job; called when its future is done."""
+        with self._lock:
+            job = self._jobs[jobId]
+            del self._futures[jobId]
+            try:
+                startTime, duration, results = future.result()
+            except Exception as ex:
+                job['status'] = JOB_FAILED
+                job['results'] = [dict(
+                    source=job['source'],
+                    suffix=None,
+                    status=STATUS_ERROR,
+                    message=str(ex),
+                    output=None,
+                    )]
+                return
+
+            job['started'] = startTime
+            job['waitSeconds'] = max(0.0, startTime - job['submitted'])
+            job['runSeconds'] = duration
+            job['results'] = results
+            if not any(result['status'] == STATUS_ERROR for result in results):
+                job['status'] = JOB_DONE
+            else:
+                job['status'] = JOB_FAILED
+
+    def _get_copy(self, job):
+        """Return a copy of a job record with the current status. Lock must be held."""
+        jobCopy = dict(job)
+        future = self._futures.get(job['id'], None)
+        if future is not None and future.running():
+            # Futures of a process pool are "running" as soon as they are sent to a worker.
+            jobCopy['status'] = JOB_RUNNING
+        return jobCopy
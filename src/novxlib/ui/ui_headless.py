@@ -0,0 +1,70 @@
+"""Provide a user interface class for conversions without a window.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from mvclib.user_interface.ui import Ui
+
+
+class UiHeadless(Ui):
+    """UI subclass for batch processing without user interaction.
+    
+    Messages are collected instead of being displayed.
+    Questions are answered with a preset value.
+
+    Public methods:
+        ask_yes_no(text) -- return the preset answer.
+        set_info_what(message) -- keep the message.
+        set_status(message) -- keep the message.
+        show_warning(message) -- keep the message.
+    
+    Public instance variables:
+        answer: bool -- the answer to all questions, e.g. whether to overwrite files.
+        infoWhatText: str -- the last message about what is being converted.
+        infoHowText: str -- the last status message. Error messages start with "!".
+        warnings: list of str -- all warnings.
+    """
+
+    def __init__(self, title='', answer=False):
+        """Initialize instance variables.
+        
+        Optional arguments:
+            title: str -- application title.
+            answer: bool -- the answer to all questions.
+        
+        Extends the superclass constructor.
+        """
+        super().__init__(title)
+        self.answer = answer
+        self.infoWhatText = ''
+        self.infoHowText = ''
+        self.warnings = []
+
+    def ask_yes_no(self, text, title=None):
+        """Return the preset answer.
+        
+        Overrides the superclass method.       
+        """
+        return self.answer
+
+    def set_info_what(self, message):
+        """Keep a message about what is being converted.
+        
+        Overrides the superclass method.       
+        """
+        self.infoWhatText = message
+
+    def set_status(self, message):
+        """Keep the status message without reformatting error messages.
+        
+        Overrides the superclass method.       
+        """
+        self.infoHowText = message
+
+    def show_warning(self, message):
+        """Keep a warning message.
+        
+        Overrides the superclass method.       
+        """
+        self.warnings.append(message)
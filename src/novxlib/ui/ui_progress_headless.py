@@ -0,0 +1,123 @@
+"""Provide a user interface class that prints the conversion progress to stderr.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import sys
+import threading
+import time
+
+from novxlib.ui.ui_headless import UiHeadless
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+
+def get_progress_text(progress):
+    """Return a line of text for a progress dictionary of OdfStreamWriter."""
+    return (
+        f'{norm_path(progress["file"])}: '
+        f'{progress["sections"]}/{progress["totalSections"]} {_("sections")}, '
+        f'{progress["bytes"] / 1e6:.1f} MB'
+        )
+
+
+def get_progress_fraction(progress):
+    """Return the progress as a fraction between 0 and 1."""
+    if not progress['totalSections']:
+        return 0.0
+
+    return progress['sections'] / progress['totalSections']
+
+
+class UiProgressHeadless(UiHeadless):
+    """UI subclass for batch processing that reports the progress on stderr.
+
+    Messages are collected and printed.
+    Progress is printed at most once per interval, and when a document is complete.
+    The phase times can be printed by subscribing show_phase() to a PhaseTimer.
+
+    Public methods:
+        set_info_what(message) -- keep and print the message.
+        set_status(message) -- keep and print the message.
+        show_phase(event) -- print a phase timing event.
+        show_progress(progress) -- print the progress, unless printed just before.
+        show_warning(message) -- keep and print the message.
+
+    Public instance variables:
+        cancelEvent: threading.Event -- set it to cancel a streaming export.
+        interval: float -- minimum time between progress lines in seconds.
+        stream -- text stream for the output. If None, use sys.stderr.
+    """
+
+    def __init__(self, title='', answer=False, interval=0.5, stream=None):
+        """Initialize instance variables.
+
+        Optional arguments:
+            title: str -- application title.
+            answer: bool -- the answer to all questions.
+            interval: float -- minimum time between progress lines in seconds.
+            stream -- text stream for the output. If None, use sys.stderr.
+
+        Extends the superclass constructor.
+        """
+        super().__init__(title, answer)
+        self.cancelEvent = threading.Event()
+        self.interval = interval
+        self.stream = stream
+        self._lastProgress = {}
+        self._lock = threading.Lock()
+
+    def set_info_what(self, message):
+        """Keep and print a message about what is being converted.
+
+        Extends the superclass method.
+        """
+        super().set_info_what(message)
+        self._print(message)
+
+    def set_status(self, message):
+        """Keep and print the status message.
+
+        Extends the superclass method.
+        """
+        super().set_status(message)
+        self._print(message)
+
+    def show_phase(self, event):
+        """Print a PhaseTimer event.
+
+        Positional arguments:
+            event: dict -- timing event of a conversion phase.
+        """
+        self._print(f'{event["phase"]}: {event["duration"]:.3f} s')
+
+    def show_progress(self, progress):
+        """Print the progress, unless the last line for the same file is more recent than the interval.
+
+        Positional arguments:
+            progress: dict -- progress dictionary of OdfStreamWriter.
+        """
+        now = time.monotonic()
+        finished = progress['sections'] == progress['totalSections']
+        with self._lock:
+            lastTime = self._lastProgress.get(progress['file'], None)
+            if not finished and lastTime is not None and now - lastTime < self.interval:
+                return
+
+            self._lastProgress[progress['file']] = now
+        self._print(get_progress_text(progress))
+
+    def show_warning(self, message):
+        """Keep and print a warning message.
+
+        Extends the superclass method.
+        """
+        super().show_warning(message)
+        self._print(message)
+
+    def _print(self, message):
+        """Print a message to the output stream."""
+        stream = self.stream or sys.stderr
+        with self._lock:
+            print(message, file=stream, flush=True)
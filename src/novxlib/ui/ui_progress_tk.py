@@ -0,0 +1,231 @@
+"""Provide a Tkinter user interface class that runs conversions on a worker thread.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import queue
+import threading
+import tkinter as tk
+from tkinter import messagebox
+from tkinter import ttk
+
+from mvclib.user_interface.ui import Ui
+from novxlib.ui.ui_progress_headless import get_progress_fraction
+from novxlib.ui.ui_progress_headless import get_progress_text
+from nvlib.novx_globals import _
+
+
+class UiProgressTk(Ui):
+    """UI subclass with a progress bar and a cancel button.
+
+    The conversion runs on a worker thread, so the window stays responsive.
+    The worker passes all messages through a queue that the Tk mainloop polls;
+    questions block the worker until they are answered in the main thread.
+    Canceling sets cancelEvent; streaming writers then stop after
+    the current chapter and remove their partial output.
+
+    Public methods:
+        ask_yes_no(text) -- query yes or no, also from the worker thread.
+        cancel() -- request the cancellation of the running conversion.
+        run_conversion(converter, sourcePath, **kwargs) -- start a conversion on a worker thread.
+        set_info_what(message) -- show what is being converted.
+        set_status(message) -- show the status; error messages start with "!".
+        show_phase(event) -- show a phase timing event.
+        show_progress(progress) -- show the progress of a streaming writer.
+        show_warning(message) -- show a warning message box.
+        start() -- run the Tk mainloop until the window is closed.
+
+    Public instance variables:
+        root: tk.Tk -- the application window.
+        cancelEvent: threading.Event -- set while a cancellation is requested.
+
+    Class constants:
+        POLL_INTERVAL: int -- milliseconds between two checks of the message queue.
+    """
+    POLL_INTERVAL = 50
+
+    def __init__(self, title):
+        """Initialize the GUI window and instance variables.
+
+        Positional arguments:
+            title: str -- application title to be displayed at the window frame.
+
+        Extends the superclass constructor.
+        """
+        super().__init__(title)
+        self.cancelEvent = threading.Event()
+        self._title = title
+        self._queue = queue.Queue()
+        self._progress = None
+        self._worker = None
+        self._closeRequested = False
+        self.root = tk.Tk()
+        self.root.title(title)
+        self.root.protocol('WM_DELETE_WINDOW', self._close)
+        self._infoWhatWindow = tk.Label(self.root, text='', justify=tk.LEFT)
+        self._infoWhatWindow.pack(padx=10, pady=5, anchor=tk.W)
+        self._progressBar = ttk.Progressbar(self.root, length=400, mode='determinate', maximum=1.0)
+        self._progressBar.pack(padx=10, pady=5, fill=tk.X)
+        self._progressWindow = tk.Label(self.root, text='', justify=tk.LEFT)
+        self._progressWindow.pack(padx=10, anchor=tk.W)
+        self._infoHowWindow = tk.Label(self.root, text='', justify=tk.LEFT)
+        self._infoHowWindow.pack(padx=10, pady=5, anchor=tk.W)
+        self._button = ttk.Button(self.root, text=_('Cancel'), command=self.cancel)
+        self._button.pack(padx=10, pady=10)
+
+    def ask_yes_no(self, text, title=None):
+        """Query yes or no with a pop-up box; return the answer.
+
+        Called from the worker thread, it waits until the question is answered in the main thread.
+        A cancellation answers the question with no.
+        Overrides the superclass method.
+        """
+        if title is None:
+            title = self._title
+        if threading.current_thread() is threading.main_thread():
+            return messagebox.askyesno(title, text)
+
+        answer = []
+        answered = threading.Event()
+        self._queue.put((self._ask_yes_no, (title, text, answer, answered)))
+        while not answered.wait(0.1):
+            if self.cancelEvent.is_set():
+                return False
+
+        return answer[0]
+
+    def cancel(self):
+        """Request the cancellation of the running conversion, or close the finished window."""
+        if self._worker is None or not self._worker.is_alive():
+            self.root.destroy()
+            return
+
+        self.cancelEvent.set()
+        self._button.configure(state=tk.DISABLED)
+        self._show_status(_('Canceling...'))
+
+    def run_conversion(self, converter, sourcePath, **kwargs):
+        """Start a conversion on a worker thread.
+
+        Positional arguments:
+            converter -- converter instance, e.g. NovxExporter or NovxImporter.
+            sourcePath: str -- path of the file to convert.
+
+        The keyword arguments are passed to converter.run().
+        The converter's phase timer, if any, reports to show_phase() while the conversion runs.
+        """
+        converter.ui = self
+        self.cancelEvent.clear()
+        self._progress = None
+        self._button.configure(text=_('Cancel'), state=tk.NORMAL)
+        self._worker = threading.Thread(target=self._run_worker, args=(converter, sourcePath, kwargs), daemon=True)
+        self._worker.start()
+
+    def set_info_what(self, message):
+        """Show what is being converted.
+
+        Overrides the superclass method.
+        """
+        self.infoWhatText = message
+        self._queue.put((self._infoWhatWindow.configure, dict(text=message)))
+
+    def set_status(self, message):
+        """Show the status; error messages start with "!".
+
+        Overrides the superclass method.
+        """
+        self.infoHowText = message
+        self._queue.put((self._show_status, (message,)))
+
+    def show_phase(self, event):
+        """Show a PhaseTimer event.
+
+        Positional arguments:
+            event: dict -- timing event of a conversion phase.
+        """
+        self._queue.put((self._progressWindow.configure, dict(text=f'{event["phase"]}: {event["duration"]:.3f} s')))
+
+    def show_progress(self, progress):
+        """Show the progress of a streaming writer.
+
+        Positional arguments:
+            progress: dict -- progress dictionary of OdfStreamWriter.
+
+        Only the latest progress is kept, so the queue is not flooded.
+        """
+        self._progress = progress
+
+    def show_warning(self, message):
+        """Show a warning message box.
+
+        Overrides the superclass method.
+        """
+        self._queue.put((messagebox.showwarning, (self._title, message)))
+
+    def start(self):
+        """Run the Tk mainloop until the window is closed.
+
+        Overrides the superclass method.
+        """
+        self.root.after(self.POLL_INTERVAL, self._poll)
+        self.root.mainloop()
+
+    def _ask_yes_no(self, title, text, answer, answered):
+        """Ask a question of the worker thread in the main thread."""
+        answer.append(messagebox.askyesno(title, text))
+        answered.set()
+
+    def _close(self):
+        """Cancel a running conversion, and close the window when it has stopped."""
+        if self._worker is not None and self._worker.is_alive():
+            self._closeRequested = True
+            self.cancel()
+            return
+
+        self.root.destroy()
+
+    def _poll(self):
+        """Process the queued messages, and show the latest progress."""
+        while True:
+            try:
+                function, arguments = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if isinstance(arguments, dict):
+                function(**arguments)
+            else:
+                function(*arguments)
+        progress = self._progress
+        if progress is not None:
+            self._progressBar.configure(value=get_progress_fraction(progress))
+            self._progressWindow.configure(text=get_progress_text(progress))
+            self._progress = None
+        if self._worker is not None and not self._worker.is_alive():
+            if self._closeRequested:
+                self.root.destroy()
+                return
+
+            self._button.configure(text=_('Close'), state=tk.NORMAL)
+        self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _run_worker(self, converter, sourcePath, kwargs):
+        """Run the conversion; executed on the worker thread."""
+        phaseTimer = getattr(converter, 'phaseTimer', None)
+        if phaseTimer is not None:
+            phaseTimer.subscribe(self.show_phase)
+        try:
+            converter.run(sourcePath, **kwargs)
+        except Exception as ex:
+            self.set_status(f'!{str(ex)}')
+        finally:
+            if phaseTimer is not None:
+                phaseTimer.unsubscribe(self.show_phase)
+
+    def _show_status(self, message):
+        """Show a status message in the main thread; errors in red."""
+        if message.startswith('!'):
+            self._infoHowWindow.configure(text=message[1:], bg='red', fg='white')
+        else:
+            self._infoHowWindow.configure(text=message, bg='green', fg='white')
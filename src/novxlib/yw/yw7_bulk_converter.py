@@ -0,0 +1,102 @@
+"""Provide functions for converting many novx files to yw7 on a process pool.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+import os
+
+from novxlib.converter.batch_converter import STATUS_ERROR
+from novxlib.converter.batch_converter import STATUS_OK
+from novxlib.converter.batch_converter import STATUS_SKIPPED
+from novxlib.novx.novx_file_finder import find_novx_files
+
+YW7_SUFFIX = '.yw7'
+
+
+def convert_to_yw7(sourcePath, overwrite=False):
+    """Convert a novx file to yw7, and return a result dictionary.
+    
+    Positional arguments:
+        sourcePath: str -- path to the novx file.
+        
+    Optional arguments:
+        overwrite: bool -- if True, overwrite an existing yw7 file.
+
+    The result dictionary has the keys "source", "status", "message", and "output".
+    If the yw7 file exists and is not overwritten, the status is "skipped".
+    """
+    fileName, __ = os.path.splitext(sourcePath)
+    targetPath = f'{fileName}{YW7_SUFFIX}'
+    if os.path.isfile(targetPath) and not overwrite:
+        return dict(source=sourcePath, status=STATUS_SKIPPED, message=f'File exists: "{targetPath}".', output=None)
+
+    # Import in the worker, so that the main process does not load the model classes.
+    from novxlib.novx.cached_novx_file import CachedNovxFile
+    from novxlib.yw.yw7_stream_writer import Yw7StreamWriter
+    from nvlib.model.data.novel import Novel
+    from nvlib.model.data.nv_tree import NvTree
+    from nvlib.novx_globals import Error
+
+    try:
+        source = CachedNovxFile(sourcePath)
+        source.novel = Novel(tree=NvTree())
+        source.read()
+        target = Yw7StreamWriter(targetPath)
+        target.novel = source.novel
+        target.wcLog = source.wcLog
+        message = target.write()
+    except Error as ex:
+        return _get_result(sourcePath, f'!{str(ex)}')
+
+    return _get_result(sourcePath, message, targetPath)
+
+
+def convert_all_to_yw7(patterns, overwrite=False, maxWorkers=None, journalRunner=None):
+    """Convert the novx files matching directories or glob patterns on a process pool.
+    
+    Positional arguments:
+        patterns: list of str -- novx file paths, directories to search recursively, 
+                  or glob patterns.
+        
+    Optional arguments:
+        overwrite: bool -- if True, overwrite existing yw7 files.
+        maxWorkers: int -- maximum number of worker processes.
+        journalRunner: ResumableBatchRunner -- if set, run the conversions with its journal,
+                       so that files converted in an earlier run are skipped.
+
+    Generate result dictionaries as the conversions are completed. 
+    """
+    if journalRunner is not None:
+        for result in journalRunner.run(find_novx_files(patterns), [YW7_SUFFIX], _convert_to_yw7_list, (overwrite,)):
+            yield result
+
+        return
+
+    with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = {
+            executor.submit(convert_to_yw7, sourcePath, overwrite): sourcePath
+            for sourcePath in find_novx_files(patterns)
+            }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as ex:
+                yield _get_result(futures[future], f'!{str(ex)}')
+
+
+def _convert_to_yw7_list(sourcePath, suffixes, overwrite):
+    """Convert a novx file to yw7 as a ResumableBatchRunner task; return a list with the result dictionary."""
+    result = convert_to_yw7(sourcePath, overwrite)
+    result['suffix'] = YW7_SUFFIX
+    return [result]
+
+
+def _get_result(sourcePath, message, output=None):
+    """Return a result dictionary for a status message."""
+    if message.startswith('!'):
+        return dict(source=sourcePath, status=STATUS_ERROR, message=message[1:], output=None)
+
+    return dict(source=sourcePath, status=STATUS_OK, message=message, output=output)
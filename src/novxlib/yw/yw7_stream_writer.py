@@ -0,0 +1,332 @@
+"""Provide a class for writing yw7 files with an incremental XML writer.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from html import unescape
+import re
+from xml.sax.saxutils import XMLGenerator
+
+from novxlib.novx.atomic_file import get_temp_path
+from novxlib.novx.atomic_file import remove_temp_file
+from novxlib.novx.atomic_file import replace_file
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import Error
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import _
+from nvlib.novx_globals import norm_path
+
+_ID_NUMBER = re.compile(r'[0-9]+$')
+_MARKUP = re.compile(
+    r'<(/?)(p|em|strong|span|comment|note|note-citation|creator|date)(?:\s+([^>]*?))?\s*(/?)>|([^<]+)'
+    )
+_LANGUAGE = re.compile(r'xml:lang="([^"]*)"')
+_NOTE_CLASS = re.compile(r'class="([^"]*)"')
+
+
+class Yw7StreamWriter:
+    """yWriter 7 project file writer that streams the XML to the file.
+
+    The yw7 document is generated element by element with an XMLGenerator, 
+    so no element tree of the whole project is built.
+    The novx section content is converted to yWriter markup on the fly.
+    The word count log is read from the source's dictionary without copying.
+
+    Public methods:
+        write() -- write the yw7 file.
+
+    Public instance variables:
+        filePath: str -- path to the yw7 file.
+        novel: Novel -- the novel to write.
+        wcLog: dict -- word count log of the source, with ISO dates as keys
+                       and (count, total count) as values.
+
+    Class constants:
+        DESCRIPTION: str -- file type description.
+        EXTENSION: str -- file extension.
+        SUFFIX: str -- file name suffix.
+    """
+    DESCRIPTION = _('yWriter 7 project')
+    EXTENSION = '.yw7'
+    SUFFIX = ''
+
+    def __init__(self, filePath, **kwargs):
+        """Initialize instance variables.
+        
+        Positional arguments:
+            filePath: str -- path to the yw7 file.
+        """
+        self.filePath = filePath
+        self.novel = None
+        self.wcLog = {}
+        self._xml = None
+
+    def write(self):
+        """Write the yw7 file via a temporary file in the target directory.
+        
+        Return a message.
+        Raise the "Error" exception in case of error. 
+        """
+        tempPath = get_temp_path(self.filePath)
+        try:
+            with open(tempPath, 'x', encoding='utf-8', newline='\n') as f:
+                self._xml = XMLGenerator(f, encoding='utf-8', short_empty_elements=True)
+                self._xml.startDocument()
+                self._start('YWRITER7')
+                self._write_project()
+                self._write_locations()
+                self._write_items()
+                self._write_characters()
+                self._write_scenes()
+                self._write_chapters()
+                self._write_wc_log()
+                self._end('YWRITER7')
+                self._xml.endDocument()
+            replace_file(tempPath, self.filePath)
+        except Exception:
+            remove_temp_file(tempPath)
+            raise Error(f'{_("Cannot write file")}: "{norm_path(self.filePath)}".')
+
+        finally:
+            self._xml = None
+        return f'{_("File written")}: "{norm_path(self.filePath)}".'
+
+    def _end(self, name):
+        """Close an element, and start a new line."""
+        self._xml.endElement(name)
+        self._xml.ignorableWhitespace('\n')
+
+    def _get_content(self, xmlText):
+        """Return novx section content converted to yWriter markup.
+        
+        Paragraphs become lines, emphasis becomes [i] and [b], 
+        language spans become [lang=...], and comments and notes
+        become /* */ comments, as yWriter 7 stores them.
+        """
+        if not xmlText:
+            return ''
+
+        lines = []
+        text = []
+        spans = []
+        skip = 0
+        commentDepth = 0
+        for match in _MARKUP.finditer(xmlText):
+            closing, tag, attributes, empty, characters = match.groups()
+            if characters is not None:
+                if not skip:
+                    text.append(unescape(characters))
+            elif tag in ('note-citation', 'creator', 'date'):
+                # Omit the metadata of comments and notes.
+                if not empty:
+                    skip += -1 if closing else 1
+            elif tag == 'p':
+                if not (closing or empty):
+                    continue
+
+                if commentDepth:
+                    # Paragraphs within comments and notes do not start new lines.
+                    text.append(' ')
+                else:
+                    lines.append(''.join(text))
+                    text = []
+            elif tag == 'em':
+                text.append('[/i]' if closing else '[i]')
+            elif tag == 'strong':
+                text.append('[/b]' if closing else '[b]')
+            elif tag == 'span':
+                if closing:
+                    language = spans.pop() if spans else None
+                    if language:
+                        text.append(f'[/lang={language}]')
+                else:
+                    language = _LANGUAGE.search(attributes or '')
+                    language = language.group(1) if language else None
+                    if not empty:
+                        spans.append(language)
+                    if language:
+                        text.append(f'[lang={language}]')
+            elif closing:
+                # End of a comment or note.
+                commentDepth -= 1
+                if text and text[-1] == ' ':
+                    text.pop()
+                text.append('*/')
+            elif tag == 'comment':
+                commentDepth += 1
+                text.append('/*')
+            else:
+                noteClass = _NOTE_CLASS.search(attributes or '')
+                prefix = '@en' if noteClass and noteClass.group(1) == 'endnote' else '@fn'
+                commentDepth += 1
+                text.append(f'/*{prefix} ')
+        if text:
+            lines.append(''.join(text))
+        return '\n'.join(lines)
+
+    def _get_id(self, elemId):
+        """Return the number of a novx element ID, e.g. "3" for "sc3"."""
+        match = _ID_NUMBER.search(elemId)
+        if match is None:
+            return elemId
+
+        return match.group()
+
+    def _start(self, name):
+        """Open a parent element."""
+        self._xml.startElement(name, {})
+        self._xml.ignorableWhitespace('\n')
+
+    def _write(self, name, text):
+        """Write a text element, unless the text is empty."""
+        if text is None or text == '':
+            return
+
+        self._xml.startElement(name, {})
+        self._xml.characters(str(text))
+        self._end(name)
+
+    def _write_chapters(self):
+        """Write the chapters in tree order."""
+        self._start('CHAPTERS')
+        for sortOrder, chId in enumerate(self.novel.tree.get_children(CH_ROOT), start=1):
+            chapter = self.novel.chapters[chId]
+            self._start('CHAPTER')
+            self._write('ID', self._get_id(chId))
+            self._write('SortOrder', sortOrder)
+            self._write('Title', chapter.title)
+            self._write('Desc', chapter.desc)
+            if chapter.chLevel == 1:
+                self._write('SectionStart', -1)
+            self._write('Type', chapter.chType)
+            self._write('ChapterType', chapter.chType)
+            if chapter.chType:
+                self._write('Unused', -1)
+            sectionIds = self.novel.tree.get_children(chId)
+            if sectionIds:
+                self._start('Scenes')
+                for scId in sectionIds:
+                    self._write('ScID', self._get_id(scId))
+                self._end('Scenes')
+            self._end('CHAPTER')
+        self._end('CHAPTERS')
+
+    def _write_characters(self):
+        """Write the characters in tree order."""
+        self._start('CHARACTERS')
+        for crId in self.novel.tree.get_children(CR_ROOT):
+            character = self.novel.characters[crId]
+            self._start('CHARACTER')
+            self._write('ID', self._get_id(crId))
+            self._write('Title', character.title)
+            self._write('FullName', character.fullName)
+            self._write('AKA', character.aka)
+            self._write('Desc', character.desc)
+            self._write('Bio', character.bio)
+            self._write('Goals', character.goals)
+            self._write('Notes', character.notes)
+            self._write('Tags', ';'.join(character.tags or []))
+            if character.isMajor:
+                self._write('Major', -1)
+            self._end('CHARACTER')
+        self._end('CHARACTERS')
+
+    def _write_items(self):
+        """Write the items in tree order."""
+        self._write_world_elements('ITEMS', 'ITEM', IT_ROOT, self.novel.items)
+
+    def _write_locations(self):
+        """Write the locations in tree order."""
+        self._write_world_elements('LOCATIONS', 'LOCATION', LC_ROOT, self.novel.locations)
+
+    def _write_project(self):
+        """Write the project metadata."""
+        self._start('PROJECT')
+        self._write('Ver', 7)
+        self._write('Title', self.novel.title)
+        self._write('AuthorName', self.novel.authorName)
+        self._write('Desc', self.novel.desc)
+        self._write('WordTarget', self.novel.wordTarget)
+        self._write('WordCountStart', self.novel.wordCountStart)
+        self._end('PROJECT')
+
+    def _write_scenes(self):
+        """Write the sections in tree order, converting the content on the fly."""
+        self._start('SCENES')
+        for chId in self.novel.tree.get_children(CH_ROOT):
+            for scId in self.novel.tree.get_children(chId):
+                section = self.novel.sections[scId]
+                self._start('SCENE')
+                self._write('ID', self._get_id(scId))
+                self._write('Title', section.title)
+                self._write('Desc', section.desc)
+                self._write('SceneContent', self._get_content(section.sectionContent))
+                if section.scType:
+                    # yWriter has no stages, so they become unused scenes.
+                    self._write('Unused', -1)
+                self._write('Status', section.status)
+                self._write('Notes', section.notes)
+                self._write('Tags', ';'.join(section.tags or []))
+                if section.appendToPrev:
+                    self._write('AppendToPrev', -1)
+                if section.date:
+                    self._write('SpecificDateMode', -1)
+                    self._write('SpecificDateTime', f'{section.date} {section.time or "00:00:00"}')
+                else:
+                    self._write('Day', section.day)
+                    if section.time:
+                        hour, minute = section.time.split(':')[:2]
+                        self._write('Hour', hour)
+                        self._write('Minute', minute)
+                self._write('LastsDays', section.lastsDays)
+                self._write('LastsHours', section.lastsHours)
+                self._write('LastsMinutes', section.lastsMinutes)
+                if section.scene == 2:
+                    self._write('ReactionScene', -1)
+                self._write('Goal', section.goal)
+                self._write('Conflict', section.conflict)
+                self._write('Outcome', section.outcome)
+                for listName, idName, elemIds in (
+                    ('Characters', 'CharID', section.characters),
+                    ('Locations', 'LocID', section.locations),
+                    ('Items', 'ItemID', section.items),
+                ):
+                    if elemIds:
+                        self._start(listName)
+                        for elemId in elemIds:
+                            self._write(idName, self._get_id(elemId))
+                        self._end(listName)
+                self._end('SCENE')
+        self._end('SCENES')
+
+    def _write_wc_log(self):
+        """Write the word count log directly from the source's dictionary."""
+        if not self.wcLog:
+            return
+
+        self._start('WCLog')
+        for wcDate in sorted(self.wcLog):
+            count, totalCount = self.wcLog[wcDate][:2]
+            self._start('WC')
+            self._write('Date', wcDate)
+            self._write('Count', count)
+            self._write('TotalCount', totalCount)
+            self._end('WC')
+        self._end('WCLog')
+
+    def _write_world_elements(self, listName, elementName, rootId, elements):
+        """Write locations or items in tree order."""
+        self._start(listName)
+        for elemId in self.novel.tree.get_children(rootId):
+            element = elements[elemId]
+            self._start(elementName)
+            self._write('ID', self._get_id(elemId))
+            self._write('Title', element.title)
+            self._write('AKA', element.aka)
+            self._write('Desc', element.desc)
+            self._write('Tags', ';'.join(element.tags or []))
+            self._end(elementName)
+        self._end(listName)
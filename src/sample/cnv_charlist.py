@@ -12,7 +12,8 @@ License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
 """
 import sys
 
-from nvlib.model.converter.novx_converter import NovxConverter
+from novxlib.converter.novx_exporter import NovxExporter
+from novxlib.converter.novx_importer import NovxImporter
 from nvlib.novx_globals import CHARLIST_SUFFIX
 from mvclib.user_interface.ui_tk import UiTk
 
@@ -21,7 +22,10 @@ SUFFIX = CHARLIST_SUFFIX
 
 def run(sourcePath, suffix=''):
     ui = UiTk('novelibre import/export')
-    converter = NovxConverter()
+    if sourcePath.endswith('.novx'):
+        converter = NovxExporter()
+    else:
+        converter = NovxImporter()
     converter.ui = ui
     kwargs = {'suffix': suffix}
     converter.run(sourcePath, **kwargs)
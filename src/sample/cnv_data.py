@@ -20,7 +20,7 @@ def run(sourcePath, suffix=''):
     ui = UiTk('novelibre import/export')
     converter = NovxExporter()
     converter.ui = ui
-    converter.EXPORT_TARGET_CLASSES.append(DataWriter)
+    converter.exportTargets.register_class(DataWriter)
     kwargs = {'suffix': suffix}
     converter.run(sourcePath, **kwargs)
     ui.start()
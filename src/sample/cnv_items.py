@@ -11,7 +11,8 @@ License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
 """
 import sys
 
-from nvlib.model.converter.novx_converter import NovxConverter
+from novxlib.converter.novx_exporter import NovxExporter
+from novxlib.converter.novx_importer import NovxImporter
 from nvlib.novx_globals import ITEMS_SUFFIX
 from mvclib.user_interface.ui_tk import UiTk
 
@@ -20,7 +21,10 @@ SUFFIX = ITEMS_SUFFIX
 
 def run(sourcePath, suffix=''):
     ui = UiTk('novelibre import/export')
-    converter = NovxConverter()
+    if sourcePath.endswith('.novx'):
+        converter = NovxExporter()
+    else:
+        converter = NovxImporter()
     converter.ui = ui
     kwargs = {'suffix': suffix}
     converter.run(sourcePath, **kwargs)
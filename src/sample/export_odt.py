@@ -7,17 +7,16 @@ For further information see https://github.com/peter88213/novelibre
 License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
 """
 import sys
-from mvclib.user_interface.ui_tk import UiTk
-from nvlib.model.converter.novx_converter import NovxConverter
+from novxlib.converter.novx_exporter import NovxExporter
+from novxlib.ui.ui_progress_tk import UiProgressTk
 SUFFIX = ''
 
 
 def run(sourcePath, suffix=''):
-    ui = UiTk('novelibre import/export')
-    converter = NovxConverter()
-    converter.ui = ui
+    ui = UiProgressTk('novelibre import/export')
+    converter = NovxExporter()
     kwargs = {'suffix': suffix}
-    converter.run(sourcePath, **kwargs)
+    ui.run_conversion(converter, sourcePath, **kwargs)
     ui.start()
 
 
@@ -8,7 +8,7 @@ License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
 """
 import sys
 
-from nvlib.model.converter.novx_converter import NovxConverter
+from novxlib.converter.novx_exporter import NovxExporter
 from nvlib.novx_globals import PLOTLIST_SUFFIX
 from mvclib.user_interface.ui_tk import UiTk
 
@@ -17,7 +17,7 @@ SUFFIX = PLOTLIST_SUFFIX
 
 def run(sourcePath, suffix=''):
     ui = UiTk('novelibre import/export')
-    converter = NovxConverter()
+    converter = NovxExporter()
     converter.ui = ui
     kwargs = {'suffix': suffix}
     converter.run(sourcePath, **kwargs)
@@ -1,34 +1,49 @@
 """Convert novx to yw7.
 
+usage: export_yw7.py [-k] [-j JOBS] [--journal FILE] SOURCE [SOURCE ...]
+
+SOURCE can be a novx file, a directory to search recursively, or a glob pattern.
+Existing yw7 files are overwritten, as before; with -k, they are skipped.
+With --journal, an interrupted conversion can be resumed: 
+files converted in an earlier run with the same journal are skipped.
+
 Copyright (c) 2024 Peter Triesberger
 For further information see https://github.com/peter88213/yw2novx
 License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
 """
+import argparse
 import sys
-import os
-from novxlib.yw.yw7_file import Yw7File
-from nvlib.model.novx.novx_file import NovxFile
-from nvlib.model.data.novel import Novel
-from nvlib.model.data.nv_tree import NvTree
-SUFFIX = ''
-
-
-def main(sourcePath):
-    path, extension = os.path.splitext(sourcePath)
-    if extension != '.novx':
-        print(f'Error: File must be .novx type, but is "{extension}".')
-        return
-
-    targetPath = f'{path}.yw7'
-    source = NovxFile(sourcePath)
-    target = Yw7File(targetPath)
-    source.novel = Novel(tree=NvTree())
-    source.read()
-    target.novel = source.novel
-    target.wcLog = source.wcLog
-    target.write()
-    print('Done')
+
+from novxlib.converter.batch_converter import STATUS_OK
+from novxlib.converter.batch_converter import STATUS_SKIPPED
+from novxlib.converter.resumable_batch_runner import ResumableBatchRunner
+from novxlib.yw.yw7_bulk_converter import convert_all_to_yw7
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Convert novx projects to yw7.')
+    parser.add_argument('sources', nargs='+', metavar='SOURCE', help='novx file, directory, or glob pattern.')
+    parser.add_argument('-k', '--keep', action='store_true', help='skip sources whose yw7 file exists.')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes.')
+    parser.add_argument('--journal', metavar='FILE', default=None, help='journal file for resuming the conversion.')
+    options = parser.parse_args(args)
+    runner = None
+    if options.journal:
+        runner = ResumableBatchRunner(options.journal, options.jobs)
+    failed = 0
+    converted = 0
+    skipped = 0
+    for result in convert_all_to_yw7(options.sources, not options.keep, options.jobs, runner):
+        if result['status'] == STATUS_OK:
+            converted += 1
+        elif result['status'] == STATUS_SKIPPED:
+            skipped += 1
+        else:
+            failed += 1
+            print(f'Error: {result["source"]}: {result["message"]}')
+    print(f'Done: {converted} converted, {skipped} skipped, {failed} failed.')
+    return 1 if failed else 0
 
 
 if __name__ == '__main__':
-    main(sys.argv[1])
+    sys.exit(main())
@@ -10,15 +10,15 @@ License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
 """
 import sys
 from mvclib.user_interface.ui_tk import UiTk
+from novxlib.converter.streaming_new_project_factory import StreamingNewProjectFactory
 from nvlib.model.converter.converter_ff import ConverterFf
-from nvlib.model.converter.new_project_factory import NewProjectFactory
 SUFFIX = ''
 
 
 def run(sourcePath, suffix=''):
     ui = UiTk('novelibre import/export')
     converter = ConverterFf()
-    converter.newProjectFactory = NewProjectFactory([])
+    converter.newProjectFactory = StreamingNewProjectFactory([])
     converter.ui = ui
     kwargs = {'suffix': suffix}
     converter.run(sourcePath, **kwargs)
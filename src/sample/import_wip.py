@@ -10,13 +10,13 @@ License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
 """
 import sys
 from mvclib.user_interface.ui_tk import UiTk
-from nvlib.model.converter.novx_converter import NovxConverter
+from novxlib.converter.novx_importer import NovxImporter
 SUFFIX = ''
 
 
 def run(sourcePath, suffix=''):
     ui = UiTk('novelibre import/export')
-    converter = NovxConverter()
+    converter = NovxImporter()
     converter.ui = ui
     kwargs = {'suffix': suffix}
     converter.run(sourcePath, **kwargs)
@@ -0,0 +1,122 @@
+"""Regression test for the element hashes of the incremental export.
+
+Requires the nvlib package of novelibre; the test is skipped without it.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from datetime import date
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from novxlib.model.element_hashes import CHARACTERS
+    from novxlib.model.element_hashes import SECTIONS
+    from novxlib.model.element_hashes import get_changed_elements
+    from novxlib.model.element_hashes import get_element_hash
+    from novxlib.model.element_hashes import get_novel_hashes
+    from novxlib.model.element_hashes import get_part_digest
+    from nvlib.novx_globals import CH_ROOT
+    from nvlib.novx_globals import CR_ROOT
+except ImportError:
+    get_element_hash = None
+
+
+class Element:
+    """Element with arbitrary attributes."""
+
+    def __init__(self, **kwargs):
+        self.on_element_change = self.do_nothing
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def do_nothing(self):
+        pass
+
+
+class Tree:
+    """Minimal tree with the children of the nodes."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def get_children(self, node):
+        return self.nodes.get(node, [])
+
+
+def make_novel(title='Novel', characters=('cr1', 'cr2')):
+    """Return a novel with a chapter, two sections, and some characters."""
+    novel = Element(_title=title)
+    novel.tree = Tree({CH_ROOT: ['ch1'], 'ch1': ['sc1', 'sc2'], CR_ROOT: list(characters)})
+    novel.chapters = {'ch1': Element(_title='Chapter')}
+    novel.sections = {
+        'sc1': Element(_title='One', _characters=['cr1']),
+        'sc2': Element(_title='Two', _characters=['cr2']),
+        }
+    novel.characters = {crId: Element(_title=crId) for crId in characters}
+    novel.locations = {}
+    novel.items = {}
+    novel.plotLines = {}
+    novel.plotPoints = {}
+    novel.projectNotes = {}
+    return novel
+
+
+@unittest.skipIf(get_element_hash is None, 'nvlib is not installed')
+class ElementHashesTest(unittest.TestCase):
+
+    def test_stable_across_instances(self):
+        # Objects whose repr contains an address are not part of the hash.
+        first = Element(_title='Title', _tags=['a', 'b'], _helper=object())
+        second = Element(_title='Title', _tags=['a', 'b'], _helper=object())
+        self.assertEqual(get_element_hash(first), get_element_hash(second))
+
+    def test_unordered_collections(self):
+        first = Element(_links={'b': 2, 'a': 1}, _keys={'x', 'y', 'z'})
+        second = Element(_links={'a': 1, 'b': 2}, _keys={'z', 'y', 'x'})
+        self.assertEqual(get_element_hash(first), get_element_hash(second))
+
+    def test_data_changes(self):
+        element = Element(_title='Title', _date=date(2024, 1, 1), _notes=None)
+        elementHash = get_element_hash(element)
+        element._date = date(2024, 1, 2)
+        self.assertNotEqual(get_element_hash(element), elementHash)
+        element._date = date(2024, 1, 1)
+        self.assertEqual(get_element_hash(element), elementHash)
+        element._notes = ''
+        self.assertNotEqual(get_element_hash(element), elementHash)
+
+    def test_list_order(self):
+        self.assertNotEqual(
+            get_element_hash(Element(_characters=['cr1', 'cr2'])),
+            get_element_hash(Element(_characters=['cr2', 'cr1'])),
+            )
+
+    def test_novel_collections_ignored(self):
+        novel = make_novel()
+        novelHash = get_novel_hashes(novel)['project']['novel']
+        novel.characters['cr1']._title = 'Changed'
+        self.assertEqual(get_novel_hashes(novel)['project']['novel'], novelHash)
+
+    def test_changed_elements(self):
+        oldHashes = get_novel_hashes(make_novel())
+        novel = make_novel(characters=('cr1', 'cr3'))
+        novel.sections['sc2']._title = 'Changed'
+        changes = get_changed_elements(oldHashes, get_novel_hashes(novel))
+        self.assertEqual(changes[SECTIONS], ['sc2'])
+        self.assertEqual(sorted(changes[CHARACTERS]), ['cr2', 'cr3'])
+        self.assertEqual(set(changes), {SECTIONS, CHARACTERS})
+
+    def test_reordered_elements(self):
+        oldHashes = get_novel_hashes(make_novel())
+        newHashes = get_novel_hashes(make_novel(characters=('cr2', 'cr1')))
+        self.assertEqual(get_changed_elements(oldHashes, newHashes), {CHARACTERS: []})
+        self.assertNotEqual(get_part_digest(oldHashes[CHARACTERS]), get_part_digest(newHashes[CHARACTERS]))
+
+
+if __name__ == '__main__':
+    unittest.main()
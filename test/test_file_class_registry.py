@@ -0,0 +1,107 @@
+"""Regression test for the registry of file classes.
+
+Requires the nvlib package of novelibre; the test is skipped without it.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+import sys
+import unittest
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from novxlib.converter.file_class_registry import FileClassList
+    from novxlib.converter.file_class_registry import FileClassRegistry
+    from nvlib.novx_globals import Error
+except ImportError:
+    FileClassRegistry = None
+
+
+class Manuscript:
+    SUFFIX = '_manuscript'
+    EXTENSION = '.odt'
+
+
+class Proofread:
+    SUFFIX = '_proof'
+    EXTENSION = '.odt'
+
+
+class Project:
+    SUFFIX = None
+    EXTENSION = '.novx'
+
+
+class CharacterList:
+    SUFFIX = '_charlist'
+    EXTENSION = '.ods'
+
+
+@unittest.skipIf(FileClassRegistry is None, 'nvlib is not installed')
+class FileClassRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = FileClassRegistry([
+            (Manuscript.SUFFIX, Manuscript.EXTENSION, Manuscript),
+            (Project.SUFFIX, Project.EXTENSION, Project),
+            ])
+
+    def test_get_class(self):
+        self.assertIs(self.registry.get_class('_manuscript'), Manuscript)
+        self.assertIs(self.registry.get_class(None), Project)
+        self.assertIs(self.registry.get_class(''), Project)
+        self.assertIsNone(self.registry.get_class('_proof'))
+
+    def test_find_class(self):
+        self.assertIs(self.registry.find_class('/home/my_novel_manuscript.odt'), Manuscript)
+        self.assertIsNone(self.registry.find_class('/home/my_novel_manuscript.ods'))
+        self.assertIsNone(self.registry.find_class('/home/novel.odt'))
+
+    def test_find_most_specific_suffix(self):
+        self.registry.register('_novel_manuscript', '.odt', Proofread)
+        self.assertIs(self.registry.find_class('my_novel_manuscript.odt'), Proofread)
+        self.assertIs(self.registry.find_class('novel_manuscript.odt'), Manuscript)
+
+    def test_lazy_import(self):
+        self.registry.register('_charlist', '.ods', f'{__name__}.CharacterList')
+        self.assertIn('_charlist', self.registry.get_suffixes())
+        self.assertIs(self.registry.get_class('_charlist'), CharacterList)
+        self.assertIs(self.registry.find_class('novel_charlist.ods'), CharacterList)
+
+    def test_wrong_dotted_path(self):
+        self.registry.register('_charlist', '.odt', f'{__name__}.CharacterList')
+        with self.assertRaises(Error):
+            self.registry.get_class('_charlist')
+
+    def test_register_class_and_unregister(self):
+        self.registry.register_class(Proofread)
+        self.assertIs(self.registry.get_class('_proof'), Proofread)
+        self.registry.unregister('_proof', '.odt')
+        self.assertIsNone(self.registry.get_class('_proof'))
+        self.assertNotIn(Proofread, self.registry.get_classes())
+        self.registry.unregister('_proof', '.odt')
+
+    def test_copy(self):
+        registry = self.registry.copy()
+        registry.register_class(Proofread)
+        self.assertIs(registry.get_class('_manuscript'), Manuscript)
+        self.assertIsNone(self.registry.get_class('_proof'))
+
+    def test_class_list(self):
+        classList = FileClassList(self.registry)
+        self.assertEqual(len(classList), 2)
+        self.assertIn(Manuscript, classList)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            classList.append(Proofread)
+            classList.remove(Manuscript)
+        self.assertEqual([warning.category for warning in caught], [DeprecationWarning, DeprecationWarning])
+        self.assertEqual(set(classList), {Project, Proofread})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Regression test for the shared and exclusive file locks.
+
+Requires the nvlib package of novelibre; the test is skipped without it.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from novxlib.novx import file_lock
+    from novxlib.novx.file_lock import FileLock
+    from novxlib.novx.file_lock import get_file_lock
+    from nvlib.novx_globals import Error
+except ImportError:
+    FileLock = None
+
+TIMEOUT = 0.2
+
+
+def get_dead_pid():
+    """Return the ID of a process that has finished."""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+@unittest.skipIf(FileLock is None, 'nvlib is not installed')
+class FileLockTest(unittest.TestCase):
+    """Two FileLock instances for the same file behave like two processes."""
+
+    def setUp(self):
+        self.testDir = tempfile.mkdtemp()
+        self.filePath = os.path.join(self.testDir, 'novel.novx')
+        self.lock = FileLock(self.filePath, pollInterval=0.01)
+        self.otherLock = FileLock(self.filePath, pollInterval=0.01)
+
+    def tearDown(self):
+        shutil.rmtree(self.testDir, ignore_errors=True)
+
+    def test_shared_locks(self):
+        with self.lock.shared():
+            with self.otherLock.shared(timeout=TIMEOUT):
+                pass
+
+    def test_exclusive_excludes_shared(self):
+        with self.lock.exclusive():
+            with self.assertRaises(Error):
+                with self.otherLock.shared(timeout=TIMEOUT):
+                    pass
+
+        with self.otherLock.shared(timeout=TIMEOUT):
+            pass
+
+    def test_shared_excludes_exclusive(self):
+        with self.lock.shared():
+            with self.assertRaises(Error):
+                with self.otherLock.exclusive(timeout=TIMEOUT):
+                    pass
+
+    def test_reentrant(self):
+        with self.lock.exclusive():
+            with self.lock.exclusive():
+                with self.lock.shared():
+                    pass
+
+            with self.assertRaises(Error):
+                with self.otherLock.shared(timeout=TIMEOUT):
+                    pass
+
+    def test_no_upgrade(self):
+        with self.lock.shared():
+            with self.assertRaises(Error):
+                with self.lock.exclusive(timeout=TIMEOUT):
+                    pass
+
+    def test_lock_file_removed(self):
+        with self.lock.shared():
+            with self.otherLock.shared():
+                pass
+
+            self.assertTrue(os.path.isfile(self.lock.lockPath))
+        self.assertEqual(os.listdir(self.testDir), [])
+
+    def test_waiting(self):
+        acquired = threading.Event()
+        released = []
+
+        def hold_lock():
+            with self.otherLock.exclusive():
+                acquired.set()
+                time.sleep(TIMEOUT)
+                released.append(True)
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        acquired.wait()
+        with self.lock.exclusive(timeout=10):
+            self.assertEqual(released, [True])
+        thread.join()
+
+    def test_process_wide_instance(self):
+        self.assertIs(get_file_lock(self.filePath), get_file_lock(os.path.join(self.testDir, '.', 'novel.novx')))
+
+
+@unittest.skipIf(FileLock is None, 'nvlib is not installed')
+class MarkerFileLockTest(FileLockTest):
+    """The same tests with lock marker files instead of flock()."""
+
+    def setUp(self):
+        self.fcntl = file_lock.fcntl
+        file_lock.fcntl = None
+        super().setUp()
+
+    def tearDown(self):
+        file_lock.fcntl = self.fcntl
+        super().tearDown()
+
+    def test_lock_file_removed(self):
+        with self.lock.shared():
+            pass
+
+        self.assertEqual(os.listdir(self.testDir), [])
+
+    def test_stale_marker(self):
+        with open(f'{self.lock.lockPath}.x', 'w', encoding='utf-8') as f:
+            json.dump(dict(host=socket.gethostname(), pid=get_dead_pid(), time=time.time()), f)
+        with self.lock.shared(timeout=TIMEOUT):
+            pass
+
+        self.assertEqual(os.listdir(self.testDir), [])
+
+    def test_marker_of_other_host(self):
+        with open(f'{self.lock.lockPath}.x', 'w', encoding='utf-8') as f:
+            json.dump(dict(host=f'other-{socket.gethostname()}', pid=1, time=time.time() - 60), f)
+        with self.assertRaises(Error):
+            with self.lock.shared(timeout=TIMEOUT):
+                pass
+
+        self.lock.staleAge = 30
+        with self.lock.shared(timeout=TIMEOUT):
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+"""Regression test for the streaming HTML import.
+
+Requires the nvlib package of novelibre; the test is skipped without it.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from novxlib.html.html_import_stream import HtmlImportStream
+    from novxlib.html.html_outline_stream import HtmlOutlineStream
+    from nvlib.model.data.novel import Novel
+    from nvlib.model.data.nv_tree import NvTree
+    from nvlib.novx_globals import CH_ROOT
+    from nvlib.novx_globals import Error
+except ImportError:
+    HtmlImportStream = None
+
+OUTLINE = '''<!DOCTYPE html>
+<html lang="de-CH">
+<head>
+<meta charset="utf-8">
+<meta name="author" content="Jane Doe">
+<meta name="description" content="A novel for testing.">
+<title>Outline   test</title>
+</head>
+<body>
+<h3>Lost section</h3>
+<p>Text before the first chapter.</p>
+<h1>Part One</h1>
+<p>The beginning.</p>
+<h2>The Harbour</h2>
+<p>Arrival of the ship.</p>
+<p>Müller meets the keeper.</p>
+<h3>Fog</h3>
+<p>The lighthouse
+   keeper watches the fog.</p>
+<h3>Storm</h3>
+<!-- A comment -->
+<h2>The Town</h2>
+</body>
+</html>
+'''
+WIP = '''<html>
+<body>
+<p>Preface before the first chapter.</p>
+<h2>The Harbour</h2>
+<!-- Fog -->
+<p>The old lighthouse keeper watched the <i>fog</i> &amp; the <b>sea</b>.
+<p>Line one<br>line two.</p>
+<p>* * *</p>
+<p>One two three four five six seven eight nine ten.</p>
+<h2>The Town</h2>
+<h2>The Market</h2>
+<p>Bread &lt;fresh&gt;.</p>
+</body>
+</html>
+'''
+
+
+@unittest.skipIf(HtmlImportStream is None, 'nvlib is not installed')
+class HtmlStreamReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.testDir, ignore_errors=True)
+
+    def read(self, readerClass, text, chunkSize=65536):
+        filePath = os.path.join(self.testDir, 'novel.html')
+        with open(filePath, 'w', encoding='utf-8') as f:
+            f.write(text)
+        reader = readerClass(filePath, chunkSize=chunkSize)
+        reader.novel = Novel(tree=NvTree())
+        reader.read()
+        return reader.novel
+
+    def get_sections(self, novel, chId):
+        return [novel.sections[scId] for scId in novel.tree.get_children(chId)]
+
+    def test_metadata(self):
+        novel = self.read(HtmlOutlineStream, OUTLINE)
+        self.assertEqual(novel.title, 'Outline test')
+        self.assertEqual(novel.authorName, 'Jane Doe')
+        self.assertEqual(novel.desc, 'A novel for testing.')
+        self.assertEqual((novel.languageCode, novel.countryCode), ('de', 'CH'))
+
+    def test_outline(self):
+        novel = self.read(HtmlOutlineStream, OUTLINE)
+        self.assertEqual(novel.tree.get_children(CH_ROOT), ['ch1', 'ch2', 'ch3'])
+        self.assertEqual(
+            [(chapter.title, chapter.chLevel, chapter.desc) for chapter in novel.chapters.values()],
+            [
+                ('Part One', 1, 'The beginning.'),
+                ('The Harbour', 2, 'Arrival of the ship.\nMüller meets the keeper.'),
+                ('The Town', 2, None),
+                ],
+            )
+        self.assertEqual(novel.tree.get_children('ch1'), [])
+        self.assertEqual(
+            [(section.title, section.desc) for section in self.get_sections(novel, 'ch2')],
+            [('Fog', 'The lighthouse keeper watches the fog.'), ('Storm', None)],
+            )
+        self.assertEqual(len(novel.sections), 2)
+
+    def test_work_in_progress(self):
+        novel = self.read(HtmlImportStream, WIP)
+        self.assertEqual(novel.tree.get_children(CH_ROOT), ['ch1', 'ch2', 'ch3'])
+        sections = self.get_sections(novel, 'ch1')
+        self.assertEqual([section.title for section in sections], ['Fog', None])
+        self.assertEqual(
+            sections[0].sectionContent,
+            '<p>The old lighthouse keeper watched the <em>fog</em> &amp; the <strong>sea</strong>.</p>'
+            '<p>Line one line two.</p>',
+            )
+        self.assertEqual(sections[1].sectionContent, '<p>One two three four five six seven eight nine ten.</p>')
+        self.assertEqual([section.status for section in sections], [2, 2])
+        self.assertEqual(novel.tree.get_children('ch2'), [])
+        sections = self.get_sections(novel, 'ch3')
+        self.assertEqual(sections[0].sectionContent, '<p>Bread &lt;fresh&gt;.</p>')
+        self.assertEqual(sections[0].status, 1)
+        self.assertEqual(len(novel.sections), 3)
+
+    def test_chunk_boundaries(self):
+        for readerClass, text in ((HtmlOutlineStream, OUTLINE), (HtmlImportStream, WIP)):
+            expected = self.read(readerClass, text)
+            for chunkSize in (1, 7):
+                novel = self.read(readerClass, text, chunkSize=chunkSize)
+                self.assertEqual(novel.title, expected.title)
+                self.assertEqual(
+                    [vars(chapter) for chapter in novel.chapters.values()],
+                    [vars(chapter) for chapter in expected.chapters.values()],
+                    )
+                self.assertEqual(
+                    [vars(section) for section in novel.sections.values()],
+                    [vars(section) for section in expected.sections.values()],
+                    )
+
+    def test_reread(self):
+        filePath = os.path.join(self.testDir, 'novel.html')
+        with open(filePath, 'w', encoding='utf-8') as f:
+            f.write(WIP)
+        reader = HtmlImportStream(filePath)
+        reader.novel = Novel(tree=NvTree())
+        reader.read()
+        reader.novel = Novel(tree=NvTree())
+        reader.read()
+        self.assertEqual(list(reader.novel.chapters), ['ch1', 'ch2', 'ch3'])
+        self.assertEqual(list(reader.novel.sections), ['sc1', 'sc2', 'sc3'])
+
+    def test_missing_file(self):
+        reader = HtmlOutlineStream(os.path.join(self.testDir, 'missing.html'))
+        reader.novel = Novel(tree=NvTree())
+        with self.assertRaises(Error):
+            reader.read()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Regression test for rendering a document from a NovelSnapshot.
+
+Requires the nvlib package of novelibre; the test is skipped without it.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from novxlib.model.novel_snapshot import NovelSnapshot
+    from novxlib.odt.odt_w_manuscript_stream import OdtWManuscriptStream
+    from test_odt_manuscript_stream import make_novel
+    from test_odt_manuscript_stream import read_component
+except ImportError:
+    NovelSnapshot = None
+
+
+@unittest.skipIf(NovelSnapshot is None, 'nvlib is not installed')
+class NovelSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.testDir, ignore_errors=True)
+
+    def write_manuscript(self, novel, fileName):
+        filePath = os.path.join(self.testDir, fileName)
+        target = OdtWManuscriptStream(filePath)
+        target.novel = novel
+        target.write()
+        return filePath
+
+    def test_render_from_snapshot(self):
+        snapshot = NovelSnapshot(make_novel())
+        snapshotPath = self.write_manuscript(snapshot.get_view(), 'snapshot_manuscript.odt')
+        novelPath = self.write_manuscript(make_novel(), 'novel_manuscript.odt')
+        self.assertEqual(read_component(snapshotPath, 'content.xml'), read_component(novelPath, 'content.xml'))
+        self.assertIn('Jane Doe', read_component(snapshotPath, 'meta.xml'))
+
+    def test_snapshot_read_only(self):
+        snapshot = NovelSnapshot(make_novel())
+        with self.assertRaises(AttributeError):
+            snapshot.languages = []
+        with self.assertRaises(AttributeError):
+            snapshot.sections['sc11'].title = 'Changed'
+
+    def test_view(self):
+        snapshot = NovelSnapshot(make_novel())
+        view = snapshot.get_view()
+        view.languages = ['de-DE']
+        self.assertEqual(view.languages, ['de-DE'])
+        self.assertIsNone(snapshot.languages)
+        self.assertIsNone(snapshot.get_view().languages)
+        self.assertIs(view.sections, snapshot.sections)
+        with self.assertRaises(AttributeError):
+            view.sections = {}
+        with self.assertRaises(AttributeError):
+            view.tree = None
+
+    def test_content_decoded(self):
+        snapshot = pickle.loads(pickle.dumps(NovelSnapshot(make_novel())))
+        self.assertEqual(snapshot.sections['sc23'].sectionContent, '<p>This is section 2.3.</p>')
+        self.assertEqual(snapshot.tree.get_children('ch2'), ('sc21', 'sc22', 'sc23', 'sc24'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Regression test for the manuscript export via OdfStreamWriter.
+
+Requires the nvlib package of novelibre; the test is skipped without it.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from novxlib.odt.odt_w_manuscript_stream import OdtWManuscriptStream
+    from nvlib.model.data.chapter import Chapter
+    from nvlib.model.data.novel import Novel
+    from nvlib.model.data.nv_tree import NvTree
+    from nvlib.model.data.section import Section
+    from nvlib.model.odt.odt_w_manuscript import OdtWManuscript
+    from nvlib.novx_globals import CH_ROOT
+except ImportError:
+    OdtWManuscriptStream = None
+
+CHAPTERS = 3
+SECTIONS_PER_CHAPTER = 4
+
+
+def make_novel():
+    """Return a small novel with some chapters and sections."""
+    novel = Novel(tree=NvTree())
+    novel.title = 'Streaming test'
+    novel.authorName = 'Jane Doe'
+    novel.desc = 'A novel for testing.'
+    novel.languageCode = 'en'
+    novel.countryCode = 'US'
+    for chNumber in range(1, CHAPTERS + 1):
+        chId = f'ch{chNumber}'
+        novel.chapters[chId] = Chapter(title=f'Chapter {chNumber}', chLevel=2, chType=0)
+        novel.tree.append(CH_ROOT, chId)
+        for scNumber in range(1, SECTIONS_PER_CHAPTER + 1):
+            scId = f'sc{chNumber}{scNumber}'
+            section = Section(title=f'Section {chNumber}.{scNumber}', scType=0, status=1)
+            section.sectionContent = f'<p>This is section {chNumber}.{scNumber}.</p>'
+            novel.sections[scId] = section
+            novel.tree.append(chId, scId)
+    return novel
+
+
+def read_component(filePath, component):
+    """Return a package component as text."""
+    with zipfile.ZipFile(filePath) as odfFile:
+        return odfFile.read(component).decode('utf-8')
+
+
+@unittest.skipIf(OdtWManuscriptStream is None, 'nvlib is not installed')
+class OdtWManuscriptStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testDir = tempfile.mkdtemp()
+        self.filePath = os.path.join(self.testDir, 'test_manuscript.odt')
+
+    def tearDown(self):
+        shutil.rmtree(self.testDir, ignore_errors=True)
+
+    def write_stream(self, novel=None):
+        if novel is None:
+            novel = make_novel()
+        target = OdtWManuscriptStream(self.filePath)
+        target.novel = novel
+        target.write()
+        return novel
+
+    def test_content_equals_upstream_writer(self):
+        referencePath = os.path.join(self.testDir, 'reference_manuscript.odt')
+        reference = OdtWManuscript(referencePath)
+        reference.novel = make_novel()
+        reference.write()
+        self.write_stream()
+        self.assertEqual(
+            read_component(self.filePath, 'content.xml'),
+            read_component(referencePath, 'content.xml'),
+            )
+
+    def test_package_layout(self):
+        self.write_stream()
+        with zipfile.ZipFile(self.filePath) as odfFile:
+            infos = odfFile.infolist()
+            self.assertEqual(infos[0].filename, 'mimetype')
+            self.assertEqual(infos[0].compress_type, zipfile.ZIP_STORED)
+            names = odfFile.namelist()
+        for component in ('content.xml', 'meta.xml', 'styles.xml', 'META-INF/manifest.xml'):
+            self.assertIn(component, names)
+        content = read_component(self.filePath, 'content.xml')
+        for chNumber in range(1, CHAPTERS + 1):
+            for scNumber in range(1, SECTIONS_PER_CHAPTER + 1):
+                self.assertIn(f'This is section {chNumber}.{scNumber}.', content)
+        self.assertIn('Jane Doe', read_component(self.filePath, 'meta.xml'))
+
+    def test_languages_collected(self):
+        novel = make_novel()
+        novel.languages = None
+        self.write_stream(novel)
+        self.assertIsNotNone(novel.languages)
+
+    def test_backup(self):
+        self.write_stream()
+        with open(self.filePath, 'rb') as f:
+            firstPackage = f.read()
+        self.write_stream()
+        with open(f'{self.filePath}.bak', 'rb') as f:
+            self.assertEqual(f.read(), firstPackage)
+        self.assertEqual(sorted(os.listdir(self.testDir)), ['test_manuscript.odt', 'test_manuscript.odt.bak'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+"""Regression test for the batch journal and the resumable batch runner.
+
+Requires the nvlib package of novelibre; the test is skipped without it.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from novxlib.converter.batch_converter import STATUS_ERROR
+    from novxlib.converter.batch_converter import STATUS_OK
+    from novxlib.converter.batch_converter import STATUS_SKIPPED
+    from novxlib.converter.batch_journal import BatchJournal
+    from novxlib.converter.resumable_batch_runner import ResumableBatchRunner
+except ImportError:
+    BatchJournal = None
+
+SUFFIXES = ['_manuscript', '_proof']
+
+
+def count_call(sourcePath):
+    """Record a call of a task for a source, and return the number of calls."""
+    with open(f'{sourcePath}.calls', 'a', encoding='utf-8') as f:
+        f.write('.')
+    with open(f'{sourcePath}.calls', 'r', encoding='utf-8') as f:
+        return len(f.read())
+
+
+def get_results(sourcePath, suffixes, status, message):
+    return [
+        dict(source=sourcePath, suffix=suffix, status=status, message=message, output=None)
+        for suffix in suffixes
+        ]
+
+
+def convert(sourcePath, suffixes):
+    """Task that succeeds; a source named "crash" crashes the worker, one named "error" fails."""
+    count_call(sourcePath)
+    fileName = os.path.basename(sourcePath)
+    if fileName.startswith('crash'):
+        os._exit(1)
+    if fileName.startswith('error'):
+        return get_results(sourcePath, suffixes, STATUS_ERROR, 'Failed.')
+
+    return get_results(sourcePath, suffixes, STATUS_OK, 'Written.')
+
+
+def convert_second_time(sourcePath, suffixes):
+    """Task that fails at the first call."""
+    if count_call(sourcePath) == 1:
+        raise RuntimeError('First call.')
+
+    return get_results(sourcePath, suffixes, STATUS_OK, 'Written.')
+
+
+def skip(sourcePath, suffixes):
+    """Task that reports existing targets."""
+    count_call(sourcePath)
+    return get_results(sourcePath, suffixes, STATUS_SKIPPED, 'File exists.')
+
+
+def get_calls(sourcePath):
+    try:
+        with open(f'{sourcePath}.calls', 'r', encoding='utf-8') as f:
+            return len(f.read())
+    except FileNotFoundError:
+        return 0
+
+
+class BrokenPoolRunner(ResumableBatchRunner if BatchJournal is not None else object):
+    """Runner whose pool appears broken at the first submission."""
+    broken = True
+
+    def _submit(self, executor, futures, job, task, taskArgs):
+        if self.broken:
+            self.broken = False
+            return False
+
+        return super()._submit(executor, futures, job, task, taskArgs)
+
+
+@unittest.skipIf(BatchJournal is None, 'nvlib is not installed')
+class BatchJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testDir = tempfile.mkdtemp()
+        self.journalPath = os.path.join(self.testDir, 'batch.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.testDir, ignore_errors=True)
+
+    def test_record(self):
+        journal = BatchJournal(self.journalPath)
+        journal.record('/novel.novx', '_manuscript', 'hash1', STATUS_OK, 'Written.', 1)
+        journal.record('/novel.novx', '_proof', 'hash1', STATUS_ERROR, 'Failed.', 1)
+        self.assertTrue(journal.is_done('/novel.novx', '_manuscript', 'hash1'))
+        self.assertFalse(journal.is_done('/novel.novx', '_manuscript', 'hash2'))
+        self.assertFalse(journal.is_done('/novel.novx', '_proof', 'hash1'))
+        journal.record('/novel.novx', '_manuscript', 'hash1', STATUS_ERROR, 'Failed.', 1)
+        self.assertFalse(journal.is_done('/novel.novx', '_manuscript', 'hash1'))
+        journal.close()
+
+    def test_reopen(self):
+        journal = BatchJournal(self.journalPath)
+        journal.record('/novel.novx', '_manuscript', 'hash1', STATUS_OK, 'Written.', 1)
+        journal.record('/outline.html', None, 'hash2', STATUS_OK, 'Imported.', 2)
+        journal.close()
+        journal = BatchJournal(self.journalPath)
+        self.assertTrue(journal.is_done('/novel.novx', '_manuscript', 'hash1'))
+        self.assertTrue(journal.is_done('/outline.html', None, 'hash2'))
+        journal.close()
+
+    def test_cut_off_line(self):
+        journal = BatchJournal(self.journalPath)
+        journal.record('/novel.novx', '_manuscript', 'hash1', STATUS_OK, 'Written.', 1)
+        journal.close()
+        with open(self.journalPath, 'a', encoding='utf-8') as f:
+            f.write('{"source": "/novel.novx", "suffix": "_proof", "ha')
+        journal = BatchJournal(self.journalPath)
+        self.assertFalse(journal.is_done('/novel.novx', '_proof', 'hash1'))
+        journal.record('/novel.novx', '_proof', 'hash1', STATUS_OK, 'Written.', 1)
+        journal.close()
+        journal = BatchJournal(self.journalPath)
+        self.assertTrue(journal.is_done('/novel.novx', '_manuscript', 'hash1'))
+        self.assertTrue(journal.is_done('/novel.novx', '_proof', 'hash1'))
+        journal.close()
+
+
+@unittest.skipIf(BatchJournal is None, 'nvlib is not installed')
+class ResumableBatchRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testDir = tempfile.mkdtemp()
+        self.journalPath = os.path.join(self.testDir, 'batch.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.testDir, ignore_errors=True)
+
+    def make_source(self, fileName, text='novel'):
+        sourcePath = os.path.join(self.testDir, fileName)
+        with open(sourcePath, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return sourcePath
+
+    def run_batch(self, sourcePaths, task=convert, runnerClass=None):
+        if runnerClass is None:
+            runnerClass = ResumableBatchRunner
+        runner = runnerClass(self.journalPath, maxWorkers=2, baseDelay=0.01, maxDelay=0.05)
+        results = list(runner.run(sourcePaths, SUFFIXES, task))
+        return sorted((os.path.basename(r['source']), r['suffix'], r['status']) for r in results), runner.get_summary()
+
+    def test_resume(self):
+        sourcePaths = [self.make_source('a.novx'), self.make_source('b.novx')]
+        results, summary = self.run_batch(sourcePaths)
+        self.assertEqual([status for __, __, status in results], [STATUS_OK] * 4)
+        self.assertEqual(summary['succeeded'], 4)
+        results, summary = self.run_batch(sourcePaths)
+        self.assertEqual([status for __, __, status in results], [STATUS_SKIPPED] * 4)
+        self.assertEqual((summary['total'], summary['skipped'], summary['succeeded']), (4, 4, 0))
+        self.assertEqual(get_calls(sourcePaths[0]), 1)
+
+    def test_changed_source(self):
+        sourcePath = self.make_source('a.novx')
+        self.run_batch([sourcePath])
+        self.make_source('a.novx', 'changed novel')
+        results, __ = self.run_batch([sourcePath])
+        self.assertEqual(results, [('a.novx', '_manuscript', STATUS_OK), ('a.novx', '_proof', STATUS_OK)])
+
+    def test_retry(self):
+        sourcePath = self.make_source('a.novx')
+        results, summary = self.run_batch([sourcePath], convert_second_time)
+        self.assertEqual([status for __, __, status in results], [STATUS_OK] * 2)
+        self.assertEqual(get_calls(sourcePath), 2)
+        self.assertEqual(summary['failed'], 0)
+
+    def test_failure_summary(self):
+        sourcePaths = [self.make_source('a.novx'), self.make_source('error.novx')]
+        results, summary = self.run_batch(sourcePaths)
+        self.assertIn(('error.novx', '_proof', STATUS_ERROR), results)
+        self.assertEqual(get_calls(sourcePaths[1]), 3)
+        self.assertEqual((summary['succeeded'], summary['failed']), (2, 2))
+        self.assertEqual({failure['attempts'] for failure in summary['failures']}, {3})
+        results, summary = self.run_batch(sourcePaths)
+        self.assertEqual((summary['skipped'], summary['failed']), (2, 2))
+
+    def test_skipped_by_task(self):
+        sourcePath = self.make_source('a.novx')
+        results, summary = self.run_batch([sourcePath], skip)
+        self.assertEqual([status for __, __, status in results], [STATUS_SKIPPED] * 2)
+        self.assertEqual(get_calls(sourcePath), 1)
+        self.assertEqual((summary['skipped'], summary['failed']), (2, 0))
+
+    def test_worker_crash(self):
+        sourcePaths = [self.make_source('a.novx'), self.make_source('crash.novx'), self.make_source('b.novx')]
+        results, summary = self.run_batch(sourcePaths)
+        self.assertEqual(summary['succeeded'], 4)
+        self.assertEqual([failure['source'] for failure in summary['failures']], [sourcePaths[1]] * 2)
+        self.assertIn(('crash.novx', '_manuscript', STATUS_ERROR), results)
+
+    def test_missing_source(self):
+        results, summary = self.run_batch([os.path.join(self.testDir, 'missing.novx')])
+        self.assertEqual([status for __, __, status in results], [STATUS_ERROR] * 2)
+        self.assertEqual(summary['failed'], 2)
+
+    def test_pool_broken_before_submission(self):
+        sourcePath = self.make_source('a.novx')
+        results, summary = self.run_batch([sourcePath], runnerClass=BrokenPoolRunner)
+        self.assertEqual([status for __, __, status in results], [STATUS_OK] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
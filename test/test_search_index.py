@@ -0,0 +1,144 @@
+"""Regression test for the full-text search index.
+
+Requires the nvlib package of novelibre; the test is skipped without it.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from novxlib.search.search_index import SearchIndex
+except ImportError:
+    SearchIndex = None
+
+NOVX_TEMPLATE = '''<?xml version="1.0" encoding="utf-8"?>
+<novx version="1.4" xml:lang="en-US">
+<PROJECT><Title>Search test</Title></PROJECT>
+<CHAPTERS>
+<CHAPTER id="ch1">
+<Title>The Harbour</Title>
+<Desc>Arrival of the ship</Desc>
+<SECTION id="sc1">
+<Title>Fog</Title>
+<Content><p>The old lighthouse keeper watched the fog.</p></Content>
+</SECTION>
+<SECTION id="sc2">
+<Title>Storm</Title>
+<Notes>Check the weather</Notes>
+<Content><p>{content}</p></Content>
+</SECTION>
+</CHAPTER>
+<CHAPTER id="ch2">
+<Title>The Town</Title>
+<SECTION id="sc3">
+<Title>Market</Title>
+<Content><p>The keeper bought bread at the market.</p></Content>
+</SECTION>
+</CHAPTER>
+</CHAPTERS>
+</novx>
+'''
+
+
+@unittest.skipIf(SearchIndex is None, 'nvlib is not installed')
+class SearchIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testDir = tempfile.mkdtemp()
+        self.indexDir = os.path.join(self.testDir, 'index')
+        self.filePath = self.write_project('novel.novx', 'A storm hit the lighthouse at night.')
+        self.index = SearchIndex(self.indexDir)
+        self.index.update([self.filePath])
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.testDir, ignore_errors=True)
+
+    def write_project(self, fileName, content):
+        filePath = os.path.join(self.testDir, fileName)
+        with open(filePath, 'w', encoding='utf-8') as f:
+            f.write(NOVX_TEMPLATE.format(content=content))
+        return filePath
+
+    def test_words(self):
+        self.assertEqual(self.index.search('lighthouse'), [
+            (self.filePath, 'ch1', 'sc1'),
+            (self.filePath, 'ch1', 'sc2'),
+            ])
+        self.assertEqual(self.index.search('KEEPER lighthouse'), [(self.filePath, 'ch1', 'sc1')])
+        self.assertEqual(self.index.search('weather'), [(self.filePath, 'ch1', 'sc2')])
+        self.assertEqual(self.index.search('submarine'), [])
+        self.assertEqual(self.index.search(''), [])
+
+    def test_chapter_texts(self):
+        self.assertEqual(self.index.search('arrival'), [(self.filePath, 'ch1', None)])
+
+    def test_phrases(self):
+        self.assertEqual(self.index.search('"lighthouse keeper"'), [(self.filePath, 'ch1', 'sc1')])
+        self.assertEqual(self.index.search('"keeper lighthouse"'), [])
+        # Phrases do not span fields.
+        self.assertEqual(self.index.search('"storm a"'), [])
+
+    def test_prefixes(self):
+        self.assertEqual(self.index.search('mark*'), [(self.filePath, 'ch2', 'sc3')])
+        self.assertEqual(self.index.search('keep* bread'), [(self.filePath, 'ch2', 'sc3')])
+        self.assertEqual(self.index.search('keep*', limit=1), [(self.filePath, 'ch1', 'sc1')])
+
+    def test_unchanged_project_skipped(self):
+        self.assertEqual(self.index.update([self.filePath]), {})
+
+    def test_changed_section(self):
+        self.write_project('novel.novx', 'The tide rose over the pier.')
+        results = self.index.update([self.filePath], force=True)
+        self.assertFalse(results[self.filePath].startswith('!'))
+        self.assertEqual(self.index.search('night'), [])
+        self.assertEqual(self.index.search('tide'), [(self.filePath, 'ch1', 'sc2')])
+        self.assertEqual(self.index.search('fog'), [(self.filePath, 'ch1', 'sc1')])
+
+    def test_several_projects(self):
+        otherPath = self.write_project('other.novx', 'Night fell over the market.')
+        self.index.update([self.filePath, otherPath])
+        self.assertEqual(self.index.search('night'), [
+            (self.filePath, 'ch1', 'sc2'),
+            (otherPath, 'ch1', 'sc2'),
+            ])
+        self.index.remove_project(otherPath)
+        self.assertEqual(self.index.search('night'), [(self.filePath, 'ch1', 'sc2')])
+
+    def test_missing_project_removed(self):
+        os.remove(self.filePath)
+        results = self.index.update([])
+        self.assertIn(self.filePath, results)
+        self.assertEqual(self.index.search('fog'), [])
+
+    def test_unreadable_project(self):
+        brokenPath = os.path.join(self.testDir, 'broken.novx')
+        with open(brokenPath, 'w', encoding='utf-8') as f:
+            f.write('<novx><CHAPTERS>')
+        results = self.index.update([brokenPath])
+        self.assertTrue(results[brokenPath].startswith('!'))
+        self.assertEqual(self.index.search('fog'), [(self.filePath, 'ch1', 'sc1')])
+
+    def test_compact_and_reopen(self):
+        self.write_project('novel.novx', 'The tide rose over the pier.')
+        self.index.update([self.filePath], force=True)
+        self.index.compact()
+        self.index.close()
+        self.index = SearchIndex(self.indexDir)
+        self.assertEqual(self.index.search('tide'), [(self.filePath, 'ch1', 'sc2')])
+        self.assertEqual(self.index.search('night'), [])
+        self.assertEqual(self.index.search('"lighthouse keeper"'), [(self.filePath, 'ch1', 'sc1')])
+        segmentFiles = [fileName for fileName in os.listdir(self.indexDir) if fileName.startswith('segment')]
+        self.assertEqual(len(segmentFiles), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Regression test for the sparse table of the spreadsheet reader.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from novxlib.model.sparse_grid import SparseGrid
+
+
+class SparseGridTest(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = SparseGrid()
+        self.grid.set_titles(['ID ', 'Title', 'Notes'])
+        self.grid.add_row([(0, 'ch1 '), (1, 'Chapter')])
+        self.grid.add_row([(0, 'sc1'), (2, 'Note')])
+
+    def test_titles_and_rows(self):
+        self.assertEqual(self.grid.titles, ['ID', 'Title', 'Notes'])
+        self.assertEqual(self.grid.rowIds, ['ch1', 'sc1'])
+        self.assertEqual(self.grid.cellCount, 4)
+
+    def test_get(self):
+        self.assertEqual(self.grid.get('ch1', 'Title'), 'Chapter')
+        self.assertEqual(self.grid.get('ch1', 'Notes'), '')
+        self.assertEqual(self.grid.get('sc1', 'Notes'), 'Note')
+        with self.assertRaises(KeyError):
+            self.grid.get('sc2', 'Title')
+        with self.assertRaises(KeyError):
+            self.grid.get('ch1', 'Tags')
+
+    def test_rows_without_id(self):
+        self.assertIsNone(self.grid.add_row([]))
+        self.assertIsNone(self.grid.add_row([(1, 'No ID')]))
+        self.assertEqual(self.grid.rowIds, ['ch1', 'sc1'])
+
+    def test_overwrite_row(self):
+        self.assertEqual(self.grid.add_row([(0, 'ch1'), (1, 'Changed')]), 'ch1')
+        self.assertEqual(self.grid.rowIds, ['ch1', 'sc1'])
+        self.assertEqual(self.grid.get('ch1', 'Title'), 'Changed')
+
+    def test_cells_beyond_titles(self):
+        self.grid.add_row([(0, 'sc2'), (5, 'Ignored')])
+        self.assertEqual(self.grid.cellCount, 5)
+        self.assertEqual(self.grid.get('sc2', 'Title'), '')
+
+
+class SparseColumnTest(unittest.TestCase):
+
+    def setUp(self):
+        grid = SparseGrid()
+        grid.set_titles(['ID', 'Title'])
+        grid.add_row([(0, 'ch1'), (1, 'Chapter')])
+        grid.add_row([(0, 'sc1')])
+        grid.add_row([(0, 'sc2'), (1, 'Section')])
+        self.column = grid.get_column_dict()['Title']
+
+    def test_mapping(self):
+        self.assertEqual(len(self.column), 3)
+        self.assertEqual(list(self.column), ['ch1', 'sc1', 'sc2'])
+        self.assertIn('sc1', self.column)
+        self.assertNotIn('sc3', self.column)
+        self.assertEqual(self.column['sc1'], '')
+        self.assertEqual(self.column.get('sc3', None), None)
+        with self.assertRaises(KeyError):
+            self.column['sc3']
+
+    def test_dense_equivalent(self):
+        self.assertEqual(dict(self.column), {'ch1': 'Chapter', 'sc1': '', 'sc2': 'Section'})
+
+    def test_iter_cells(self):
+        self.assertEqual(list(self.column.iter_cells()), [('ch1', 'Chapter'), ('sc2', 'Section')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+"""Regression test for the timeline engine and the ODS timeline columns.
+
+Requires the nvlib package of novelibre; the test is skipped without it.
+
+Copyright (c) 2024 Peter Triesberger
+For further information see https://github.com/peter88213/novelibre
+License: GNU LGPLv3 (https://www.gnu.org/licenses/lgpl-3.0.en.html)
+"""
+from datetime import datetime
+from datetime import timedelta
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from novxlib.model import timeline
+    from novxlib.model.timeline import Timeline
+    from novxlib.ods.ods_columns import add_cells
+    from novxlib.ods.ods_columns import add_titles
+    from nvlib.novx_globals import CH_ROOT
+    from nvlib.novx_globals import CR_ROOT
+except ImportError:
+    Timeline = None
+
+HEADER = '''<table:table table:name="Characters">
+<table:table-column table:style-name="co1"/>
+<table:table-column table:style-name="co2" table:number-columns-repeated="2"/>
+<table:table-row table:style-name="ro1">
+<table:table-cell table:style-name="Heading" office:value-type="string"><text:p>ID</text:p></table:table-cell>
+<table:table-cell table:style-name="Heading" office:value-type="string"><text:p>Name</text:p></table:table-cell>
+</table:table-row>
+'''
+ROW = '''<table:table-row table:style-name="ro2">
+<table:table-cell office:value-type="string"><text:p>$ID</text:p></table:table-cell>
+</table:table-row>
+'''
+
+
+class Element:
+    """Element with arbitrary attributes."""
+
+    def __init__(self, **kwargs):
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+
+class Tree:
+    """Minimal tree with the children of the nodes."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def get_children(self, node):
+        return self.nodes.get(node, [])
+
+
+def make_section(date=None, day=None, time=None, lastsDays=None, lastsHours=None, lastsMinutes=None):
+    return Element(
+        date=date,
+        day=day,
+        time=time,
+        lastsDays=lastsDays,
+        lastsHours=lastsHours,
+        lastsMinutes=lastsMinutes,
+        )
+
+
+def make_novel(referenceDate='1900-01-01'):
+    """Return a novel with dated, day-offset, and undated sections, and three characters."""
+    novel = Element(referenceDate=referenceDate)
+    novel.tree = Tree({
+        CH_ROOT: ['ch1', 'ch2'],
+        'ch1': ['sc1', 'sc2'],
+        'ch2': ['sc3', 'sc4'],
+        CR_ROOT: ['cr1', 'cr2', 'cr3'],
+        })
+    novel.sections = {
+        'sc1': make_section(date='1920-06-15', time='08:30:00', lastsHours='2', lastsMinutes='15'),
+        'sc2': make_section(day='10', time='23:00', lastsDays='1'),
+        'sc3': make_section(date='1960-06-14'),
+        'sc4': make_section(),
+        }
+    novel.characters = {
+        'cr1': Element(birthDate='1900-06-15', deathDate='1950-01-01'),
+        'cr2': Element(birthDate='1928-02-29', deathDate=None),
+        'cr3': Element(birthDate=None, deathDate=None),
+        }
+    return novel
+
+
+@unittest.skipIf(Timeline is None, 'nvlib is not installed')
+class TimelineTest(unittest.TestCase):
+
+    def test_start_and_end(self):
+        engine = Timeline(make_novel())
+        self.assertEqual(engine.sectionIds, ['sc1', 'sc2', 'sc3', 'sc4'])
+        self.assertEqual(engine.get_start('sc1'), datetime(1920, 6, 15, 8, 30))
+        self.assertEqual(engine.get_end('sc1'), datetime(1920, 6, 15, 10, 45))
+        self.assertEqual(engine.get_duration('sc2'), timedelta(days=1))
+        self.assertIsNone(engine.get_start('sc4'))
+        self.assertIsNone(engine.get_end('sc4'))
+
+    def test_day_offset(self):
+        engine = Timeline(make_novel())
+        self.assertEqual(engine.get_start('sc2'), datetime(1900, 1, 11, 23, 0))
+        self.assertEqual(engine.get_end('sc2'), datetime(1900, 1, 12, 23, 0))
+        engine = Timeline(make_novel(referenceDate=None))
+        self.assertIsNone(engine.get_start('sc2'))
+
+    def test_ages(self):
+        engine = Timeline(make_novel(), useNumpy=False)
+        self.assertEqual(engine.get_ages(), [
+            [20, None, None],
+            [None, None, None],
+            [-10, 32, None],
+            [None, None, None],
+            ])
+        self.assertEqual(engine.get_ages(['sc3'], ['cr2', 'cr1']), [[32, -10]])
+        self.assertEqual(engine.get_age('sc1', 'cr1'), 20)
+
+    def test_full_years(self):
+        novel = make_novel()
+        novel.sections['sc1'].date = '1920-06-14'
+        novel.sections['sc3'].date = '1960-02-28'
+        engine = Timeline(novel, useNumpy=False)
+        self.assertEqual(engine.get_age('sc1', 'cr1'), 19)
+        self.assertEqual(engine.get_age('sc3', 'cr2'), 31)
+
+    def test_numpy_matches_python(self):
+        if timeline.numpy is None:
+            self.skipTest('NumPy is not installed')
+        novel = make_novel()
+        engine = Timeline(novel, useNumpy=True)
+        self.assertTrue(engine.useNumpy)
+        self.assertEqual(engine.get_ages(), Timeline(novel, useNumpy=False).get_ages())
+        self.assertEqual(engine.get_ages(['sc3'], ['cr2', 'cr1']), [[32, -10]])
+
+
+@unittest.skipIf(Timeline is None, 'nvlib is not installed')
+class OdsColumnsTest(unittest.TestCase):
+
+    def test_add_cells(self):
+        row = add_cells(ROW, ('Start', 'End'))
+        self.assertTrue(row.startswith(ROW[:ROW.rfind('</table:table-row>')]))
+        self.assertIn('<text:p>$Start</text:p></table:table-cell><table:table-cell', row)
+        self.assertTrue(row.endswith('<text:p>$End</text:p></table:table-cell></table:table-row>\n'))
+        self.assertEqual(add_cells('$Text', ('Start',)), '$Text')
+
+    def test_add_titles(self):
+        header = add_titles(HEADER, ('Age & Status',))
+        self.assertIn(
+            '<table:table-cell table:style-name="Heading" office:value-type="string">'
+            '<text:p>Age &amp; Status</text:p></table:table-cell></table:table-row>',
+            header,
+            )
+        self.assertIn(
+            'table:number-columns-repeated="2"/>'
+            '<table:table-column table:default-cell-style-name="Default"/>\n<table:table-row',
+            header,
+            )
+        self.assertEqual(add_titles('<office:text>', ('Age',)), '<office:text>')
+
+
+if __name__ == '__main__':
+    unittest.main()